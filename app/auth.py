@@ -5,6 +5,7 @@ from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import bcrypt
+from app.utils import ban_list, activity
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against bcrypt hash"""
@@ -42,6 +43,14 @@ def decode_token(token: str):
     except JWTError:
         return None
 
+def ensure_not_banned(user_id: str):
+    """Reject requests acting as a banned user"""
+    if ban_list.is_banned(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account has been banned"
+        )
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Get current user from JWT token"""
     credentials_exception = HTTPException(
@@ -58,4 +67,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     if user_id is None:
         raise credentials_exception
 
+    ensure_not_banned(user_id)
+
+    activity.record(user_id)
     return user_id
@@ -0,0 +1,53 @@
+# app/crud/analytics.py
+from app.config import get_db
+from app.jobs.analytics_rollup import STATS
+from datetime import date, timedelta
+
+def get_daily_stats(start_date: date, end_date: date):
+    """Get DailyStat rollups in [start_date, end_date], one row per day (missing days are zero)"""
+    session = get_db()
+    query = """
+    MATCH (d:DailyStat)
+    WHERE d.date >= $start AND d.date <= $end
+    RETURN d
+    ORDER BY d.date
+    """
+    results = session.run(query, {"start": start_date.isoformat(), "end": end_date.isoformat()})
+    stored = {record["d"]["date"]: record["d"] for record in results}
+
+    rows = []
+    day = start_date
+    while day <= end_date:
+        node = stored.get(day.isoformat(), {})
+        row = {"date": day.isoformat()}
+        for stat in STATS:
+            row[stat] = node.get(stat) or 0
+        rows.append(row)
+        day += timedelta(days=1)
+
+    return rows
+
+def get_timeseries(start_date: date, end_date: date, bucket: str = "day", stats: list = None):
+    """
+    Daily or weekly (ISO weeks, keyed by Monday) time series served from the
+    rollups. Weekly active_users is the busiest day of the week, since daily
+    active users cannot be summed without double counting.
+    """
+    stats = stats or STATS
+    daily = get_daily_stats(start_date, end_date)
+
+    if bucket == "day":
+        return [{"date": row["date"], **{s: row[s] for s in stats}} for row in daily]
+
+    weeks = {}
+    for row in daily:
+        day = date.fromisoformat(row["date"])
+        week_start = (day - timedelta(days=day.weekday())).isoformat()
+        week = weeks.setdefault(week_start, {"date": week_start, **{s: 0 for s in stats}})
+        for s in stats:
+            if s == "active_users":
+                week[s] = max(week[s], row[s])
+            else:
+                week[s] += row[s]
+
+    return [weeks[key] for key in sorted(weeks)]
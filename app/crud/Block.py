@@ -1,8 +1,14 @@
 # app/crud/block.py
 from app.config import get_db
 from app.models.Block import Block, Report
+from app.utils import block_index
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.crud.Match import invalidate_match_lists
 import uuid
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
+
+REPORT_STATUSES = ["pending", "reviewed", "resolved"]
 
 def create_block(blocker_id: str, blocked_id: str, reason: str, details: str = None):
     session = get_db()
@@ -31,6 +37,9 @@ def create_block(blocker_id: str, blocked_id: str, reason: str, details: str = N
     record = result.single()
     rel = record["b"]
 
+    block_index.invalidate(blocker_id, blocked_id)
+    invalidate_match_lists(blocker_id, blocked_id)
+
     return Block(
         block_id=rel["block_id"],
         blocker_id=blocker_id,
@@ -92,6 +101,8 @@ def unblock_user(blocker_id: str, blocked_id: str):
     DELETE b
     """
     session.run(query, {"blocker_id": blocker_id, "blocked_id": blocked_id})
+    block_index.invalidate(blocker_id, blocked_id)
+    invalidate_match_lists(blocker_id, blocked_id)
     return True
 
 def is_user_blocked(blocker_id: str, blocked_id: str):
@@ -106,12 +117,25 @@ def is_user_blocked(blocker_id: str, blocked_id: str):
     return result["block_count"] > 0
 
 # Report functions
+def _report_from_node(node):
+    return Report(
+        report_id=node["report_id"],
+        reporter_id=node["reporter_id"],
+        reported_id=node["reported_id"],
+        reason=node["reason"],
+        details=node.get("details"),
+        timestamp=node["timestamp"],
+        status=node["status"]
+    )
+
 def create_report(reporter_id: str, reported_id: str, reason: str, details: str = None):
     session = get_db()
     report_id = str(uuid.uuid4())
 
-    query = """
-    CREATE (r:Report {
+    # The report and its moderation case are written together so the queue
+    # never misses a report
+    query = f"""
+    CREATE (r:Report {{
         report_id: $report_id,
         reporter_id: $reporter_id,
         reported_id: $reported_id,
@@ -119,7 +143,16 @@ def create_report(reporter_id: str, reported_id: str, reason: str, details: str
         details: $details,
         timestamp: $timestamp,
         status: 'pending'
-    })
+    }})
+    MERGE (c:ModerationCase {{reported_id: $reported_id}})
+    ON CREATE SET c.status = 'open', c.total_reports = 0, c.open_reports = 0,
+                  c.points = 0, c.offenses = 0, c.first_reported_at = $timestamp
+    SET c.total_reports = c.total_reports + 1,
+        c.open_reports = c.open_reports + 1,
+        c.points = c.points + $weight,
+        c.last_reported_at = $timestamp,
+        c.status = CASE WHEN c.status = 'resolved' THEN 'open' ELSE c.status END
+    SET c.priority = {_PRIORITY_EXPR.format(last="$timestamp")}
     RETURN r
     """
 
@@ -129,21 +162,13 @@ def create_report(reporter_id: str, reported_id: str, reason: str, details: str
         "reported_id": reported_id,
         "reason": reason,
         "details": details,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "weight": REPORT_REASON_WEIGHTS.get(reason, 1),
+        **_priority_params()
     })
 
     record = result.single()
-    node = record["r"]
-
-    return Report(
-        report_id=node["report_id"],
-        reporter_id=node["reporter_id"],
-        reported_id=node["reported_id"],
-        reason=node["reason"],
-        details=node.get("details"),
-        timestamp=node["timestamp"],
-        status=node["status"]
-    )
+    return _report_from_node(record["r"])
 
 def get_report_by_id(report_id: str):
     session = get_db()
@@ -153,42 +178,47 @@ def get_report_by_id(report_id: str):
     if not result:
         return None
 
-    node = result["r"]
-    return Report(
-        report_id=node["report_id"],
-        reporter_id=node["reporter_id"],
-        reported_id=node["reported_id"],
-        reason=node["reason"],
-        details=node.get("details"),
-        timestamp=node["timestamp"],
-        status=node["status"]
-    )
+    return _report_from_node(result["r"])
 
-def get_all_reports(status: str = None):
-    """Get all reports, optionally filtered by status"""
+def get_all_reports(status: str = None, limit: int = 100, cursor: str = None):
+    """
+    Get reports newest first, optionally filtered by status, one page at a
+    time using keyset pagination on (timestamp, report_id).
+    Returns (reports, next_cursor). Raises ValueError for a malformed cursor.
+    """
     session = get_db()
+    clauses = []
+    params = {"limit": limit}
 
     if status:
-        query = "MATCH (r:Report {status: $status}) RETURN r ORDER BY r.timestamp DESC"
-        results = session.run(query, {"status": status})
-    else:
-        query = "MATCH (r:Report) RETURN r ORDER BY r.timestamp DESC"
-        results = session.run(query)
+        clauses.append("r.status = $status")
+        params["status"] = status
 
-    reports = []
-    for record in results:
-        node = record["r"]
-        reports.append(Report(
-            report_id=node["report_id"],
-            reporter_id=node["reporter_id"],
-            reported_id=node["reported_id"],
-            reason=node["reason"],
-            details=node.get("details"),
-            timestamp=node["timestamp"],
-            status=node["status"]
-        ))
-
-    return reports
+    after = decode_cursor(cursor, size=2)
+    if after:
+        clauses.append(
+            "(r.timestamp < $cursor_timestamp"
+            " OR (r.timestamp = $cursor_timestamp AND r.report_id < $cursor_report_id))"
+        )
+        params["cursor_timestamp"], params["cursor_report_id"] = after
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = f"""
+    MATCH (r:Report)
+    {where}
+    RETURN r
+    ORDER BY r.timestamp DESC, r.report_id DESC
+    LIMIT $limit
+    """
+    results = session.run(query, params)
+
+    reports = [_report_from_node(record["r"]) for record in results]
+
+    next_cursor = None
+    if len(reports) == limit:
+        next_cursor = encode_cursor(reports[-1].timestamp, reports[-1].report_id)
+
+    return reports, next_cursor
 
 def update_report_status(report_id: str, status: str):
     session = get_db()
@@ -202,13 +232,252 @@ def update_report_status(report_id: str, status: str):
     if not result:
         return None
 
-    node = result["r"]
-    return Report(
-        report_id=node["report_id"],
-        reporter_id=node["reporter_id"],
-        reported_id=node["reported_id"],
-        reason=node["reason"],
-        details=node.get("details"),
-        timestamp=node["timestamp"],
-        status=node["status"]
-    )
+    report = _report_from_node(result["r"])
+    refresh_moderation_cases([report.reported_id])
+    return report
+
+# Moderation queue
+#
+# Reports are grouped into one ModerationCase node per reported user, kept
+# up to date as reports arrive. A case's priority is
+#     (points + offenses * REPORT_OFFENSE_WEIGHT) * REPORT_PRIORITY_HOURS
+#     + hours since the epoch of its latest report
+# where points sum the reason weights of its open reports and offenses
+# counts past cases resolved with action. Newer reports thus rank higher
+# without any periodic rescoring, and each point of severity is worth
+# REPORT_PRIORITY_HOURS of recency. The queue is read through an index on
+# (status, priority).
+REPORT_REASON_WEIGHTS = {
+    "harassment": 3,
+    "inappropriate_content": 2,
+    "fake_profile": 2,
+    "spam": 1,
+    "other": 1
+}
+REPORT_OFFENSE_WEIGHT = int(os.getenv("REPORT_OFFENSE_WEIGHT", "3"))
+REPORT_PRIORITY_HOURS = int(os.getenv("REPORT_PRIORITY_HOURS", "12"))
+REPORT_CLAIM_TTL_MINUTES = int(os.getenv("REPORT_CLAIM_TTL_MINUTES", "30"))
+CASE_OUTCOMES = ["dismissed", "actioned"]
+
+_PRIORITY_EXPR = "(c.points + c.offenses * $offense_weight) * $priority_hours + datetime({last}).epochSeconds / 3600.0"
+
+def _priority_params():
+    return {"offense_weight": REPORT_OFFENSE_WEIGHT, "priority_hours": REPORT_PRIORITY_HOURS}
+
+def _stale_before(now: datetime = None):
+    # Claims made before this have expired and the case counts as open again
+    return ((now or datetime.utcnow()) - timedelta(minutes=REPORT_CLAIM_TTL_MINUTES)).isoformat()
+
+def _case_from_node(node, reasons=None):
+    status = node["status"]
+    if status == "claimed" and (node.get("claimed_at") or "") < _stale_before():
+        status = "open"
+    return {
+        "reported_id": node["reported_id"],
+        "status": status,
+        "priority": node.get("priority"),
+        "open_reports": node.get("open_reports", 0),
+        "total_reports": node.get("total_reports", 0),
+        "offenses": node.get("offenses", 0),
+        "reasons": reasons,
+        "first_reported_at": node.get("first_reported_at"),
+        "last_reported_at": node.get("last_reported_at"),
+        "claimed_by": node.get("claimed_by"),
+        "claimed_at": node.get("claimed_at"),
+        "resolved_by": node.get("resolved_by"),
+        "resolved_at": node.get("resolved_at"),
+        "outcome": node.get("outcome")
+    }
+
+def refresh_moderation_cases(reported_ids):
+    """Recompute cases from their reports, e.g. after report statuses change"""
+    session = get_db()
+    query = f"""
+    UNWIND $reported_ids as reported_id
+    MATCH (c:ModerationCase {{reported_id: reported_id}})
+    OPTIONAL MATCH (r:Report {{reported_id: reported_id}})
+    WHERE r.status <> 'resolved'
+    WITH c, count(r) as open_reports,
+         sum(coalesce($weights[r.reason], 1)) as points,
+         max(r.timestamp) as last_open
+    SET c.open_reports = open_reports,
+        c.points = CASE WHEN open_reports = 0 THEN 0 ELSE points END,
+        c.status = CASE
+            WHEN open_reports = 0 THEN 'resolved'
+            WHEN c.status = 'resolved' THEN 'open'
+            ELSE c.status
+        END
+    SET c.priority = {_PRIORITY_EXPR.format(last="coalesce(last_open, c.last_reported_at)")}
+    """
+    session.run(query, {
+        "reported_ids": list(set(reported_ids)),
+        "weights": REPORT_REASON_WEIGHTS,
+        **_priority_params()
+    }).consume()
+
+def rebuild_moderation_queue():
+    """Create or recompute the case of every reported user from their reports"""
+    session = get_db()
+    query = """
+    MATCH (r:Report)
+    WITH r.reported_id as reported_id, count(r) as total_reports,
+         min(r.timestamp) as first_reported_at, max(r.timestamp) as last_reported_at
+    MERGE (c:ModerationCase {reported_id: reported_id})
+    ON CREATE SET c.status = 'open', c.offenses = 0
+    SET c.total_reports = total_reports,
+        c.first_reported_at = first_reported_at,
+        c.last_reported_at = last_reported_at
+    RETURN collect(reported_id) as reported_ids
+    """
+    reported_ids = session.run(query).single()["reported_ids"]
+    refresh_moderation_cases(reported_ids)
+    return len(reported_ids)
+
+def get_moderation_queue(status: str = "open", limit: int = 20, cursor: str = None):
+    """
+    Get moderation cases by descending priority, with the open reports'
+    reason counts, using keyset pagination on (priority, reported_id).
+    Cases whose claim expired are listed as open rather than claimed.
+    Returns (cases, next_cursor). Raises ValueError for a malformed cursor.
+    """
+    session = get_db()
+    params = {"status": status, "limit": limit, "stale_before": _stale_before()}
+    if status == "open":
+        where = "WHERE (c.status = 'open' OR (c.status = 'claimed' AND c.claimed_at < $stale_before))"
+    elif status == "claimed":
+        where = "WHERE c.status = 'claimed' AND c.claimed_at >= $stale_before"
+    else:
+        where = "WHERE c.status = $status"
+
+    after = decode_cursor(cursor, size=2)
+    if after:
+        where += (
+            " AND (c.priority < $cursor_priority"
+            " OR (c.priority = $cursor_priority AND c.reported_id > $cursor_reported_id))"
+        )
+        params["cursor_priority"], params["cursor_reported_id"] = after
+
+    query = f"""
+    MATCH (c:ModerationCase)
+    {where}
+    WITH c
+    ORDER BY c.priority DESC, c.reported_id ASC
+    LIMIT $limit
+    CALL {{
+        WITH c
+        OPTIONAL MATCH (r:Report {{reported_id: c.reported_id}})
+        WHERE r.status <> 'resolved'
+        WITH r.reason as reason, count(r) as reason_count
+        WHERE reason IS NOT NULL
+        RETURN collect({{reason: reason, count: reason_count}}) as reasons
+    }}
+    RETURN c, reasons
+    ORDER BY c.priority DESC, c.reported_id ASC
+    """
+    results = session.run(query, params)
+
+    cases = [
+        _case_from_node(record["c"], {r["reason"]: r["count"] for r in record["reasons"]})
+        for record in results
+    ]
+
+    next_cursor = None
+    if len(cases) == limit:
+        next_cursor = encode_cursor(cases[-1]["priority"], cases[-1]["reported_id"])
+
+    return cases, next_cursor
+
+def get_case_reports(reported_id: str):
+    """All reports about a user, newest first"""
+    session = get_db()
+    query = """
+    MATCH (r:Report {reported_id: $reported_id})
+    RETURN r
+    ORDER BY r.timestamp DESC
+    """
+    return [_report_from_node(record["r"]) for record in session.run(query, {"reported_id": reported_id})]
+
+def claim_case(reported_id: str, moderator: str):
+    """
+    Claim an open case (or one whose claim went stale) for a moderator.
+    Returns the case, or None if it does not exist or someone else holds it.
+    """
+    session = get_db()
+    now = datetime.utcnow()
+    # Touching the node first takes its write lock, so two moderators racing
+    # for the same case are serialized and the status check sees the winner
+    query = """
+    MATCH (c:ModerationCase {reported_id: $reported_id})
+    SET c.claim_lock = true
+    REMOVE c.claim_lock
+    WITH c
+    WHERE c.status = 'open'
+       OR (c.status = 'claimed' AND (c.claimed_by = $moderator OR c.claimed_at < $stale_before))
+    SET c.status = 'claimed', c.claimed_by = $moderator, c.claimed_at = $now
+    RETURN c
+    """
+    result = session.run(query, {
+        "reported_id": reported_id,
+        "moderator": moderator,
+        "now": now.isoformat(),
+        "stale_before": _stale_before(now)
+    }).single()
+
+    return _case_from_node(result["c"]) if result else None
+
+def claim_next_case(moderator: str, candidates: int = 10):
+    """Claim the highest-priority open (or expired) case nobody else grabbed first"""
+    cases, _ = get_moderation_queue("open", candidates)
+    for case in cases:
+        claimed = claim_case(case["reported_id"], moderator)
+        if claimed:
+            return claimed
+    return None
+
+def release_case(reported_id: str, moderator: str):
+    """Give a claimed case back to the queue. Returns None unless the moderator holds it."""
+    session = get_db()
+    query = """
+    MATCH (c:ModerationCase {reported_id: $reported_id, status: 'claimed', claimed_by: $moderator})
+    SET c.status = 'open'
+    REMOVE c.claimed_by, c.claimed_at
+    RETURN c
+    """
+    result = session.run(query, {"reported_id": reported_id, "moderator": moderator}).single()
+    return _case_from_node(result["c"]) if result else None
+
+def resolve_case(reported_id: str, moderator: str, outcome: str):
+    """
+    Resolve a case claimed by the moderator, closing all its open reports.
+    Returns None unless the moderator holds the claim.
+    """
+    session = get_db()
+    query = """
+    MATCH (c:ModerationCase {reported_id: $reported_id, status: 'claimed', claimed_by: $moderator})
+    OPTIONAL MATCH (r:Report {reported_id: $reported_id})
+    WHERE r.status <> 'resolved'
+    SET r.status = 'resolved'
+    WITH c, count(r) as closed_reports
+    SET c.status = 'resolved',
+        c.outcome = $outcome,
+        c.resolved_by = $moderator,
+        c.resolved_at = $now,
+        c.open_reports = 0,
+        c.points = 0,
+        c.offenses = c.offenses + CASE WHEN $outcome = 'actioned' THEN 1 ELSE 0 END
+    REMOVE c.claimed_by, c.claimed_at
+    RETURN c, closed_reports
+    """
+    result = session.run(query, {
+        "reported_id": reported_id,
+        "moderator": moderator,
+        "outcome": outcome,
+        "now": datetime.utcnow().isoformat()
+    }).single()
+
+    if not result:
+        return None
+
+    case = _case_from_node(result["c"])
+    case["closed_reports"] = result["closed_reports"]
+    return case
@@ -1,29 +1,45 @@
 # app/crud/interest.py
 from app.config import get_db
 from app.models.Interest import Interest
+from app.utils import interest_catalog
+from app.utils.interest_catalog import normalize_name
 import uuid
 
+# Takes the next value of the interest ordinal sequence for an interest that
+# has none; the Sequence node's write lock serializes concurrent creators
+ASSIGN_ORDINAL_SUBQUERY = """
+CALL {
+    WITH i
+    WITH i WHERE i.ordinal IS NULL
+    MERGE (seq:Sequence {name: 'interest_ordinal'})
+    SET seq.value = coalesce(seq.value, -1) + 1
+    SET i.ordinal = seq.value
+}
+"""
+
 def create_interest(name: str, category: str):
+    """Create an interest, or return the existing one with the same normalized name"""
     session = get_db()
     interest_id = str(uuid.uuid4())
 
-    query = """
-    CREATE (i:Interest {
-        interest_id: $interest_id,
-        name: $name,
-        category: $category
-    })
+    query = f"""
+    MERGE (i:Interest {{name_key: $name_key}})
+    ON CREATE SET i.interest_id = $interest_id, i.name = $name, i.category = $category
+    WITH i
+    {ASSIGN_ORDINAL_SUBQUERY}
     RETURN i
     """
 
     result = session.run(query, {
         "interest_id": interest_id,
         "name": name,
+        "name_key": normalize_name(name),
         "category": category
     })
 
     record = result.single()
     node = record["i"]
+    interest_catalog.invalidate()
 
     return Interest(
         interest_id=node["interest_id"],
@@ -47,31 +63,23 @@ def get_interest_by_id(interest_id: str):
     )
 
 def get_all_interests(category: str = None):
-    session = get_db()
-
-    if category:
-        query = "MATCH (i:Interest {category: $category}) RETURN i ORDER BY i.name"
-        results = session.run(query, {"category": category})
-    else:
-        query = "MATCH (i:Interest) RETURN i ORDER BY i.name"
-        results = session.run(query)
-
-    interests = []
-    for record in results:
-        node = record["i"]
-        interests.append(Interest(
-            interest_id=node["interest_id"],
-            name=node["name"],
-            category=node["category"]
-        ))
-
-    return interests
+    """Get the catalog from the in-memory snapshot, optionally filtered by category"""
+    catalog = interest_catalog.get_catalog()
+    return [
+        Interest(interest_id=i["interest_id"], name=i["name"], category=i["category"])
+        for i in catalog.interests
+        if not category or i["category"] == category
+    ]
 
 def add_user_interest(user_id: str, interest_id: str):
     session = get_db()
+    # Keep the denormalized name and ordinal lists on the user in step
     query = """
     MATCH (u:User {user_id: $user_id}), (i:Interest {interest_id: $interest_id})
     MERGE (u)-[:HAS_INTEREST]->(i)
+    WITH u, i, coalesce(u.interests, []) as names, coalesce(u.interest_ordinals, []) as ordinals
+    SET u.interests = CASE WHEN i.name IN names THEN names ELSE names + i.name END,
+        u.interest_ordinals = CASE WHEN i.ordinal IS NULL OR i.ordinal IN ordinals THEN ordinals ELSE ordinals + i.ordinal END
     RETURN i
     """
     result = session.run(query, {"user_id": user_id, "interest_id": interest_id}).single()
@@ -91,6 +99,8 @@ def remove_user_interest(user_id: str, interest_id: str):
     query = """
     MATCH (u:User {user_id: $user_id})-[r:HAS_INTEREST]->(i:Interest {interest_id: $interest_id})
     DELETE r
+    SET u.interests = [name IN coalesce(u.interests, []) WHERE name <> i.name],
+        u.interest_ordinals = [o IN coalesce(u.interest_ordinals, []) WHERE o <> i.ordinal]
     """
     session.run(query, {"user_id": user_id, "interest_id": interest_id})
     return True
@@ -146,3 +156,138 @@ def get_common_interests(user1_id: str, user2_id: str):
         ))
 
     return interests
+
+# User interests are stored twice: HAS_INTEREST edges for graph queries and
+# the u.interests (names) / u.interest_ordinals lists for reads and ranking.
+# This query rewrites both for a batch of users.
+SYNC_USER_INTERESTS_QUERY = """
+UNWIND $rows as row
+MATCH (u:User {user_id: row.user_id})
+CALL {
+    WITH u, row
+    MATCH (u)-[r:HAS_INTEREST]->(old:Interest)
+    WHERE NOT old.interest_id IN row.interest_ids
+    DELETE r
+}
+CALL {
+    WITH u, row
+    UNWIND row.interest_ids as interest_id
+    MATCH (i:Interest {interest_id: interest_id})
+    MERGE (u)-[:HAS_INTEREST]->(i)
+}
+SET u.interests = row.names, u.interest_ordinals = row.ordinals
+RETURN count(u) as synced
+"""
+
+def resolve_interest_names(names):
+    """
+    Map free-text names to catalog interests, creating unknown ones under
+    'other'. Returns catalog entries (dicts) in input order, without duplicates.
+    """
+    catalog = interest_catalog.get_catalog()
+    resolved = {}
+    for name in names or []:
+        if not name or not name.strip():
+            continue
+        key = normalize_name(name)
+        if key in resolved:
+            continue
+        entry = catalog.by_name.get(key)
+        if entry is None or entry["ordinal"] is None:
+            created = create_interest(" ".join(name.split()), "other")
+            catalog = interest_catalog.get_catalog()
+            entry = catalog.by_id.get(created.interest_id)
+        resolved[key] = entry
+    return [entry for entry in resolved.values() if entry]
+
+def _sync_row(user_id: str, entries):
+    return {
+        "user_id": user_id,
+        "interest_ids": [e["interest_id"] for e in entries],
+        "names": [e["name"] for e in entries],
+        "ordinals": [e["ordinal"] for e in entries]
+    }
+
+def set_user_interests(user_id: str, names):
+    """Replace a user's interests with the given names, keeping edges and lists in sync"""
+    session = get_db()
+    entries = resolve_interest_names(names)
+    session.run(SYNC_USER_INTERESTS_QUERY, {"rows": [_sync_row(user_id, entries)]}).consume()
+    return entries
+
+def migrate_interest_lists(batch_size: int = 500):
+    """
+    Normalize legacy data: give every Interest a name_key and ordinal, then
+    turn each user's free-text interests list into HAS_INTEREST edges (and
+    canonical names/ordinals). Safe to re-run. Returns counts.
+    """
+    session = get_db()
+
+    unkeyed = session.run("MATCH (i:Interest) WHERE i.name_key IS NULL RETURN i.interest_id as interest_id, i.name as name")
+    session.run("""
+    UNWIND $rows as row
+    MATCH (i:Interest {interest_id: row.interest_id})
+    SET i.name_key = row.name_key
+    """, {"rows": [{"interest_id": r["interest_id"], "name_key": normalize_name(r["name"])} for r in unkeyed]}).consume()
+
+    numbered = session.run("""
+    MATCH (i:Interest) WHERE i.ordinal IS NULL
+    WITH i ORDER BY i.name
+    WITH collect(i) as pending
+    MERGE (seq:Sequence {name: 'interest_ordinal'})
+    WITH seq, pending, coalesce(seq.value, -1) as base
+    SET seq.value = base + size(pending)
+    WITH base, pending
+    UNWIND range(0, size(pending) - 1) as idx
+    WITH pending[idx] as i, base + 1 + idx as ordinal
+    SET i.ordinal = ordinal
+    RETURN count(i) as numbered
+    """).single()["numbered"]
+    interest_catalog.invalidate()
+
+    query = """
+    MATCH (u:User)
+    WHERE u.user_id > $after AND size(coalesce(u.interests, [])) > 0
+    RETURN u.user_id as user_id, u.interests as interests
+    ORDER BY u.user_id
+    LIMIT $batch_size
+    """
+    users = 0
+    after = ""
+    while True:
+        records = list(session.run(query, {"after": after, "batch_size": batch_size}))
+        if not records:
+            break
+
+        rows = [_sync_row(r["user_id"], resolve_interest_names(r["interests"])) for r in records]
+        session.run(SYNC_USER_INTERESTS_QUERY, {"rows": rows}).consume()
+        users += len(rows)
+        after = records[-1]["user_id"]
+        print(f"Migrated interests for {users} users")
+
+    return {"interests_numbered": numbered, "users_migrated": users}
+
+def get_common_interests_batch(user_id: str, other_user_ids):
+    """
+    Shared interests between one user and many others in a single query.
+    Returns {other_user_id: [Interest, ...]}; unknown users are left out.
+    """
+    session = get_db()
+    query = """
+    MATCH (u:User {user_id: $user_id})
+    UNWIND $other_user_ids as other_user_id
+    MATCH (other:User {user_id: other_user_id})
+    RETURN u.interest_ordinals as user_ordinals, other.user_id as other_user_id,
+           other.interest_ordinals as other_ordinals
+    """
+    results = session.run(query, {"user_id": user_id, "other_user_ids": list(dict.fromkeys(other_user_ids))})
+    catalog = interest_catalog.get_catalog()
+
+    common = {}
+    for record in results:
+        common[record["other_user_id"]] = [
+            Interest(interest_id=i["interest_id"], name=i["name"], category=i["category"])
+            for i in catalog.common(record["user_ordinals"], record["other_ordinals"])
+        ]
+
+    return common
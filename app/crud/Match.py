@@ -1,20 +1,36 @@
 # app/crud/match.py
 from app.config import get_db
 from app.models.Match import Match
+from app.utils import block_index, metrics, interest_catalog, like_inbox
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.cache import TTLCache, register_invalidator
+import os
 import uuid
 from datetime import datetime
 
+# First page of each user's match list, cached until their matches or
+# conversations change on this worker (or MATCH_LIST_CACHE_TTL passes, which
+# bounds how stale partner profiles and other workers' changes can get)
+MATCH_LIST_CACHE_SIZE = int(os.getenv("MATCH_LIST_CACHE_SIZE", "20000"))
+MATCH_LIST_CACHE_TTL = int(os.getenv("MATCH_LIST_CACHE_TTL", "60"))
+
+_first_pages = TTLCache(maxsize=MATCH_LIST_CACHE_SIZE, ttl=MATCH_LIST_CACHE_TTL)
+
 def create_match(user1_id: str, user2_id: str):
     session = get_db()
     match_id = str(uuid.uuid4())
 
     query = """
     MATCH (u1:User {user_id: $user1_id}), (u2:User {user_id: $user2_id})
+    SET u1.sync_seq = coalesce(u1.sync_seq, 0) + 1
+    SET u2.sync_seq = coalesce(u2.sync_seq, 0) + 1
     CREATE (u1)-[m:MATCHES {
         match_id: $match_id,
         matched_at: $matched_at,
         conversation_started: false,
-        last_message_at: null
+        last_message_at: null,
+        user1_sync_seq: u1.sync_seq,
+        user2_sync_seq: u2.sync_seq
     }]->(u2)
     RETURN m
     """
@@ -28,6 +44,9 @@ def create_match(user1_id: str, user2_id: str):
 
     record = result.single()
     rel = record["m"]
+    metrics.increment("matches")
+    like_inbox.record_match(user1_id, user2_id)
+    invalidate_match_lists(user1_id, user2_id)
 
     return Match(
         match_id=rel["match_id"],
@@ -59,51 +78,104 @@ def get_match_by_id(match_id: str):
         last_message_at=rel.get("last_message_at")
     )
 
-def get_user_matches(user_id: str):
+def _match_from_record(record):
+    rel = record["m"]
+    other_user = record["other"]
+    common = interest_catalog.get_catalog().common(record["user_ordinals"], other_user.get("interest_ordinals"))
+    return {
+        "match_id": rel["match_id"],
+        "other_user_id": other_user["user_id"],
+        "other_user_name": other_user["name"],
+        "other_user": {
+            "user_id": other_user["user_id"],
+            "name": other_user["name"],
+            "age": other_user.get("age"),
+            "gender": other_user.get("gender"),
+            "bio": other_user.get("bio"),
+            "city": other_user.get("city"),
+            "occupation": other_user.get("occupation"),
+            "primary_photo": other_user.get("primary_photo_url"),
+            "primary_photo_thumb": other_user.get("primary_photo_thumb_url")
+        },
+        "common_interests": [i["name"] for i in common],
+        "matched_at": rel["matched_at"],
+        "conversation_started": rel["conversation_started"],
+        "last_message_at": rel.get("last_message_at"),
+        "last_message": record.get("last_message"),
+        "last_message_time": record.get("last_message_time")
+    }
+
+def get_user_matches(user_id: str, limit: int = 50, cursor: str = None):
+    """
+    One page of a user's matches, most recent activity (last message, else
+    the match itself) first, using keyset pagination on
+    (COALESCE(last_message_at, matched_at), match_id). The first page is
+    cached per user. Returns (matches, next_cursor); raises ValueError for a
+    malformed cursor.
+    """
+    after = decode_cursor(cursor, size=2)
+    if after is None:
+        cached = _first_pages.get(user_id)
+        if cached is not None and limit in cached:
+            return cached[limit]
+
     session = get_db()
     query = """
     MATCH (u:User {user_id: $user_id})-[m:MATCHES]-(other:User)
-    OPTIONAL MATCH (other)<-[:BELONGS_TO]-(photo:Photo {is_primary: true})
-    OPTIONAL MATCH (msg:Message)
-    WHERE (msg.sender_id = $user_id AND msg.receiver_id = other.user_id)
-       OR (msg.sender_id = other.user_id AND msg.receiver_id = $user_id)
-    WITH m, other, photo, msg
-    ORDER BY msg.sent_at DESC
-    WITH m, other, photo.url as primary_photo,
-         COLLECT(msg)[0] as lastMsg
-    RETURN m, other, primary_photo,
+    WHERE NOT other.user_id IN $blocked_ids
+    WITH u, m, other, COALESCE(m.last_message_at, m.matched_at) as activity_at
+    WHERE $cursor_activity_at IS NULL
+       OR activity_at < $cursor_activity_at
+       OR (activity_at = $cursor_activity_at AND m.match_id < $cursor_match_id)
+    WITH u, m, other, activity_at
+    ORDER BY activity_at DESC, m.match_id DESC
+    LIMIT $limit
+    CALL {
+        WITH u, other
+        OPTIONAL MATCH (msg:Message)
+        WHERE (msg.sender_id = u.user_id AND msg.receiver_id = other.user_id)
+           OR (msg.sender_id = other.user_id AND msg.receiver_id = u.user_id)
+        WITH msg ORDER BY coalesce(msg.seq, 0) DESC, msg.sent_at DESC LIMIT 1
+        RETURN msg as lastMsg
+    }
+    RETURN m, other, activity_at, u.interest_ordinals as user_ordinals,
            lastMsg.content as last_message,
            lastMsg.sent_at as last_message_time
-    ORDER BY COALESCE(lastMsg.sent_at, m.matched_at) DESC
+    ORDER BY activity_at DESC, m.match_id DESC
     """
-    results = session.run(query, {"user_id": user_id})
+    results = list(session.run(query, {
+        "user_id": user_id,
+        "blocked_ids": list(block_index.get_block_set(user_id)),
+        "cursor_activity_at": after[0] if after else None,
+        "cursor_match_id": after[1] if after else None,
+        "limit": limit
+    }))
 
-    matches = []
-    for record in results:
-        rel = record["m"]
-        other_user = record["other"]
-        matches.append({
-            "match_id": rel["match_id"],
-            "other_user_id": other_user["user_id"],
-            "other_user_name": other_user["name"],
-            "other_user": {
-                "user_id": other_user["user_id"],
-                "name": other_user["name"],
-                "age": other_user.get("age"),
-                "gender": other_user.get("gender"),
-                "bio": other_user.get("bio"),
-                "city": other_user.get("city"),
-                "occupation": other_user.get("occupation"),
-                "primary_photo": record.get("primary_photo")
-            },
-            "matched_at": rel["matched_at"],
-            "conversation_started": rel["conversation_started"],
-            "last_message_at": rel.get("last_message_at"),
-            "last_message": record.get("last_message"),
-            "last_message_time": record.get("last_message_time")
-        })
+    matches = [_match_from_record(record) for record in results]
+    next_cursor = None
+    if len(results) == limit:
+        next_cursor = encode_cursor(results[-1]["activity_at"], results[-1]["m"]["match_id"])
 
-    return matches
+    if after is None:
+        pages = _first_pages.get(user_id) or {}
+        _first_pages.set(user_id, {**pages, limit: (matches, next_cursor)})
+    return matches, next_cursor
+
+def count_user_matches(user_id: str):
+    """Number of matches a user has, leaving out users blocked either way"""
+    session = get_db()
+    query = """
+    MATCH (u:User {user_id: $user_id})
+    RETURN COUNT { (u)-[:MATCHES]-(other:User) WHERE NOT other.user_id IN $blocked_ids } as count
+    """
+    result = session.run(query, {"user_id": user_id, "blocked_ids": list(block_index.get_block_set(user_id))}).single()
+    return result["count"] if result else 0
+
+@register_invalidator
+def invalidate_match_lists(*user_ids: str):
+    """Forget cached first match-list pages, e.g. after a match, unmatch, block or message"""
+    for user_id in user_ids:
+        _first_pages.pop(user_id)
 
 def update_match_conversation_status(match_id: str, started: bool = True):
     session = get_db()
@@ -130,3 +202,68 @@ def check_mutual_like(user1_id: str, user2_id: str):
     result = session.run(query, {"user1_id": user1_id, "user2_id": user2_id}).single()
 
     return result["mutual_like"] > 0
+
+def list_matches_page(cursor: str = None, limit: int = 50):
+    """
+    One page of all matches for admin listings, newest first, using keyset
+    pagination on (matched_at, match_id). Returns (rows, next_cursor).
+    Raises ValueError for a malformed cursor.
+    """
+    session = get_db()
+    params = {"limit": limit}
+    where = ""
+    after = decode_cursor(cursor, size=2)
+    if after:
+        where = """
+        WHERE m.matched_at < $cursor_matched_at
+           OR (m.matched_at = $cursor_matched_at AND m.match_id < $cursor_match_id)
+        """
+        params["cursor_matched_at"], params["cursor_match_id"] = after
+
+    query = f"""
+    MATCH (u1:User)-[m:MATCHES]->(u2:User)
+    {where}
+    RETURN m, u1.user_id as user1_id, u1.name as user1_name,
+           u2.user_id as user2_id, u2.name as user2_name
+    ORDER BY m.matched_at DESC, m.match_id DESC
+    LIMIT $limit
+    """
+    results = session.run(query, params)
+
+    matches = []
+    for record in results:
+        rel = record["m"]
+        matches.append({
+            "match_id": rel["match_id"],
+            "user1_id": record["user1_id"],
+            "user1_name": record["user1_name"],
+            "user2_id": record["user2_id"],
+            "user2_name": record["user2_name"],
+            "matched_at": rel["matched_at"],
+            "conversation_started": rel.get("conversation_started", False),
+            "last_message_at": rel.get("last_message_at")
+        })
+
+    next_cursor = None
+    if len(matches) == limit:
+        next_cursor = encode_cursor(matches[-1]["matched_at"], matches[-1]["match_id"])
+
+    return matches, next_cursor
+
+def delete_match(match_id: str):
+    """Delete a match relationship. Returns True if it existed."""
+    session = get_db()
+    query = """
+    MATCH (u1:User)-[m:MATCHES {match_id: $match_id}]->(u2:User)
+    DELETE m
+    RETURN u1.user_id as user1_id, u2.user_id as user2_id
+    """
+    result = session.run(query, {"match_id": match_id}).single()
+    if not result:
+        return False
+
+    metrics.decrement("matches")
+    # Their likes are pending again
+    like_inbox.invalidate(result["user1_id"], result["user2_id"])
+    invalidate_match_lists(result["user1_id"], result["user2_id"])
+    return True
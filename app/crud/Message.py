@@ -1,60 +1,102 @@
 # app/crud/message.py
 from app.config import get_db
 from app.models.Message import Message
-from app.crud.Match import update_match_conversation_status
+from app.crud.Match import invalidate_match_lists
+from app.utils import metrics
 import uuid
 from datetime import datetime
 
-def create_message(sender_id: str, receiver_id: str, content: str, match_id: str = None):
-    session = get_db()
-    message_id = str(uuid.uuid4())
-
-    query = """
-    CREATE (m:Message {
+# Validates both users and the match, creates the message and updates the
+# match's conversation metadata in one statement. Without a match_id the
+# pair's match (if any) is used; a match_id that does not connect the pair
+# is rejected.
+#
+# Each message takes the next value of its conversation's Sequence node
+# (seq), whose write lock orders concurrent sends by commit rather than by
+# the workers' clocks, and a sync position for both users (see crud.Sync).
+SEND_MESSAGE_QUERY = """
+OPTIONAL MATCH (sender:User {user_id: $sender_id})
+OPTIONAL MATCH (receiver:User {user_id: $receiver_id})
+OPTIONAL MATCH (sender)-[m:MATCHES]-(receiver)
+WHERE $match_id IS NULL OR m.match_id = $match_id
+WITH sender, receiver, head(collect(m)) as m
+WITH sender, receiver, m,
+     CASE
+         WHEN sender IS NULL THEN 'sender_not_found'
+         WHEN receiver IS NULL THEN 'receiver_not_found'
+         WHEN $match_id IS NOT NULL AND m IS NULL THEN 'match_mismatch'
+         ELSE 'created'
+     END as status
+CALL {
+    WITH sender, receiver, m, status
+    WITH sender, receiver, m WHERE status = 'created'
+    MERGE (seq:Sequence {name: $sequence_name})
+    SET seq.value = coalesce(seq.value, 0) + 1
+    SET sender.sync_seq = coalesce(sender.sync_seq, 0) + 1
+    SET receiver.sync_seq = coalesce(receiver.sync_seq, 0) + 1
+    CREATE (msg:Message {
         message_id: $message_id,
-        match_id: $match_id,
+        match_id: m.match_id,
         sender_id: $sender_id,
         receiver_id: $receiver_id,
         content: $content,
         sent_at: $sent_at,
-        is_read: false
+        is_read: false,
+        seq: seq.value,
+        sender_sync_seq: sender.sync_seq,
+        receiver_sync_seq: receiver.sync_seq
     })
-    RETURN m
-    """
+    FOREACH (_ IN CASE WHEN m IS NOT NULL THEN [1] ELSE [] END |
+        SET m.conversation_started = true,
+            m.last_message_at = $sent_at
+    )
+    // Aggregating keeps the row when no message was created
+    RETURN max(msg.seq) as seq
+}
+RETURN status, m.match_id as match_id, seq
+"""
+def conversation_sequence_name(user_id1: str, user_id2: str):
+    """Name of the Sequence node numbering the messages between two users"""
+    return "conversation:" + ":".join(sorted([user_id1, user_id2]))
 
-    result = session.run(query, {
-        "message_id": message_id,
+def create_message(sender_id: str, receiver_id: str, content: str, match_id: str = None):
+    """
+    Send a message in a single write transaction. Returns (message, status)
+    where status is 'created', 'sender_not_found', 'receiver_not_found' or
+    'match_mismatch'; message is None unless it was created.
+    """
+    params = {
+        "message_id": str(uuid.uuid4()),
         "match_id": match_id,
         "sender_id": sender_id,
         "receiver_id": receiver_id,
         "content": content,
-        "sent_at": datetime.utcnow().isoformat()
-    })
+        "sent_at": datetime.utcnow().isoformat(),
+        "sequence_name": conversation_sequence_name(sender_id, receiver_id)
+    }
 
-    record = result.single()
-    node = record["m"]
+    def _write(tx):
+        return tx.run(SEND_MESSAGE_QUERY, params).single()
 
-    # Update match conversation status if match_id provided
-    if match_id:
-        update_match_conversation_status(match_id, True)
+    session = get_db()
+    record = session.execute_write(_write)
+    if record["status"] != "created":
+        return None, record["status"]
 
-        # Update last_message_at on the match
-        update_query = """
-        MATCH ()-[m:MATCHES {match_id: $match_id}]-()
-        SET m.last_message_at = $last_message_at
-        """
-        session.run(update_query, {"match_id": match_id, "last_message_at": node["sent_at"]})
+    metrics.increment("messages")
+    invalidate_match_lists(sender_id, receiver_id)
 
     return Message(
-        message_id=node["message_id"],
-        match_id=node.get("match_id"),
-        sender_id=node["sender_id"],
-        receiver_id=node["receiver_id"],
-        content=node["content"],
-        sent_at=node["sent_at"],
-        read_at=node.get("read_at"),
-        is_read=node["is_read"]
-    )
+        message_id=params["message_id"],
+        match_id=record["match_id"],
+        sender_id=sender_id,
+        receiver_id=receiver_id,
+        content=content,
+        sent_at=params["sent_at"],
+        read_at=None,
+        is_read=False,
+        seq=record["seq"]
+    ), "created"
 
 def get_message_by_id(message_id: str):
     session = get_db()
@@ -73,7 +115,8 @@ def get_message_by_id(message_id: str):
         content=node["content"],
         sent_at=node["sent_at"],
         read_at=node.get("read_at"),
-        is_read=node["is_read"]
+        is_read=node["is_read"],
+        seq=node.get("seq")
     )
 
 def get_match_messages(match_id: str, limit: int = 50, offset: int = 0):
@@ -81,7 +124,7 @@ def get_match_messages(match_id: str, limit: int = 50, offset: int = 0):
     query = """
     MATCH (m:Message {match_id: $match_id})
     RETURN m
-    ORDER BY m.sent_at DESC
+    ORDER BY coalesce(m.seq, 0) DESC, m.sent_at DESC
     SKIP $offset
     LIMIT $limit
     """
@@ -98,7 +141,8 @@ def get_match_messages(match_id: str, limit: int = 50, offset: int = 0):
             content=node["content"],
             sent_at=node["sent_at"],
             read_at=node.get("read_at"),
-            is_read=node["is_read"]
+            is_read=node["is_read"],
+            seq=node.get("seq")
         ))
 
     return messages
@@ -107,6 +151,14 @@ def mark_message_as_read(message_id: str):
     session = get_db()
     query = """
     MATCH (m:Message {message_id: $message_id})
+    CALL {
+        // The first read is a receipt in the sender's sync feed
+        WITH m
+        WITH m WHERE NOT m.is_read
+        MATCH (sender:User {user_id: m.sender_id})
+        SET sender.sync_seq = coalesce(sender.sync_seq, 0) + 1
+        SET m.read_sync_seq = sender.sync_seq
+    }
     SET m.is_read = true, m.read_at = $read_at
     RETURN m
     """
@@ -127,7 +179,8 @@ def mark_message_as_read(message_id: str):
         content=node["content"],
         sent_at=node["sent_at"],
         read_at=node.get("read_at"),
-        is_read=node["is_read"]
+        is_read=node["is_read"],
+        seq=node.get("seq")
     )
 
 def get_unread_message_count(user_id: str):
@@ -148,7 +201,7 @@ def get_messages_between_users(user_id1: str, user_id2: str, limit: int = 50):
     WHERE (m.sender_id = $user_id1 AND m.receiver_id = $user_id2)
        OR (m.sender_id = $user_id2 AND m.receiver_id = $user_id1)
     RETURN m
-    ORDER BY m.sent_at ASC
+    ORDER BY coalesce(m.seq, 0) ASC, m.sent_at ASC
     LIMIT $limit
     """
     results = session.run(query, {"user_id1": user_id1, "user_id2": user_id2, "limit": limit})
@@ -164,7 +217,8 @@ def get_messages_between_users(user_id1: str, user_id2: str, limit: int = 50):
             content=node["content"],
             sent_at=node["sent_at"],
             read_at=node.get("read_at"),
-            is_read=node["is_read"]
+            is_read=node["is_read"],
+            seq=node.get("seq")
         ))
 
     return messages
@@ -1,12 +1,46 @@
 # app/crud/photo.py
 from app.config import get_db
 from app.models.Photo import Photo
+from app.utils.cloudinary_service import build_thumbnail_url
 import uuid
 from datetime import datetime
 
-def create_photo(user_id: str, url: str, is_primary: bool = False, order: int = 0):
+# The cover photo is the primary photo, or the first photo by display order
+# when none is flagged primary. Its URLs are denormalized onto the User node
+# (primary_photo_url / primary_photo_thumb_url) so cards need no traversal.
+REFRESH_PRIMARY_PHOTO_QUERY = """
+MATCH (u:User {user_id: $user_id})
+OPTIONAL MATCH (p:Photo {user_id: $user_id})
+WITH u, p
+ORDER BY p.is_primary DESC, p.order ASC, p.uploaded_at ASC
+WITH u, head(collect(p)) as cover
+SET u.primary_photo_url = cover.url,
+    u.primary_photo_thumb_url = coalesce(cover.thumb_url, cover.url)
+RETURN u.primary_photo_url as primary_photo_url
+"""
+
+def _photo_from_node(node):
+    """Build a Photo model from a Neo4j Photo node"""
+    return Photo(
+        photo_id=node["photo_id"],
+        user_id=node["user_id"],
+        url=node["url"],
+        is_primary=node["is_primary"],
+        order=node["order"],
+        uploaded_at=node["uploaded_at"],
+        thumb_url=node.get("thumb_url")
+    )
+
+def refresh_primary_photo(user_id: str):
+    """Recompute the denormalized cover photo URLs on the User node"""
+    session = get_db()
+    result = session.run(REFRESH_PRIMARY_PHOTO_QUERY, {"user_id": user_id}).single()
+    return result["primary_photo_url"] if result else None
+
+def create_photo(user_id: str, url: str, is_primary: bool = False, order: int = 0, public_id: str = None):
     session = get_db()
     photo_id = str(uuid.uuid4())
+    thumb_url = build_thumbnail_url(url)
 
     # If this is a primary photo, unset other primary photos
     if is_primary:
@@ -16,15 +50,23 @@ def create_photo(user_id: str, url: str, is_primary: bool = False, order: int =
         """
         session.run(unset_query, {"user_id": user_id})
 
+    # Link the photo to its owner and update the denormalized cover photo
+    # when this photo becomes primary or the user has no cover yet
     query = """
+    MATCH (u:User {user_id: $user_id})
     CREATE (p:Photo {
         photo_id: $photo_id,
         user_id: $user_id,
         url: $url,
+        thumb_url: $thumb_url,
+        public_id: $public_id,
         is_primary: $is_primary,
         order: $order,
         uploaded_at: $uploaded_at
-    })
+    })-[:BELONGS_TO]->(u)
+    FOREACH (_ IN CASE WHEN $is_primary OR u.primary_photo_url IS NULL THEN [1] ELSE [] END |
+        SET u.primary_photo_url = $url, u.primary_photo_thumb_url = $thumb_url
+    )
     RETURN p
     """
 
@@ -32,22 +74,18 @@ def create_photo(user_id: str, url: str, is_primary: bool = False, order: int =
         "photo_id": photo_id,
         "user_id": user_id,
         "url": url,
+        "thumb_url": thumb_url,
+        "public_id": public_id,
         "is_primary": is_primary,
         "order": order,
         "uploaded_at": datetime.utcnow().isoformat()
     })
 
     record = result.single()
-    node = record["p"]
+    if not record:
+        return None
 
-    return Photo(
-        photo_id=node["photo_id"],
-        user_id=node["user_id"],
-        url=node["url"],
-        is_primary=node["is_primary"],
-        order=node["order"],
-        uploaded_at=node["uploaded_at"]
-    )
+    return _photo_from_node(record["p"])
 
 def get_photo_by_id(photo_id: str):
     session = get_db()
@@ -57,15 +95,7 @@ def get_photo_by_id(photo_id: str):
     if not result:
         return None
 
-    node = result["p"]
-    return Photo(
-        photo_id=node["photo_id"],
-        user_id=node["user_id"],
-        url=node["url"],
-        is_primary=node["is_primary"],
-        order=node["order"],
-        uploaded_at=node["uploaded_at"]
-    )
+    return _photo_from_node(result["p"])
 
 def get_user_photos(user_id: str):
     session = get_db()
@@ -78,15 +108,7 @@ def get_user_photos(user_id: str):
 
     photos = []
     for record in results:
-        node = record["p"]
-        photos.append(Photo(
-            photo_id=node["photo_id"],
-            user_id=node["user_id"],
-            url=node["url"],
-            is_primary=node["is_primary"],
-            order=node["order"],
-            uploaded_at=node["uploaded_at"]
-        ))
+        photos.append(_photo_from_node(record["p"]))
 
     return photos
 
@@ -125,18 +147,86 @@ def update_photo(photo_id: str, is_primary: bool = None, order: int = None):
     if not result:
         return None
 
-    node = result["p"]
-    return Photo(
-        photo_id=node["photo_id"],
-        user_id=node["user_id"],
-        url=node["url"],
-        is_primary=node["is_primary"],
-        order=node["order"],
-        uploaded_at=node["uploaded_at"]
-    )
+    # Primary flag or order changed, so the cover photo may have moved
+    refresh_primary_photo(photo.user_id)
+
+    return _photo_from_node(result["p"])
 
 def delete_photo(photo_id: str):
     session = get_db()
-    query = "MATCH (p:Photo {photo_id: $photo_id}) DELETE p"
-    session.run(query, {"photo_id": photo_id})
+    query = """
+    MATCH (p:Photo {photo_id: $photo_id})
+    WITH p, p.user_id as user_id
+    DETACH DELETE p
+    RETURN user_id
+    """
+    result = session.run(query, {"photo_id": photo_id}).single()
+
+    if result:
+        refresh_primary_photo(result["user_id"])
+
     return True
+
+def check_primary_photo_consistency(fix: bool = False):
+    """
+    Find (and optionally repair) drift between photos and the denormalized
+    cover photo fields on User nodes.
+
+    Checks photos missing their BELONGS_TO edge, photos missing a thumbnail
+    URL, and users whose primary_photo_url does not match their cover photo.
+    """
+    session = get_db()
+    report = {}
+
+    # Photos created before BELONGS_TO edges were maintained
+    orphan_query = """
+    MATCH (p:Photo)
+    WHERE NOT (p)-[:BELONGS_TO]->(:User)
+    RETURN count(p) as orphaned
+    """
+    report["photos_missing_owner_edge"] = session.run(orphan_query).single()["orphaned"]
+
+    if fix and report["photos_missing_owner_edge"]:
+        link_query = """
+        MATCH (p:Photo)
+        WHERE NOT (p)-[:BELONGS_TO]->(:User)
+        MATCH (u:User {user_id: p.user_id})
+        MERGE (p)-[:BELONGS_TO]->(u)
+        """
+        session.run(link_query)
+
+    # Photos created before thumbnail variants were stored
+    thumb_query = "MATCH (p:Photo) WHERE p.thumb_url IS NULL RETURN p.photo_id as photo_id, p.url as url"
+    missing_thumbs = [
+        {"photo_id": record["photo_id"], "thumb_url": build_thumbnail_url(record["url"])}
+        for record in session.run(thumb_query)
+    ]
+    report["photos_missing_thumbnail"] = len(missing_thumbs)
+
+    if fix and missing_thumbs:
+        session.run("""
+        UNWIND $rows as row
+        MATCH (p:Photo {photo_id: row.photo_id})
+        SET p.thumb_url = row.thumb_url
+        """, {"rows": missing_thumbs})
+
+    # Users whose stored cover photo disagrees with their photos
+    drift_query = """
+    MATCH (u:User)
+    OPTIONAL MATCH (p:Photo {user_id: u.user_id})
+    WITH u, p
+    ORDER BY p.is_primary DESC, p.order ASC, p.uploaded_at ASC
+    WITH u, head(collect(p)) as cover
+    WHERE coalesce(u.primary_photo_url, '') <> coalesce(cover.url, '')
+    RETURN u.user_id as user_id, u.primary_photo_url as stored_url, cover.url as expected_url
+    """
+    mismatched = [dict(record) for record in session.run(drift_query)]
+    report["users_out_of_sync"] = len(mismatched)
+    report["sample"] = mismatched[:20]
+
+    if fix:
+        for row in mismatched:
+            refresh_primary_photo(row["user_id"])
+
+    report["fixed"] = fix
+    return report
@@ -1,96 +1,279 @@
 # app/crud/swipe.py
 from app.config import get_db
 from app.models.Swipe import Swipe
-from app.crud.Match import create_match, check_mutual_like
+from app.utils import swipe_filter, swipe_archive, metrics, like_inbox, block_index, ban_list
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.crud.Match import invalidate_match_lists
+import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+
+# SWIPED is the largest relationship set in the graph. The "legacy" format
+# stores a random UUID swipe_id, the action name and an ISO-8601 string.
+# The "compact" format stores a small-int action_code and a native datetime
+# and skips the synthetic ID unless SWIPE_STORE_IDS is set; such swipes are
+# identified by their (from, to) pair, which is unique. Readers accept both.
+SWIPE_STORAGE_FORMAT = os.getenv("SWIPE_STORAGE_FORMAT", "legacy")
+SWIPE_STORE_IDS = os.getenv("SWIPE_STORE_IDS", "false").lower() == "true"
+
+ACTION_CODES = {"dislike": 0, "like": 1, "super_like": 2}
+ACTION_NAMES = {code: name for name, code in ACTION_CODES.items()}
+
+def _swipe_properties(action: str, now: datetime):
+    """Properties for a new SWIPED relationship in the configured format"""
+    action = getattr(action, "value", action)
+    if SWIPE_STORAGE_FORMAT == "compact":
+        props = {"action_code": ACTION_CODES[action], "timestamp": now}
+        if SWIPE_STORE_IDS:
+            props["swipe_id"] = str(uuid.uuid4())
+        return props
+
+    return {
+        "swipe_id": str(uuid.uuid4()),
+        "action": action,
+        "timestamp": now.replace(tzinfo=None).isoformat()
+    }
+
+def swipe_timestamp_str(value):
+    """Normalize a stored swipe timestamp (ISO string or native datetime) to the API's ISO string"""
+    if value is None or isinstance(value, str):
+        return value
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+def swipe_action_name(rel):
+    """Action name of a SWIPED relationship in either storage format"""
+    action = rel.get("action")
+    if action is None and rel.get("action_code") is not None:
+        action = ACTION_NAMES.get(rel["action_code"])
+    return action
+
+def _swipe_from_rel(rel, from_user_id: str, to_user_id: str):
+    return {
+        "swipe_id": rel.get("swipe_id") or f"{from_user_id}:{to_user_id}",
+        "from_user_id": from_user_id,
+        "to_user_id": to_user_id,
+        "action": swipe_action_name(rel),
+        "timestamp": swipe_timestamp_str(rel.get("timestamp"))
+    }
+
+LIKE_ACTIONS = ["like", "super_like"]
+
+# MERGE on the LIKES edge locks both user nodes, so two users liking each
+# other at the same moment are serialized and the second write sees the
+# first one's like: the reciprocity check cannot miss a match. New likes
+# and matches also take sync positions of the users they concern (see
+# crud.Sync).
+LIKE_QUERY = """
+MATCH (from:User {user_id: $from_user_id}), (to:User {user_id: $to_user_id})
+WITH from, to, EXISTS { (from)-[:LIKES]->(to) } as already_liked
+MERGE (from)-[l:LIKES]->(to)
+ON CREATE SET l.created_at = $timestamp
+FOREACH (_ IN CASE WHEN already_liked THEN [] ELSE [1] END |
+    SET to.sync_seq = coalesce(to.sync_seq, 0) + 1
+    SET l.sync_seq = to.sync_seq
+)
+WITH from, to, l,
+     EXISTS { (to)-[:LIKES]->(from) } AND NOT EXISTS { (from)-[:MATCHES]-(to) } as is_match
+FOREACH (_ IN CASE WHEN is_match THEN [1] ELSE [] END |
+    SET from.sync_seq = coalesce(from.sync_seq, 0) + 1
+    SET to.sync_seq = coalesce(to.sync_seq, 0) + 1
+    CREATE (from)-[:MATCHES {
+        match_id: $match_id,
+        matched_at: $timestamp,
+        conversation_started: false,
+        user1_sync_seq: from.sync_seq,
+        user2_sync_seq: to.sync_seq
+    }]->(to)
+)
+RETURN l.created_at as liked_at, is_match
+"""
 
 def create_swipe(from_user_id: str, to_user_id: str, action: str):
     session = get_db()
-    swipe_id = str(uuid.uuid4())
 
     # Create swipe relationship
     query = """
     MATCH (from:User {user_id: $from_user_id}), (to:User {user_id: $to_user_id})
-    CREATE (from)-[s:SWIPED {
-        swipe_id: $swipe_id,
-        action: $action,
-        timestamp: $timestamp
-    }]->(to)
+    CREATE (from)-[s:SWIPED]->(to)
+    SET s = $props
     RETURN s
     """
+    props = _swipe_properties(action, datetime.now(timezone.utc))
 
-    result = session.run(query, {
-        "from_user_id": from_user_id,
-        "to_user_id": to_user_id,
-        "swipe_id": swipe_id,
-        "action": action,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+    def _swipe(tx):
+        # Update the swiped-set filter alongside the swipe itself
+        bloom = swipe_filter.merge_swipes(tx, from_user_id, [to_user_id])
+        record = tx.run(query, {
+            "from_user_id": from_user_id,
+            "to_user_id": to_user_id,
+            "props": props
+        }).single()
+        return record["s"], bloom
 
-    record = result.single()
-    rel = record["s"]
+    rel, bloom = session.execute_write(_swipe)
 
-    # If action is 'like' or 'super_like', create LIKES relationship
+    metrics.increment("swipes")
+
+    if bloom is None:
+        # No usable stored filter, or it outgrew its capacity; rebuild it
+        # from the SWIPED edges
+        swipe_filter.rebuild_filter(from_user_id)
+    else:
+        swipe_filter.remember(from_user_id, bloom)
+
+    # If action is 'like' or 'super_like', create LIKES relationship and the
+    # match in the same write when the other user already liked back
     is_match = False
-    if action in ["like", "super_like"]:
-        like_query = """
-        MATCH (from:User {user_id: $from_user_id}), (to:User {user_id: $to_user_id})
-        MERGE (from)-[:LIKES]->(to)
-        """
-        session.run(like_query, {"from_user_id": from_user_id, "to_user_id": to_user_id})
-        print(f"Created LIKES relationship: {from_user_id} -> {to_user_id}")
-
-        # Check for mutual like
-        mutual = check_mutual_like(from_user_id, to_user_id)
-        print(f"Checking mutual like between {from_user_id} and {to_user_id}: {mutual}")
-        if mutual:
-            # Create match
-            print(f"Creating match between {from_user_id} and {to_user_id}")
-            create_match(from_user_id, to_user_id)
-            is_match = True
-            print(f"Match created successfully!")
-
-    swipe = Swipe(
-        swipe_id=rel["swipe_id"],
-        from_user_id=from_user_id,
-        to_user_id=to_user_id,
-        action=rel["action"],
-        timestamp=rel["timestamp"]
-    )
+    if getattr(action, "value", action) in LIKE_ACTIONS:
+        timestamp = swipe_timestamp_str(datetime.now(timezone.utc))
+
+        def _like(tx):
+            return tx.run(LIKE_QUERY, {
+                "from_user_id": from_user_id,
+                "to_user_id": to_user_id,
+                "match_id": str(uuid.uuid4()),
+                "timestamp": timestamp
+            }).single()
+
+        like = session.execute_write(_like)
+        metrics.increment("likes")
+        is_match = like["is_match"]
+        if is_match:
+            metrics.increment("matches")
+            like_inbox.record_match(from_user_id, to_user_id)
+            invalidate_match_lists(from_user_id, to_user_id)
+        else:
+            like_inbox.record_like(from_user_id, to_user_id, like["liked_at"])
+
+    swipe = Swipe(**_swipe_from_rel(rel, from_user_id, to_user_id))
 
     return {"swipe": swipe, "is_match": is_match}
 
 def get_user_swipes(user_id: str, action: str = None):
     session = get_db()
 
+    # datetime() orders legacy ISO strings and native datetimes together
     if action:
         query = """
-        MATCH (u:User {user_id: $user_id})-[s:SWIPED {action: $action}]->(other:User)
+        MATCH (u:User {user_id: $user_id})-[s:SWIPED]->(other:User)
+        WHERE s.action = $action OR s.action_code = $action_code
         RETURN s, other.user_id as other_user_id
-        ORDER BY s.timestamp DESC
+        ORDER BY datetime(s.timestamp) DESC
         """
-        results = session.run(query, {"user_id": user_id, "action": action})
+        results = session.run(query, {"user_id": user_id, "action": action, "action_code": ACTION_CODES.get(action)})
     else:
         query = """
         MATCH (u:User {user_id: $user_id})-[s:SWIPED]->(other:User)
         RETURN s, other.user_id as other_user_id
-        ORDER BY s.timestamp DESC
+        ORDER BY datetime(s.timestamp) DESC
         """
         results = session.run(query, {"user_id": user_id})
 
     swipes = []
     for record in results:
-        rel = record["s"]
+        swipes.append(_swipe_from_rel(record["s"], user_id, record["other_user_id"]))
+
+    return swipes
+
+def get_swipe_history(user_id: str, action: str = None, limit: int = 50, cursor: str = None):
+    """
+    Page through a user's swipes newest first, merging hot SWIPED edges
+    with archived swipes. The cursor is the (timestamp, to_user_id) of the
+    last swipe on the previous page.
+    """
+    before = decode_cursor(cursor, size=2)
+    action_code = ACTION_CODES.get(action) if action else None
+
+    session = get_db()
+    query = """
+    MATCH (u:User {user_id: $user_id})-[s:SWIPED]->(other:User)
+    WHERE ($action IS NULL OR s.action = $action OR s.action_code = $action_code)
+      AND ($before_ts IS NULL
+           OR datetime(s.timestamp) < datetime($before_ts)
+           OR (datetime(s.timestamp) = datetime($before_ts) AND other.user_id < $before_id))
+    RETURN s, other.user_id as other_user_id
+    ORDER BY datetime(s.timestamp) DESC, other.user_id DESC
+    LIMIT $limit
+    """
+    results = session.run(query, {
+        "user_id": user_id,
+        "action": action,
+        "action_code": action_code,
+        "before_ts": before[0] if before else None,
+        "before_id": before[1] if before else None,
+        "limit": limit
+    })
+
+    swipes = []
+    for record in results:
+        swipe = _swipe_from_rel(record["s"], user_id, record["other_user_id"])
+        swipe["archived"] = False
+        swipes.append(swipe)
+
+    # Up to `limit` archived swipes past the cursor, merged with the hot page.
+    # The archive only holds dislikes, and once the hot page is full nothing
+    # older than its last swipe can make the cut.
+    cold_rows = []
+    if action_code in (None, ACTION_CODES["dislike"]) and swipe_filter.has_archived_swipes(user_id):
+        cold_before = (swipe_archive.to_microseconds(before[0]), before[1]) if before else None
+        cold_after = swipe_archive.to_microseconds(swipes[-1]["timestamp"]) if len(swipes) == limit else None
+        cold_rows = swipe_archive.iter_user_swipes(user_id, cold_before, action_code, cold_after)
+
+    for count, row in enumerate(cold_rows):
+        if count >= limit:
+            break
         swipes.append({
-            "swipe_id": rel["swipe_id"],
+            "swipe_id": f"{user_id}:{row['to_user_id']}",
             "from_user_id": user_id,
-            "to_user_id": record["other_user_id"],
-            "action": rel["action"],
-            "timestamp": rel["timestamp"]
+            "to_user_id": row["to_user_id"],
+            "action": ACTION_NAMES.get(row["action_code"]),
+            "timestamp": swipe_archive.from_microseconds(row["ts_us"]),
+            "archived": True
         })
 
-    return swipes
+    swipes.sort(key=lambda s: (swipe_archive.to_microseconds(s["timestamp"]), s["to_user_id"]), reverse=True)
+    page = swipes[:limit]
+    next_cursor = None
+    if len(page) == limit:
+        next_cursor = encode_cursor(page[-1]["timestamp"], page[-1]["to_user_id"])
+
+    return {"swipes": page, "next_cursor": next_cursor}
+
+def get_received_likes(user_id: str, limit: int = 50, cursor: str = None):
+    """
+    Page through the users who liked this user and are not matched with
+    them, newest like first, served from the like inbox. Users blocked
+    either way or banned are left out. Returns (likes, next_cursor); raises
+    ValueError for a malformed cursor.
+    """
+    before = decode_cursor(cursor, size=2)
+    page = like_inbox.get_page(user_id, limit, before)
+    if not page:
+        return [], None
+
+    hidden = block_index.get_block_set(user_id)
+    liker_ids = [liker_id for _, liker_id in page if liker_id not in hidden and not ban_list.is_banned(liker_id)]
+
+    session = get_db()
+    query = """
+    UNWIND $user_ids as user_id
+    MATCH (other:User {user_id: user_id})
+    RETURN other.user_id as user_id, other.name as name, other.age as age, other.bio as bio,
+           other.primary_photo_thumb_url as primary_photo_thumb
+    """
+    profiles = {record["user_id"]: record.data() for record in session.run(query, {"user_ids": liker_ids})}
+
+    likes = []
+    for liked_at, liker_id in page:
+        if liker_id in profiles:
+            likes.append({**profiles[liker_id], "liked_at": liked_at or None})
+
+    next_cursor = encode_cursor(*page[-1]) if len(page) == limit else None
+    return likes, next_cursor
 
 def check_already_swiped(from_user_id: str, to_user_id: str):
     """Check if user has already swiped on another user"""
@@ -100,5 +283,235 @@ def check_already_swiped(from_user_id: str, to_user_id: str):
     RETURN count(s) as swipe_count
     """
     result = session.run(query, {"from_user_id": from_user_id, "to_user_id": to_user_id}).single()
+    if result["swipe_count"] > 0:
+        return True
+
+    # Archived dislikes have no SWIPED edge any more
+    return to_user_id in swipe_filter.archived_swipes_among(from_user_id, [to_user_id])
+
+# One statement for a whole batch: creates SWIPED edges for targets not yet
+# swiped, LIKES edges for likes, and MATCHES edges for new mutual likes.
+BATCH_SWIPE_QUERY = """
+MATCH (from:User {user_id: $from_user_id})
+UNWIND $items as item
+OPTIONAL MATCH (to:User {user_id: item.to_user_id})
+WITH from, item, to,
+     CASE
+         WHEN to IS NULL THEN 'user_not_found'
+         WHEN EXISTS { (from)-[:SWIPED]->(to) } THEN 'already_swiped'
+         ELSE 'created'
+     END as status
+WITH from, item, to, status,
+     to IS NOT NULL AND EXISTS { (from)-[:LIKES]->(to) } as already_liked
+FOREACH (_ IN CASE WHEN status = 'created' THEN [1] ELSE [] END |
+    CREATE (from)-[s:SWIPED]->(to)
+    SET s = item.props
+)
+FOREACH (_ IN CASE WHEN status = 'created' AND item.is_like THEN [1] ELSE [] END |
+    MERGE (from)-[l:LIKES]->(to)
+    ON CREATE SET l.created_at = $timestamp
+    FOREACH (__ IN CASE WHEN already_liked THEN [] ELSE [1] END |
+        SET to.sync_seq = coalesce(to.sync_seq, 0) + 1
+        SET l.sync_seq = to.sync_seq
+    )
+)
+WITH from, item, to, status,
+     CASE
+         WHEN status = 'created' AND item.is_like
+         THEN EXISTS { (to)-[:LIKES]->(from) } AND NOT EXISTS { (from)-[:MATCHES]-(to) }
+         ELSE false
+     END as is_match
+FOREACH (_ IN CASE WHEN is_match THEN [1] ELSE [] END |
+    SET from.sync_seq = coalesce(from.sync_seq, 0) + 1
+    SET to.sync_seq = coalesce(to.sync_seq, 0) + 1
+    CREATE (from)-[:MATCHES {
+        match_id: item.match_id,
+        matched_at: $timestamp,
+        conversation_started: false,
+        user1_sync_seq: from.sync_seq,
+        user2_sync_seq: to.sync_seq
+    }]->(to)
+)
+RETURN item.to_user_id as to_user_id, status, is_match
+"""
+
+def create_swipes_batch(from_user_id: str, swipes: list):
+    """
+    Create many swipes from one user in a single write transaction.
+
+    `swipes` is a list of (to_user_id, action) pairs in client order. Repeated
+    targets are deduplicated (first one wins). Returns per-item results in
+    input order, or None if the swiping user does not exist.
+    """
+    now = datetime.now(timezone.utc)
+    timestamp = swipe_timestamp_str(now)
+    results = []
+    items = []
+    seen = set()
+    # Archived dislikes have no SWIPED edge for the query to find
+    archived = swipe_filter.archived_swipes_among(from_user_id, {to_user_id for to_user_id, _ in swipes})
+
+    for to_user_id, action in swipes:
+        result = {
+            "to_user_id": to_user_id,
+            "action": action,
+            "status": None,
+            "swipe_id": None,
+            "timestamp": None,
+            "is_match": False,
+            "match_id": None
+        }
+        results.append(result)
+
+        if to_user_id == from_user_id:
+            result["status"] = "invalid"
+        elif to_user_id in seen:
+            result["status"] = "duplicate"
+        elif to_user_id in archived:
+            result["status"] = "already_swiped"
+        else:
+            seen.add(to_user_id)
+            props = _swipe_properties(action, now)
+            items.append({
+                "to_user_id": to_user_id,
+                "is_like": action in LIKE_ACTIONS,
+                "props": props,
+                "swipe_id": props.get("swipe_id") or f"{from_user_id}:{to_user_id}",
+                "match_id": str(uuid.uuid4())
+            })
+
+    if not items:
+        return results
+
+    liked_ids = {item["to_user_id"] for item in items if item["is_like"]}
+
+    def _write(tx):
+        bloom = swipe_filter.merge_swipes(tx, from_user_id, [item["to_user_id"] for item in items])
+        records = tx.run(BATCH_SWIPE_QUERY, {
+            "from_user_id": from_user_id,
+            "items": items,
+            "timestamp": timestamp
+        })
+        return [record.data() for record in records], bloom
+
+    session = get_db()
+    try:
+        rows, bloom = session.execute_write(_write)
+    finally:
+        session.close()
+
+    if not rows:
+        return None
+
+    if bloom is None:
+        swipe_filter.rebuild_filter(from_user_id)
+    else:
+        swipe_filter.remember(from_user_id, bloom)
+
+    created = [row for row in rows if row["status"] == "created"]
+    metrics.increment("swipes", len(created))
+    metrics.increment("likes", sum(1 for row in created if row["to_user_id"] in liked_ids))
+    metrics.increment("matches", sum(1 for row in rows if row["is_match"]))
+    for row in created:
+        if row["is_match"]:
+            like_inbox.record_match(from_user_id, row["to_user_id"])
+            invalidate_match_lists(from_user_id, row["to_user_id"])
+        elif row["to_user_id"] in liked_ids:
+            like_inbox.record_like(from_user_id, row["to_user_id"], timestamp)
+
+    outcomes = {row["to_user_id"]: row for row in rows}
+    items_by_target = {item["to_user_id"]: item for item in items}
+    for result in results:
+        if result["status"] is not None:
+            continue
+
+        row = outcomes[result["to_user_id"]]
+        item = items_by_target[result["to_user_id"]]
+        result["status"] = row["status"]
+        if row["status"] == "created":
+            result["swipe_id"] = item["swipe_id"]
+            result["timestamp"] = timestamp
+        if row["is_match"]:
+            result["is_match"] = True
+            result["match_id"] = item["match_id"]
+
+    return results
+
+def migrate_swipes_to_compact(batch_size: int = 10000, keep_ids: bool = False):
+    """
+    Rewrite legacy SWIPED relationships in the compact format, committing
+    every `batch_size` relationships. Safe to re-run; compact swipes are
+    skipped. Returns the number of relationships converted.
+    """
+    session = get_db()
+    count_query = "MATCH ()-[s:SWIPED]->() WHERE s.action IS NOT NULL RETURN count(s) as pending"
+    query = """
+    MATCH ()-[s:SWIPED]->()
+    WHERE s.action IS NOT NULL
+    CALL {
+        WITH s
+        SET s.action_code = CASE s.action
+                WHEN 'dislike' THEN 0
+                WHEN 'like' THEN 1
+                WHEN 'super_like' THEN 2
+            END,
+            s.timestamp = datetime(s.timestamp),
+            s.swipe_id = CASE WHEN $keep_ids THEN s.swipe_id ELSE null END,
+            s.action = null
+    } IN TRANSACTIONS OF $batch_size ROWS
+    """
+    try:
+        pending = session.run(count_query).single()["pending"]
+        if pending:
+            session.run(query, {"batch_size": batch_size, "keep_ids": keep_ids}).consume()
+        return pending
+    finally:
+        session.close()
+
+# Rough per-value sizes used by the storage report. Strings longer than the
+# inline limit spill into the dynamic string store, so their payload is
+# counted on top of the fixed property block.
+PROPERTY_BLOCK_BYTES = 8
+INLINE_STRING_BYTES = 24
+DATETIME_BLOCKS = 3
+RELATIONSHIP_RECORD_BYTES = 34
+
+def get_swipe_storage_report():
+    """Estimate SWIPED property storage for the current and the compact format"""
+    session = get_db()
+    query = """
+    MATCH ()-[s:SWIPED]->()
+    RETURN count(s) as total,
+           count(s.action) as legacy,
+           count(s.action_code) as compact,
+           count(s.swipe_id) as with_ids,
+           sum(size(coalesce(s.swipe_id, ''))) as id_chars,
+           sum(CASE WHEN s.action IS NOT NULL THEN size(toString(s.timestamp)) ELSE 0 END) as iso_chars
+    """
+    try:
+        row = session.run(query).single().data()
+    finally:
+        session.close()
+
+    def string_bytes(count, chars):
+        spilled = max(0, chars - count * INLINE_STRING_BYTES)
+        return count * PROPERTY_BLOCK_BYTES + spilled
+
+    current_bytes = (
+        string_bytes(row["with_ids"], row["id_chars"])          # swipe_id
+        + row["legacy"] * PROPERTY_BLOCK_BYTES                  # action (short string)
+        + string_bytes(row["legacy"], row["iso_chars"])         # ISO timestamp
+        + row["compact"] * (1 + DATETIME_BLOCKS) * PROPERTY_BLOCK_BYTES
+    )
+    compact_bytes = row["total"] * (1 + DATETIME_BLOCKS) * PROPERTY_BLOCK_BYTES
 
-    return result["swipe_count"] > 0
+    return {
+        "total_swipes": row["total"],
+        "legacy_swipes": row["legacy"],
+        "compact_swipes": row["compact"],
+        "swipes_with_ids": row["with_ids"],
+        "relationship_record_bytes": row["total"] * RELATIONSHIP_RECORD_BYTES,
+        "estimated_property_bytes": current_bytes,
+        "estimated_property_bytes_compact": compact_bytes,
+        "estimated_savings_pct": round(100 * (1 - compact_bytes / current_bytes), 1) if current_bytes else 0
+    }
@@ -0,0 +1,121 @@
+# app/crud/sync.py
+from app.config import get_db
+from app.utils import block_index, ban_list
+import os
+
+# Delta sync. Every write that a user should hear about takes the next value
+# of that user's u.sync_seq counter and stores it on what it wrote:
+#   message sent/received   Message.sender_sync_seq / Message.receiver_sync_seq
+#   read receipt            Message.read_sync_seq (for the sender)
+#   new match               MATCHES.user1_sync_seq / MATCHES.user2_sync_seq
+#   like received           LIKES.sync_seq
+# The counter is bumped in the same transaction as the change while holding
+# the user node's write lock, so positions commit in order and a client that
+# stores the returned watermark and passes it back as `since` gets each
+# change exactly once, regardless of worker clocks.
+SYNC_MAX_CHANGES = int(os.getenv("SYNC_MAX_CHANGES", "500"))
+
+WATERMARK_QUERY = """
+MATCH (u:User {user_id: $user_id})
+RETURN coalesce(u.sync_seq, 0) as watermark
+"""
+
+# Each branch is limited on its own; the merged result is cut in Python
+CHANGES_QUERY = """
+MATCH (msg:Message)
+WHERE msg.receiver_id = $user_id AND msg.receiver_sync_seq > $since AND msg.receiver_sync_seq <= $until
+RETURN 'message' as kind, msg.receiver_sync_seq as sync_seq, msg.sender_id as other_user_id, properties(msg) as data
+ORDER BY sync_seq LIMIT $limit
+UNION ALL
+MATCH (msg:Message)
+WHERE msg.sender_id = $user_id AND msg.sender_sync_seq > $since AND msg.sender_sync_seq <= $until
+RETURN 'message' as kind, msg.sender_sync_seq as sync_seq, msg.receiver_id as other_user_id, properties(msg) as data
+ORDER BY sync_seq LIMIT $limit
+UNION ALL
+MATCH (msg:Message)
+WHERE msg.sender_id = $user_id AND msg.read_sync_seq > $since AND msg.read_sync_seq <= $until
+RETURN 'read_receipt' as kind, msg.read_sync_seq as sync_seq, msg.receiver_id as other_user_id,
+       {message_id: msg.message_id, match_id: msg.match_id, seq: msg.seq, read_at: msg.read_at} as data
+ORDER BY sync_seq LIMIT $limit
+UNION ALL
+MATCH (u:User {user_id: $user_id})-[m:MATCHES]->(other:User)
+WHERE m.user1_sync_seq > $since AND m.user1_sync_seq <= $until
+RETURN 'match' as kind, m.user1_sync_seq as sync_seq, other.user_id as other_user_id,
+       {match_id: m.match_id, user_id: other.user_id, name: other.name,
+        primary_photo_thumb: other.primary_photo_thumb_url, matched_at: m.matched_at} as data
+ORDER BY sync_seq LIMIT $limit
+UNION ALL
+MATCH (u:User {user_id: $user_id})<-[m:MATCHES]-(other:User)
+WHERE m.user2_sync_seq > $since AND m.user2_sync_seq <= $until
+RETURN 'match' as kind, m.user2_sync_seq as sync_seq, other.user_id as other_user_id,
+       {match_id: m.match_id, user_id: other.user_id, name: other.name,
+        primary_photo_thumb: other.primary_photo_thumb_url, matched_at: m.matched_at} as data
+ORDER BY sync_seq LIMIT $limit
+UNION ALL
+MATCH (u:User {user_id: $user_id})<-[l:LIKES]-(other:User)
+WHERE l.sync_seq > $since AND l.sync_seq <= $until AND NOT EXISTS { (u)-[:MATCHES]-(other) }
+RETURN 'like' as kind, l.sync_seq as sync_seq, other.user_id as other_user_id,
+       {user_id: other.user_id, name: other.name, age: other.age,
+        primary_photo_thumb: other.primary_photo_thumb_url, liked_at: l.created_at} as data
+ORDER BY sync_seq LIMIT $limit
+"""
+
+SYNC_KINDS = {
+    "message": "messages",
+    "read_receipt": "read_receipts",
+    "match": "matches",
+    "like": "likes"
+}
+
+def get_watermark(user_id: str):
+    """The user's current sync position, or None if the user does not exist"""
+    session = get_db()
+    result = session.run(WATERMARK_QUERY, {"user_id": user_id}).single()
+    return result["watermark"] if result else None
+
+def get_changes(user_id: str, since: int, limit: int = SYNC_MAX_CHANGES):
+    """
+    Messages, read receipts, matches and likes that reached the user after
+    the `since` watermark, oldest first and at most `limit` of them. Changes
+    involving users blocked either way or banned are left out. Returns None
+    if the user does not exist, else a dict with the changes grouped by
+    kind, the new watermark and whether more changes are waiting.
+    """
+    # Read first: everything at or below it has committed
+    until = get_watermark(user_id)
+    if until is None:
+        return None
+
+    changes = []
+    if until > since:
+        session = get_db()
+        results = session.run(CHANGES_QUERY, {
+            "user_id": user_id,
+            "since": since,
+            "until": until,
+            "limit": limit + 1
+        })
+        changes = sorted((record.data() for record in results), key=lambda change: change["sync_seq"])
+
+    has_more = len(changes) > limit
+    if has_more:
+        # Positions are unique per user, so the cut never splits one
+        changes = changes[:limit]
+
+    hidden = block_index.get_block_set(user_id)
+    delta = {name: [] for name in SYNC_KINDS.values()}
+    for change in changes:
+        if change["other_user_id"] in hidden or ban_list.is_banned(change["other_user_id"]):
+            continue
+        data = change["data"]
+        if change["kind"] == "message":
+            data = {key: data.get(key) for key in (
+                "message_id", "match_id", "sender_id", "receiver_id", "content", "sent_at", "read_at", "is_read", "seq"
+            )}
+        delta[SYNC_KINDS[change["kind"]]].append({**data, "sync_seq": change["sync_seq"]})
+
+    return {
+        **delta,
+        "watermark": changes[-1]["sync_seq"] if has_more else until,
+        "has_more": has_more
+    }
@@ -1,4 +1,4 @@
 # app/crud/__init__.py
-from app.crud import user, Match, Swipe, Message
+from app.crud import user, Match, Swipe, Message, Block, Interest, Photo, Analytics, Sync
 
-__all__ = ['user', 'Match', 'Swipe', 'Message']
+__all__ = ['user', 'Match', 'Swipe', 'Message', 'Block', 'Interest', 'Photo', 'Analytics', 'Sync']
@@ -1,10 +1,106 @@
 # app/crud/user.py
 from app.config import get_db
 from app.models.User import User
+from app.utils import block_index, swipe_filter, metrics, ban_list, ranking, interest_catalog, recommender, candidate_index
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.crud import Interest
 import uuid
+import os
 import bcrypt
 from datetime import datetime
 
+# Discovery samples a random pool without the per-candidate SWIPED check and
+# drops already-swiped users with the swiped-set Bloom filter. If too few
+# candidates survive (heavy swipers), the pool is topped up with the exact
+# query, which applies the candidate index's preference predicates.
+# The surviving pool is ranked (app.utils.ranking) and the best make the deck.
+# When the in-memory candidate index is loaded, the pool comes from it
+# instead, already filtered by mutual preferences, and only the chosen
+# candidates are read from Neo4j.
+DISCOVERY_DECK_SIZE = 50
+DISCOVERY_POOL_SIZE = int(os.getenv("DISCOVERY_POOL_SIZE", "200"))
+# Extra candidates per deck from the collaborative-filtering index
+DISCOVERY_CF_CANDIDATES = int(os.getenv("DISCOVERY_CF_CANDIDATES", "100"))
+
+# Walks user_id order from a random point (UUIDs are random, so this is a
+# random sample) so the user_id index serves the scan and LIMIT stops it
+# as soon as enough candidates are found. Same mutual age, gender and
+# distance rules as candidate_index.query.
+TOP_UP_QUERY = """
+MATCH (u:User {user_id: $user_id})
+MATCH (other:User)
+WHERE other.user_id >= $start AND ($end IS NULL OR other.user_id < $end)
+  AND other.user_id <> $user_id
+  AND NOT other.user_id IN $excluded_ids
+  AND other.deletion_requested_at IS NULL
+  AND (size($genders) = 0 OR other.gender IN $genders)
+  AND ($min_age IS NULL OR other.age >= $min_age)
+  AND ($max_age IS NULL OR other.age <= $max_age)
+  AND ($gender IS NULL OR size(coalesce(other.gender_preference, [])) = 0
+       OR $gender IN other.gender_preference)
+  AND ($age IS NULL OR (coalesce(other.min_age, 0) <= $age AND coalesce(other.max_age, $age) >= $age))
+  AND ($location IS NULL OR other.latitude IS NULL OR other.longitude IS NULL
+       OR point.distance(point({latitude: other.latitude, longitude: other.longitude}), point($location))
+          <= $max_distance * 1000)
+  AND NOT EXISTS { (u)-[:SWIPED]->(other) }
+RETURN other
+ORDER BY other.user_id
+LIMIT $limit
+"""
+
+def _top_up_candidates(session, viewer: dict, excluded_ids, limit: int):
+    """Up to `limit` unswiped candidates matching the viewer, not in excluded_ids"""
+    location = None
+    if viewer.get("max_distance") and viewer.get("latitude") is not None and viewer.get("longitude") is not None:
+        location = {"latitude": viewer["latitude"], "longitude": viewer["longitude"]}
+    params = {
+        "user_id": viewer["user_id"],
+        "excluded_ids": list(excluded_ids),
+        "genders": [getattr(g, "value", g) for g in viewer.get("gender_preference") or []],
+        "min_age": viewer.get("min_age") or None,
+        "max_age": viewer.get("max_age") or None,
+        "gender": viewer.get("gender"),
+        "age": viewer.get("age"),
+        "location": location,
+        "max_distance": viewer.get("max_distance")
+    }
+
+    start = str(uuid.uuid4())
+    nodes = [record["other"] for record in session.run(TOP_UP_QUERY, {**params, "start": start, "end": None, "limit": limit})]
+    if len(nodes) < limit:
+        # Wrap around to the IDs before the starting point
+        result = session.run(TOP_UP_QUERY, {**params, "start": "", "end": start, "limit": limit - len(nodes)})
+        nodes.extend(record["other"] for record in result)
+    return nodes
+
+def _user_from_node(node):
+    """Build a User model from a Neo4j User node"""
+    return User(
+        user_id=node["user_id"],
+        name=node["name"],
+        email=node["email"],
+        age=node["age"],
+        gender=node["gender"],
+        password_hash=node["password_hash"],
+        bio=node.get("bio"),
+        city=node.get("city"),
+        latitude=node.get("latitude"),
+        longitude=node.get("longitude"),
+        height=node.get("height"),
+        occupation=node.get("occupation"),
+        education=node.get("education"),
+        interests=node.get("interests", []),
+        is_verified=node.get("is_verified", False),
+        created_at=node.get("created_at"),
+        last_active=node.get("last_active"),
+        min_age=node.get("min_age"),
+        max_age=node.get("max_age"),
+        max_distance=node.get("max_distance"),
+        gender_preference=node.get("gender_preference", []),
+        primary_photo_url=node.get("primary_photo_url"),
+        primary_photo_thumb_url=node.get("primary_photo_thumb_url")
+    )
+
 def create_user(user_data):
     session = get_db()
     user_id = str(uuid.uuid4())
@@ -68,30 +164,14 @@ def create_user(user_data):
 
     record = result.single()
     node = record["u"]
+    metrics.increment("users")
+    candidate_index.upsert(node)
 
-    return User(
-        user_id=node["user_id"],
-        name=node["name"],
-        email=node["email"],
-        age=node["age"],
-        gender=node["gender"],
-        password_hash=node["password_hash"],
-        bio=node.get("bio"),
-        city=node.get("city"),
-        latitude=node.get("latitude"),
-        longitude=node.get("longitude"),
-        height=node.get("height"),
-        occupation=node.get("occupation"),
-        education=node.get("education"),
-        interests=node.get("interests", []),
-        is_verified=node.get("is_verified", False),
-        created_at=node.get("created_at"),
-        last_active=node.get("last_active"),
-        min_age=node.get("min_age"),
-        max_age=node.get("max_age"),
-        max_distance=node.get("max_distance"),
-        gender_preference=node.get("gender_preference", [])
-    )
+    if node.get("interests"):
+        Interest.set_user_interests(node["user_id"], node["interests"])
+        return get_user_by_id(node["user_id"])
+
+    return _user_from_node(node)
 
 def get_user_by_id(user_id: str):
     session = get_db()
@@ -101,29 +181,7 @@ def get_user_by_id(user_id: str):
         return None
     node = result["u"]
 
-    return User(
-        user_id=node["user_id"],
-        name=node["name"],
-        email=node["email"],
-        age=node["age"],
-        gender=node["gender"],
-        password_hash=node["password_hash"],
-        bio=node.get("bio"),
-        city=node.get("city"),
-        latitude=node.get("latitude"),
-        longitude=node.get("longitude"),
-        height=node.get("height"),
-        occupation=node.get("occupation"),
-        education=node.get("education"),
-        interests=node.get("interests", []),
-        is_verified=node.get("is_verified", False),
-        created_at=node.get("created_at"),
-        last_active=node.get("last_active"),
-        min_age=node.get("min_age"),
-        max_age=node.get("max_age"),
-        max_distance=node.get("max_distance"),
-        gender_preference=node.get("gender_preference", [])
-    )
+    return _user_from_node(node)
 
 def update_user(user_id: str, user_data):
     session = get_db()
@@ -156,9 +214,6 @@ def update_user(user_id: str, user_data):
     if user_data.education is not None:
         updates.append("u.education = $education")
         params["education"] = user_data.education
-    if user_data.interests is not None:
-        updates.append("u.interests = $interests")
-        params["interests"] = user_data.interests
     if user_data.preferences is not None:
         prefs = user_data.preferences.dict()
         updates.append("u.min_age = $min_age")
@@ -167,6 +222,9 @@ def update_user(user_id: str, user_data):
         updates.append("u.gender_preference = $gender_preference")
         params.update(prefs)
 
+    if user_data.interests is not None:
+        Interest.set_user_interests(user_id, user_data.interests)
+
     if not updates:
         return get_user_by_id(user_id)
 
@@ -177,29 +235,8 @@ def update_user(user_id: str, user_data):
         return None
 
     node = result["u"]
-    return User(
-        user_id=node["user_id"],
-        name=node["name"],
-        email=node["email"],
-        age=node["age"],
-        gender=node["gender"],
-        password_hash=node["password_hash"],
-        bio=node.get("bio"),
-        city=node.get("city"),
-        latitude=node.get("latitude"),
-        longitude=node.get("longitude"),
-        height=node.get("height"),
-        occupation=node.get("occupation"),
-        education=node.get("education"),
-        interests=node.get("interests", []),
-        is_verified=node.get("is_verified", False),
-        created_at=node.get("created_at"),
-        last_active=node.get("last_active"),
-        min_age=node.get("min_age"),
-        max_age=node.get("max_age"),
-        max_distance=node.get("max_distance"),
-        gender_preference=node.get("gender_preference", [])
-    )
+    candidate_index.upsert(node)
+    return _user_from_node(node)
 
 def get_user_by_email(email: str):
     session = get_db()
@@ -209,53 +246,85 @@ def get_user_by_email(email: str):
         return None
     node = result["u"]
 
-    return User(
-        user_id=node["user_id"],
-        name=node["name"],
-        email=node["email"],
-        age=node["age"],
-        gender=node["gender"],
-        password_hash=node["password_hash"],
-        bio=node.get("bio"),
-        city=node.get("city"),
-        latitude=node.get("latitude"),
-        longitude=node.get("longitude"),
-        height=node.get("height"),
-        occupation=node.get("occupation"),
-        education=node.get("education"),
-        interests=node.get("interests", []),
-        is_verified=node.get("is_verified", False),
-        created_at=node.get("created_at"),
-        last_active=node.get("last_active"),
-        min_age=node.get("min_age"),
-        max_age=node.get("max_age"),
-        max_distance=node.get("max_distance"),
-        gender_preference=node.get("gender_preference", [])
-    )
+    return _user_from_node(node)
 
 def get_potential_matches(user_id: str):
-    """Get users that the user can swipe on (excluding already swiped users)"""
+    """Get users that the user can swipe on (excluding already swiped and blocked users)"""
     import random
     session = get_db()
+    excluded_ids = list(block_index.get_block_set(user_id))
+    viewer = session.run("MATCH (u:User {user_id: $user_id}) RETURN u", {"user_id": user_id}).single()
+
+    if viewer and candidate_index.is_ready():
+        # Twice the pool size, as the swiped-set filter drops some
+        candidate_ids = candidate_index.query(viewer["u"], 2 * DISCOVERY_POOL_SIZE, exclude=excluded_ids)
+        pool_query = """
+        MATCH (other:User)
+        WHERE other.user_id IN $candidate_ids
+        AND other.deletion_requested_at IS NULL
+        RETURN other
+        """
+        result = session.run(pool_query, {"candidate_ids": candidate_ids})
+    else:
+        pool_query = """
+        MATCH (other:User)
+        WHERE other.user_id <> $user_id
+        AND NOT other.user_id IN $excluded_ids
+        AND other.deletion_requested_at IS NULL
+        RETURN other, rand() as random_order
+        ORDER BY random_order
+        LIMIT $pool_size
+        """
+        result = session.run(pool_query, {
+            "user_id": user_id,
+            "excluded_ids": excluded_ids,
+            "pool_size": DISCOVERY_POOL_SIZE
+        })
+    nodes = swipe_filter.filter_unswiped(user_id, [record["other"] for record in result], key=lambda node: node["user_id"])
+    nodes = ban_list.filter_banned(nodes, key=lambda node: node["user_id"])
+
+    # Add the users most likely to like the viewer back to the random pool
+    if recommender.is_ready() and DISCOVERY_CF_CANDIDATES > 0:
+        seen = {node["user_id"] for node in nodes}
+        # Swiped and banned users are skipped before the top-N cut, so they
+        # do not use up recommendation slots
+        swiped = swipe_filter.get_swipe_filter(user_id)
+        recommended = recommender.recommend(
+            user_id,
+            DISCOVERY_CF_CANDIDATES,
+            exclude=seen.union(excluded_ids),
+            skip=lambda other_id: other_id in swiped or ban_list.is_banned(other_id)
+        )
+        if recommended:
+            cf_query = """
+            MATCH (other:User)
+            WHERE other.user_id IN $user_ids
+            AND other.deletion_requested_at IS NULL
+            RETURN other
+            """
+            result = session.run(cf_query, {"user_ids": [other_id for other_id, _ in recommended]})
+            nodes.extend(record["other"] for record in result)
+
+    if viewer and len(nodes) < DISCOVERY_DECK_SIZE:
+        # Top up the pool with only the missing count. Archived swipes have
+        # no SWIPED edge; only the filter knows them.
+        seen = {node["user_id"] for node in nodes}
+        extra = _top_up_candidates(session, viewer["u"], seen.union(excluded_ids), DISCOVERY_DECK_SIZE - len(nodes))
+        extra = swipe_filter.filter_unswiped(user_id, extra, key=lambda node: node["user_id"])
+        nodes.extend(ban_list.filter_banned(extra, key=lambda node: node["user_id"]))
+
+    # Best candidates of the pool first
+    if viewer and ranking.NUMPY_AVAILABLE:
+        affinity = recommender.affinity(user_id, [node["user_id"] for node in nodes]) if recommender.is_ready() else None
+        nodes = ranking.rank_candidates(viewer["u"], nodes, affinity=affinity)
+    else:
+        random.shuffle(nodes)
 
-    query = """
-    MATCH (u:User {user_id: $user_id})
-    MATCH (other:User)
-    WHERE other.user_id <> $user_id
-    AND NOT (u)-[:SWIPED]->(other)
-    OPTIONAL MATCH (other)<-[:BELONGS_TO]-(photo:Photo {is_primary: true})
-    RETURN other, photo.url as primary_photo, rand() as random_order
-    ORDER BY random_order
-    LIMIT 50
-    """
-
-    result = session.run(query, {"user_id": user_id})
+    viewer_ordinals = viewer["u"].get("interest_ordinals") if viewer else None
+    catalog = interest_catalog.get_catalog()
 
     users = []
-    for record in result:
-        node = record["other"]
-        primary_photo = record.get("primary_photo")
-
+    for node in nodes[:DISCOVERY_DECK_SIZE]:
         user_dict = {
             "user_id": node["user_id"],
             "name": node["name"],
@@ -277,13 +346,12 @@ def get_potential_matches(user_id: str):
             "max_age": node.get("max_age"),
             "max_distance": node.get("max_distance"),
             "gender_preference": node.get("gender_preference", []),
-            "primary_photo": primary_photo
+            "primary_photo": node.get("primary_photo_url"),
+            "primary_photo_thumb": node.get("primary_photo_thumb_url"),
+            "common_interests": [i["name"] for i in catalog.common(viewer_ordinals, node.get("interest_ordinals"))]
         }
         users.append(user_dict)
 
-    # Additional shuffle in Python for extra randomness
-    random.shuffle(users)
-
     return users
 
 def search_users(query: str, limit: int = 20, current_user_id: str = None):
@@ -291,17 +359,23 @@ def search_users(query: str, limit: int = 20, current_user_id: str = None):
     session = get_db()
 
     # Case-insensitive search using CONTAINS and toLower
-    # Exclude current user if provided
+    # Exclude current user and users blocked either way if provided
     if current_user_id:
         search_query = """
         MATCH (u:User)
         WHERE (toLower(u.name) CONTAINS toLower($query)
            OR toLower(u.email) CONTAINS toLower($query))
            AND u.user_id <> $current_user_id
+           AND NOT u.user_id IN $excluded_ids
         RETURN u
         LIMIT $limit
         """
-        result = session.run(search_query, {"query": query, "limit": limit, "current_user_id": current_user_id})
+        result = session.run(search_query, {
+            "query": query,
+            "limit": limit,
+            "current_user_id": current_user_id,
+            "excluded_ids": list(block_index.get_block_set(current_user_id))
+        })
     else:
         search_query = """
         MATCH (u:User)
@@ -313,32 +387,8 @@ def search_users(query: str, limit: int = 20, current_user_id: str = None):
         result = session.run(search_query, {"query": query, "limit": limit})
 
     users = []
-    for record in result:
-        node = record["u"]
-        user = User(
-            user_id=node["user_id"],
-            name=node["name"],
-            email=node["email"],
-            age=node["age"],
-            gender=node["gender"],
-            password_hash=node["password_hash"],
-            bio=node.get("bio"),
-            city=node.get("city"),
-            latitude=node.get("latitude"),
-            longitude=node.get("longitude"),
-            height=node.get("height"),
-            occupation=node.get("occupation"),
-            education=node.get("education"),
-            interests=node.get("interests", []),
-            is_verified=node.get("is_verified", False),
-            created_at=node.get("created_at"),
-            last_active=node.get("last_active"),
-            min_age=node.get("min_age"),
-            max_age=node.get("max_age"),
-            max_distance=node.get("max_distance"),
-            gender_preference=node.get("gender_preference", [])
-        )
-        users.append(user)
+    for node in ban_list.filter_banned((record["u"] for record in result), key=lambda node: node["user_id"]):
+        users.append(_user_from_node(node))
 
     return users
 
@@ -376,15 +426,108 @@ def create_user_with_password(user_data: dict):
 
     record = result.single()
     node = record["u"]
+    metrics.increment("users")
+    candidate_index.upsert(node)
+
+    if node.get("interests"):
+        Interest.set_user_interests(node["user_id"], node["interests"])
+        return get_user_by_id(node["user_id"])
+
+    return _user_from_node(node)
+
+# Fields an admin listing may project. Sensitive or bulky properties
+# (password hash, reset codes, swipe filters) are never exposed.
+ADMIN_USER_FIELDS = [
+    "user_id", "name", "email", "age", "gender", "bio", "city",
+    "latitude", "longitude", "height", "occupation", "education", "interests",
+    "is_verified", "is_banned", "banned_at", "created_at", "last_active",
+    "min_age", "max_age", "max_distance", "gender_preference",
+    "primary_photo_url", "primary_photo_thumb_url"
+]
+
+def _admin_user_filters(filters: dict):
+    """Build WHERE clauses and params for the admin user listing filters"""
+    clauses = []
+    params = {}
+
+    if filters.get("verified") is not None:
+        clauses.append("coalesce(u.is_verified, false) = $verified")
+        params["verified"] = filters["verified"]
+    if filters.get("banned") is not None:
+        clauses.append("coalesce(u.is_banned, false) = $banned")
+        params["banned"] = filters["banned"]
+    if filters.get("city"):
+        clauses.append("u.city = $city")
+        params["city"] = filters["city"]
+    if filters.get("created_from"):
+        clauses.append("u.created_at >= $created_from")
+        params["created_from"] = filters["created_from"]
+    if filters.get("created_to"):
+        clauses.append("u.created_at < $created_to")
+        params["created_to"] = filters["created_to"]
+
+    return clauses, params
+
+def count_users(filters: dict = None):
+    """Count users matching the admin listing filters"""
+    session = get_db()
+    clauses, params = _admin_user_filters(filters or {})
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return session.run(f"MATCH (u:User) {where} RETURN count(u) as total", params).single()["total"]
 
-    return User(
-        user_id=node["user_id"],
-        name=node["name"],
-        email=node["email"],
-        age=node["age"],
-        gender=node["gender"],
-        password_hash=node["password_hash"],
-        bio=node.get("bio"),
-        created_at=node.get("created_at"),
-        last_active=node.get("last_active")
-    )
+def list_users_page(filters: dict = None, cursor: str = None, limit: int = 50, fields: list = None):
+    """
+    One page of users for admin listings, newest first, using keyset
+    pagination on (created_at, user_id). Returns (rows, next_cursor).
+    Raises ValueError for a malformed cursor.
+    """
+    session = get_db()
+    fields = fields or ADMIN_USER_FIELDS
+    clauses, params = _admin_user_filters(filters or {})
+
+    after = decode_cursor(cursor, size=2)
+    if after:
+        clauses.append(
+            "(u.created_at < $cursor_created_at"
+            " OR (u.created_at = $cursor_created_at AND u.user_id < $cursor_user_id))"
+        )
+        params["cursor_created_at"], params["cursor_user_id"] = after
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    projection = ", ".join(f".{field}" for field in set(fields) | {"user_id", "created_at"})
+    query = f"""
+    MATCH (u:User)
+    {where}
+    RETURN u {{{projection}}} as u
+    ORDER BY u.created_at DESC, u.user_id DESC
+    LIMIT $limit
+    """
+    params["limit"] = limit
+
+    rows = [record["u"] for record in session.run(query, params)]
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["user_id"])
+
+    return [{field: row.get(field) for field in fields} for row in rows], next_cursor
+
+def iter_users(filters: dict = None, fields: list = None, batch_size: int = 1000):
+    """Stream every user matching the filters page by page, in constant memory"""
+    cursor = None
+    while True:
+        rows, cursor = list_users_page(filters, cursor, batch_size, fields)
+        yield from rows
+        if not cursor:
+            return
+
+def request_account_deletion(user_id: str):
+    """Flag a user as being deleted so they drop out of discovery right away"""
+    session = get_db()
+    query = """
+    MATCH (u:User {user_id: $user_id})
+    SET u.deletion_requested_at = coalesce(u.deletion_requested_at, $now)
+    RETURN u.user_id as user_id
+    """
+    result = session.run(query, {"user_id": user_id, "now": datetime.utcnow().isoformat()}).single()
+    candidate_index.remove(user_id)
+    return result is not None
@@ -0,0 +1,65 @@
+# app/db.py
+from app.config import get_db
+
+# Indexes and constraints that queries rely on. Every statement is
+# idempotent (IF NOT EXISTS), so ensure_schema() runs on every startup.
+SCHEMA_STATEMENTS = [
+    # Lookups and admin listing filters
+    "CREATE INDEX user_user_id IF NOT EXISTS FOR (u:User) ON (u.user_id)",
+    "CREATE INDEX user_email IF NOT EXISTS FOR (u:User) ON (u.email)",
+    "CREATE INDEX user_city IF NOT EXISTS FOR (u:User) ON (u.city)",
+    "CREATE INDEX user_is_verified IF NOT EXISTS FOR (u:User) ON (u.is_verified)",
+    "CREATE INDEX user_is_banned IF NOT EXISTS FOR (u:User) ON (u.is_banned)",
+    "CREATE INDEX matches_match_id IF NOT EXISTS FOR ()-[m:MATCHES]-() ON (m.match_id)",
+    # Batched account deletion
+    "CREATE INDEX message_sender_id IF NOT EXISTS FOR (m:Message) ON (m.sender_id)",
+    "CREATE INDEX message_receiver_id IF NOT EXISTS FOR (m:Message) ON (m.receiver_id)",
+    "CREATE INDEX photo_user_id IF NOT EXISTS FOR (p:Photo) ON (p.user_id)",
+    "CREATE INDEX photo_photo_id IF NOT EXISTS FOR (p:Photo) ON (p.photo_id)",
+    # Ban propagation between workers
+    "CREATE INDEX ban_event_at IF NOT EXISTS FOR (e:BanEvent) ON (e.at)",
+    # Interest catalog
+    "CREATE CONSTRAINT interest_interest_id IF NOT EXISTS FOR (i:Interest) REQUIRE i.interest_id IS UNIQUE",
+    "CREATE CONSTRAINT interest_name_key IF NOT EXISTS FOR (i:Interest) REQUIRE i.name_key IS UNIQUE",
+    "CREATE CONSTRAINT sequence_name IF NOT EXISTS FOR (s:Sequence) REQUIRE s.name IS UNIQUE",
+    # Reports and the moderation queue
+    "CREATE CONSTRAINT moderation_case_reported_id IF NOT EXISTS FOR (c:ModerationCase) REQUIRE c.reported_id IS UNIQUE",
+    "CREATE INDEX moderation_case_status_priority IF NOT EXISTS FOR (c:ModerationCase) ON (c.status, c.priority)",
+    "CREATE INDEX report_report_id IF NOT EXISTS FOR (r:Report) ON (r.report_id)",
+    "CREATE INDEX report_reported_id IF NOT EXISTS FOR (r:Report) ON (r.reported_id)",
+    "CREATE INDEX report_status_timestamp IF NOT EXISTS FOR (r:Report) ON (r.status, r.timestamp)",
+    "CREATE INDEX report_timestamp IF NOT EXISTS FOR (r:Report) ON (r.timestamp)",
+    # Archived swipes
+    "CREATE CONSTRAINT archived_swipes_user_id IF NOT EXISTS FOR (a:ArchivedSwipes) REQUIRE a.user_id IS UNIQUE",
+    # Collaborative-filtering recommender
+    "CREATE INDEX user_cf_trained_at IF NOT EXISTS FOR (u:User) ON (u.cf_trained_at)",
+    "CREATE CONSTRAINT recommender_model_name IF NOT EXISTS FOR (m:RecommenderModel) REQUIRE m.name IS UNIQUE",
+    # Per-user ranking signals
+    "CREATE INDEX user_like_rate IF NOT EXISTS FOR (u:User) ON (u.like_rate)",
+    "CREATE INDEX user_response_rate IF NOT EXISTS FOR (u:User) ON (u.response_rate)",
+    "CREATE INDEX user_activity_score IF NOT EXISTS FOR (u:User) ON (u.activity_score)",
+    "CREATE CONSTRAINT job_lease_name IF NOT EXISTS FOR (l:JobLease) REQUIRE l.name IS UNIQUE",
+    # Delta sync positions
+    "CREATE INDEX message_receiver_sync_seq IF NOT EXISTS FOR (m:Message) ON (m.receiver_id, m.receiver_sync_seq)",
+    "CREATE INDEX message_sender_sync_seq IF NOT EXISTS FOR (m:Message) ON (m.sender_id, m.sender_sync_seq)",
+    "CREATE INDEX message_read_sync_seq IF NOT EXISTS FOR (m:Message) ON (m.sender_id, m.read_sync_seq)",
+    # Analytics rollups
+    "CREATE CONSTRAINT daily_stat_date IF NOT EXISTS FOR (d:DailyStat) REQUIRE d.date IS UNIQUE",
+    "CREATE INDEX user_created_at IF NOT EXISTS FOR (u:User) ON (u.created_at)",
+    "CREATE INDEX user_last_active IF NOT EXISTS FOR (u:User) ON (u.last_active)",
+    "CREATE INDEX message_sent_at IF NOT EXISTS FOR (m:Message) ON (m.sent_at)",
+    "CREATE INDEX swiped_timestamp IF NOT EXISTS FOR ()-[s:SWIPED]-() ON (s.timestamp)",
+    "CREATE INDEX matches_matched_at IF NOT EXISTS FOR ()-[m:MATCHES]-() ON (m.matched_at)",
+]
+
+def ensure_schema():
+    """Create missing indexes and constraints"""
+    session = get_db()
+    try:
+        for statement in SCHEMA_STATEMENTS:
+            try:
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"WARNING: schema statement failed: {statement}\n  {e}")
+    finally:
+        session.close()
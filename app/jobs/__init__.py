@@ -0,0 +1 @@
+# app/jobs/__init__.py
@@ -0,0 +1,95 @@
+# app/jobs/analytics_rollup.py
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from app.config import get_db
+
+# Daily engagement rollups, one (:DailyStat {date: 'YYYY-MM-DD'}) node per
+# day. Each day is computed with range predicates on indexed timestamps, so
+# the job streams through a date range one day at a time in constant memory.
+#
+# Swipe timestamps are ISO strings (legacy) or native datetimes (compact),
+# so swipe predicates cover both representations. active_users and swipes
+# only ever increase on recompute: last_active moves forward and old
+# dislikes get archived, so a later recount would undercount a past day.
+ANALYTICS_ROLLUP_INTERVAL = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "900"))
+
+STATS = ["signups", "active_users", "swipes", "likes", "matches", "messages"]
+
+DAY_QUERY = """
+CALL {
+    MATCH (u:User)
+    WHERE u.created_at >= $start_str AND u.created_at < $end_str
+    RETURN count(u) as signups
+}
+CALL {
+    MATCH (u:User)
+    WHERE u.last_active >= $start_str AND u.last_active < $end_str
+    RETURN count(u) as active_users
+}
+CALL {
+    MATCH ()-[s:SWIPED]->()
+    WHERE (s.timestamp >= $start_str AND s.timestamp < $end_str)
+       OR (s.timestamp >= $start_dt AND s.timestamp < $end_dt)
+    RETURN count(s) as swipes,
+           count(CASE WHEN s.action IN ['like', 'super_like'] OR s.action_code IN [1, 2] THEN 1 END) as likes
+}
+CALL {
+    MATCH ()-[m:MATCHES]->()
+    WHERE m.matched_at >= $start_str AND m.matched_at < $end_str
+    RETURN count(m) as matches
+}
+CALL {
+    MATCH (msg:Message)
+    WHERE msg.sent_at >= $start_str AND msg.sent_at < $end_str
+    RETURN count(msg) as messages
+}
+MERGE (d:DailyStat {date: $date})
+SET d.signups = signups,
+    d.active_users = CASE WHEN coalesce(d.active_users, 0) > active_users THEN d.active_users ELSE active_users END,
+    d.swipes = CASE WHEN coalesce(d.swipes, 0) > swipes THEN d.swipes ELSE swipes END,
+    d.likes = CASE WHEN coalesce(d.likes, 0) > likes THEN d.likes ELSE likes END,
+    d.matches = matches,
+    d.messages = messages,
+    d.computed_at = $computed_at
+RETURN d
+"""
+
+def rollup_day(session, day: date):
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    record = session.run(DAY_QUERY, {
+        "date": day.isoformat(),
+        "start_str": start.isoformat(),
+        "end_str": end.isoformat(),
+        "start_dt": start.replace(tzinfo=timezone.utc),
+        "end_dt": end.replace(tzinfo=timezone.utc),
+        "computed_at": datetime.utcnow().isoformat()
+    }).single()
+    return dict(record["d"])
+
+def rollup_date_range(job, start_date: date, end_date: date):
+    """Compute DailyStat rollups for every day in [start_date, end_date]"""
+    days = (end_date - start_date).days + 1
+    job.update(total=days, stage="rollup")
+
+    session = get_db()
+    try:
+        day = start_date
+        while day <= end_date:
+            rollup_day(session, day)
+            job.advance(1)
+            day += timedelta(days=1)
+    finally:
+        session.close()
+
+    return {"days": days, "start": start_date.isoformat(), "end": end_date.isoformat()}
+
+def rollup_recent_days():
+    """Periodic task: refresh yesterday's and today's rollups"""
+    today = datetime.utcnow().date()
+    session = get_db()
+    try:
+        for day in (today - timedelta(days=1), today):
+            rollup_day(session, day)
+    finally:
+        session.close()
@@ -0,0 +1,161 @@
+# app/jobs/archive_swipes.py
+import os
+from datetime import datetime, timedelta, timezone
+from app.config import get_db
+from app.utils import swipe_archive, swipe_filter, metrics
+
+# Dislikes older than this move from the graph to cold storage. They never
+# produce matches, so only discovery exclusion (via the swiped-set filter)
+# and history pages still need them.
+SWIPE_ARCHIVE_AGE_DAYS = int(os.getenv("SWIPE_ARCHIVE_AGE_DAYS", "90"))
+SWIPE_ARCHIVE_BATCH_SIZE = int(os.getenv("SWIPE_ARCHIVE_BATCH_SIZE", "5000"))
+
+# One pass per storage format (see crud.Swipe): each compares the stored
+# timestamp with a bound of the same type, so the swiped_timestamp range
+# index serves the predicate, and pages follow timestamp order from where
+# the previous batch stopped instead of rescanning old likes every batch.
+#   (format, action predicate, lowest timestamp, cutoff converter)
+ARCHIVE_PASSES = [
+    ("legacy", "s.action = 'dislike'", "", lambda cutoff: cutoff.replace(tzinfo=None).isoformat()),
+    ("compact", "s.action_code = 0", datetime(1970, 1, 1, tzinfo=timezone.utc), lambda cutoff: cutoff),
+]
+
+SWIPE_ARCHIVE_INDEX_BATCH_SIZE = int(os.getenv("SWIPE_ARCHIVE_INDEX_BATCH_SIZE", "500"))
+
+# Per-swiper list of archived target IDs (see swipe_filter.archived_swiped_ids)
+# and, on each target, the number of archived dislikes they received, which
+# keeps like rates (jobs.user_scores) counting swipes that left the graph.
+# Only IDs not listed yet are counted, so re-running a batch changes nothing.
+INDEX_ARCHIVED_QUERY = """
+UNWIND $groups as g
+MERGE (a:ArchivedSwipes {user_id: g.from_user_id})
+WITH a, [id IN g.to_user_ids WHERE NOT id IN coalesce(a.to_user_ids, [])] as new_ids
+SET a.to_user_ids = coalesce(a.to_user_ids, []) + new_ids
+WITH new_ids
+UNWIND new_ids as to_user_id
+MATCH (b:User {user_id: to_user_id})
+SET b.archived_dislikes_received = coalesce(b.archived_dislikes_received, 0) + 1
+"""
+
+def _group_by_swiper(pairs):
+    groups = {}
+    for from_user_id, to_user_id in pairs:
+        groups.setdefault(from_user_id, set()).add(to_user_id)
+    return [{"from_user_id": k, "to_user_ids": sorted(v)} for k, v in groups.items()]
+
+def archive_old_dislikes(job, max_age_days: int = SWIPE_ARCHIVE_AGE_DAYS, batch_size: int = SWIPE_ARCHIVE_BATCH_SIZE):
+    """
+    Move dislikes older than max_age_days into cold storage in batches.
+
+    Each batch is appended (and fsynced) to the archive before its edges
+    are deleted, so an interrupted run loses nothing; re-running may append
+    a batch twice, which readers deduplicate.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    session = get_db()
+
+    try:
+        total = 0
+        for _, action_where, _, to_bound in ARCHIVE_PASSES:
+            count_query = f"""
+            MATCH ()-[s:SWIPED]->()
+            WHERE s.timestamp < $cutoff AND {action_where}
+            RETURN count(s) as total
+            """
+            total += session.run(count_query, {"cutoff": to_bound(cutoff)}).single()["total"]
+        job.update(total=total, stage="archiving")
+
+        delete_query = """
+        UNWIND $rel_ids as rel_id
+        MATCH ()-[s:SWIPED]->()
+        WHERE elementId(s) = rel_id
+        DELETE s
+        """
+
+        archived = 0
+        for storage_format, action_where, after, to_bound in ARCHIVE_PASSES:
+            job.update(stage=f"archiving {storage_format}")
+            fetch_query = f"""
+            MATCH (a:User)-[s:SWIPED]->(b:User)
+            WHERE s.timestamp >= $after AND s.timestamp < $cutoff AND {action_where}
+            RETURN elementId(s) as rel_id, a.user_id as from_user_id, b.user_id as to_user_id,
+                   s.timestamp as timestamp
+            ORDER BY s.timestamp
+            LIMIT $batch_size
+            """
+            while True:
+                records = list(session.run(fetch_query, {
+                    "after": after,
+                    "cutoff": to_bound(cutoff),
+                    "batch_size": batch_size
+                }))
+                if not records:
+                    break
+
+                # Make sure every swiper has a persisted filter that covers these
+                # edges before they disappear from the graph
+                for from_user_id in {r["from_user_id"] for r in records}:
+                    swipe_filter.get_swipe_filter(from_user_id)
+
+                swipe_archive.append_swipes([
+                    {
+                        "from_user_id": r["from_user_id"],
+                        "to_user_id": r["to_user_id"],
+                        "action_code": 0,
+                        "ts_us": swipe_archive.to_microseconds(r["timestamp"])
+                    }
+                    for r in records
+                ])
+
+                def _move(tx):
+                    tx.run(INDEX_ARCHIVED_QUERY, {
+                        "groups": _group_by_swiper((r["from_user_id"], r["to_user_id"]) for r in records)
+                    }).consume()
+                    tx.run(delete_query, {"rel_ids": [r["rel_id"] for r in records]}).consume()
+
+                # The edges and their archived-ID entries change together
+                session.execute_write(_move)
+
+                metrics.decrement("swipes", len(records))
+                metrics.increment("archived_swipes", len(records))
+                archived += len(records)
+                job.advance(len(records))
+
+                # Inclusive: other dislikes with the same timestamp are next;
+                # the ones archived here are gone
+                after = records[-1]["timestamp"]
+
+        return {"archived": archived, "cutoff": cutoff.isoformat()}
+    finally:
+        session.close()
+
+def index_archived_swipes(job, batch_size: int = SWIPE_ARCHIVE_INDEX_BATCH_SIZE):
+    """
+    Record the archived target IDs of every swiper (and the targets'
+    archived dislike counts) from the archive files, for swipes archived
+    before these were kept. Safe to run again: IDs already listed are
+    skipped.
+    """
+    job.update(stage="indexing")
+    session = get_db()
+    try:
+        swipers = set()
+        pending = {}
+
+        def _write(pending):
+            groups = [{"from_user_id": k, "to_user_ids": sorted(v)} for k, v in pending.items()]
+            session.run(INDEX_ARCHIVED_QUERY, {"groups": groups}).consume()
+            job.advance(len(groups))
+
+        for from_user_id, to_user_ids in swipe_archive.iter_archived_pairs():
+            # One group per swiper per statement
+            pending.setdefault(from_user_id, set()).update(to_user_ids)
+            swipers.add(from_user_id)
+            if len(pending) >= batch_size:
+                _write(pending)
+                pending = {}
+        if pending:
+            _write(pending)
+        return {"swipers": len(swipers)}
+    finally:
+        session.close()
@@ -0,0 +1,192 @@
+# app/jobs/bulk_moderation.py
+import os
+from datetime import datetime
+from app import crud
+from app.config import get_db
+from app.utils import metrics, ban_list
+from app.utils.cache import invalidate_users
+
+# Users are sent to Neo4j in chunks of BULK_CHUNK_SIZE IDs (one progress
+# step each), and every chunk commits in transactions of BULK_TX_SIZE rows
+# so a large action never holds one huge transaction open.
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "2000"))
+BULK_TX_SIZE = int(os.getenv("BULK_TX_SIZE", "500"))
+
+# Each action body runs per user inside CALL { ... } IN TRANSACTIONS and
+# returns matched_id, changed, was_verified, was_banned.
+_ACTION_BODIES = {
+    "ban": """
+        WITH u, coalesce(u.is_verified, false) as was_verified, coalesce(u.is_banned, false) as was_banned
+        SET u.is_banned = true, u.banned_at = coalesce(u.banned_at, $now)
+        RETURN u.user_id as matched_id, CASE WHEN was_banned THEN 0 ELSE 1 END as changed,
+               was_verified, was_banned
+    """,
+    "unban": """
+        WITH u, coalesce(u.is_verified, false) as was_verified, coalesce(u.is_banned, false) as was_banned
+        SET u.is_banned = false
+        REMOVE u.banned_at
+        RETURN u.user_id as matched_id, CASE WHEN was_banned THEN 1 ELSE 0 END as changed,
+               was_verified, was_banned
+    """,
+    "verify": """
+        WITH u, coalesce(u.is_verified, false) as was_verified, coalesce(u.is_banned, false) as was_banned
+        SET u.is_verified = true
+        RETURN u.user_id as matched_id, CASE WHEN was_verified THEN 0 ELSE 1 END as changed,
+               was_verified, was_banned
+    """
+}
+
+# Deletion goes through the same staged account deletion as a single user:
+# each user is flagged (dropping out of discovery) and gets a delete_account
+# job, which removes their data in bounded batches along with stored
+# photos, exports and cached state.
+BULK_USER_ACTIONS = list(_ACTION_BODIES) + ["delete"]
+
+def _action_query(action: str):
+    return f"""
+    UNWIND $user_ids as user_id
+    CALL {{
+        WITH user_id
+        MATCH (u:User {{user_id: user_id}})
+        {_ACTION_BODIES[action]}
+    }} IN TRANSACTIONS OF $tx_size ROWS
+    RETURN count(matched_id) as matched,
+           sum(changed) as changed,
+           sum(CASE WHEN was_verified THEN 1 ELSE 0 END) as verified,
+           sum(CASE WHEN was_banned THEN 1 ELSE 0 END) as banned
+    """
+
+def _record_metrics(action: str, record):
+    if action == "ban":
+        metrics.increment("banned_users", record["changed"])
+    elif action == "unban":
+        metrics.decrement("banned_users", record["changed"])
+    elif action == "verify":
+        metrics.increment("verified_users", record["changed"])
+
+def _id_chunks(user_ids, chunk_size: int):
+    for i in range(0, len(user_ids), chunk_size):
+        yield user_ids[i:i + chunk_size]
+
+def _filter_chunks(filters: dict, chunk_size: int):
+    # Keyset pages are bounded by (created_at, user_id) values, so changing
+    # or deleting the users of one page never shifts the next one
+    cursor = None
+    while True:
+        rows, cursor = crud.user.list_users_page(filters, cursor, chunk_size, ["user_id"])
+        if rows:
+            yield [row["user_id"] for row in rows]
+        if not cursor:
+            return
+
+def bulk_moderate_users(job, action: str, user_ids: list = None, filters: dict = None,
+                        chunk_size: int = BULK_CHUNK_SIZE):
+    """Apply a moderation action to a list of user IDs or every user matching filters"""
+    if action not in BULK_USER_ACTIONS:
+        raise ValueError(f"Unknown bulk action: {action}")
+
+    if user_ids is not None:
+        user_ids = list(dict.fromkeys(user_ids))
+        job.update(total=len(user_ids), stage=action)
+        chunks = _id_chunks(user_ids, chunk_size)
+    else:
+        job.update(total=crud.user.count_users(filters), stage=action)
+        chunks = _filter_chunks(filters, chunk_size)
+
+    if action == "delete":
+        return _bulk_delete(job, chunks)
+
+    query = _action_query(action)
+    now = datetime.utcnow().isoformat()
+    totals = {"matched": 0, "changed": 0}
+    session = get_db()
+
+    try:
+        for chunk in chunks:
+            record = session.run(query, {"user_ids": chunk, "tx_size": BULK_TX_SIZE, "now": now}).single()
+            invalidate_users(*chunk)
+            _record_metrics(action, record)
+            if action == "ban":
+                ban_list.ban(*chunk)
+            elif action == "unban":
+                ban_list.unban(*chunk)
+
+            totals["matched"] += record["matched"]
+            totals["changed"] += record["changed"]
+            job.advance(len(chunk))
+    finally:
+        session.close()
+
+    return {"action": action, **totals, "not_found": job.processed - totals["matched"]}
+
+def _bulk_delete(job, chunks):
+    from app.jobs import runner
+    from app.jobs.delete_account import delete_account
+
+    matched = 0
+    for chunk in chunks:
+        for user_id in chunk:
+            if crud.user.request_account_deletion(user_id):
+                runner.submit_job("account_deletion", delete_account, user_id,
+                                  params={"user_id": user_id, "bulk_job_id": job.job_id})
+                matched += 1
+        job.advance(len(chunk))
+
+    return {"action": "delete", "matched": matched, "changed": matched, "not_found": job.processed - matched,
+            "deletion_jobs": matched}
+
+def bulk_update_reports(job, status: str, report_ids: list = None, reported_id: str = None,
+                        current_status: str = None):
+    """Set the status of a list of reports, or of every report matching the filter"""
+    if status not in crud.Block.REPORT_STATUSES:
+        raise ValueError(f"Invalid report status: {status}")
+
+    session = get_db()
+    try:
+        if report_ids is not None:
+            report_ids = list(dict.fromkeys(report_ids))
+            job.update(total=len(report_ids), stage="updating")
+            query = """
+            UNWIND $report_ids as report_id
+            CALL {
+                WITH report_id
+                MATCH (r:Report {report_id: report_id})
+                SET r.status = $status
+                RETURN r.report_id as matched_id, r.reported_id as reported_id
+            } IN TRANSACTIONS OF $tx_size ROWS
+            RETURN count(matched_id) as updated, collect(DISTINCT reported_id) as reported_ids
+            """
+            updated = 0
+            for chunk in _id_chunks(report_ids, BULK_CHUNK_SIZE):
+                record = session.run(query, {
+                    "report_ids": chunk, "status": status, "tx_size": BULK_TX_SIZE
+                }).single()
+                crud.Block.refresh_moderation_cases(record["reported_ids"])
+                updated += record["updated"]
+                job.advance(len(chunk))
+            return {"updated": updated, "not_found": len(report_ids) - updated}
+
+        where = """
+        WHERE ($reported_id IS NULL OR r.reported_id = $reported_id)
+          AND ($current_status IS NULL OR r.status = $current_status)
+        """
+        params = {"reported_id": reported_id, "current_status": current_status}
+        total = session.run(f"MATCH (r:Report) {where} RETURN count(r) as total", params).single()["total"]
+        job.update(total=total, stage="updating")
+
+        query = f"""
+        MATCH (r:Report)
+        {where}
+        CALL {{
+            WITH r
+            SET r.status = $status
+        }} IN TRANSACTIONS OF $tx_size ROWS
+        RETURN count(r) as updated, collect(DISTINCT r.reported_id) as reported_ids
+        """
+        record = session.run(query, {**params, "status": status, "tx_size": BULK_TX_SIZE}).single()
+        crud.Block.refresh_moderation_cases(record["reported_ids"])
+        updated = record["updated"]
+        job.update(processed=updated)
+        return {"updated": updated}
+    finally:
+        session.close()
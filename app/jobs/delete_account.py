@@ -0,0 +1,160 @@
+# app/jobs/delete_account.py
+import os
+from app.config import get_db
+from app.utils import metrics, ban_list, cloudinary_service, candidate_index
+from app.utils.cache import invalidate_users
+from app.jobs.export_user_data import delete_exports
+
+# Account data is removed in stages, each a loop of bounded batches, so an
+# active user's thousands of messages and swipes never land in a single
+# transaction. Every stage only deletes what still exists, so a failed or
+# interrupted job can simply be submitted again. The User node goes last;
+# until then it is flagged with deletion_requested_at and hidden from
+# discovery.
+ACCOUNT_DELETE_BATCH_SIZE = int(os.getenv("ACCOUNT_DELETE_BATCH_SIZE", "1000"))
+
+COUNT_QUERY = """
+CALL { MATCH (m:Message {sender_id: $user_id}) RETURN count(m) as sent }
+CALL { MATCH (m:Message {receiver_id: $user_id}) RETURN count(m) as received }
+CALL { MATCH (:User {user_id: $user_id})-[r]-() RETURN count(r) as relationships }
+CALL { MATCH (p:Photo {user_id: $user_id}) RETURN count(p) as photos }
+RETURN sent + received + relationships + photos + 1 as total
+"""
+
+# (stage, query, metric) - each query deletes one batch and returns deleted
+BATCH_STAGES = [
+    ("messages_sent", """
+        MATCH (m:Message {sender_id: $user_id})
+        WITH m LIMIT $batch_size
+        DETACH DELETE m
+        RETURN count(*) as deleted
+    """, "messages"),
+    ("messages_received", """
+        MATCH (m:Message {receiver_id: $user_id})
+        WITH m LIMIT $batch_size
+        DETACH DELETE m
+        RETURN count(*) as deleted
+    """, "messages"),
+    ("swipes", """
+        MATCH (:User {user_id: $user_id})-[s:SWIPED]-()
+        WITH s LIMIT $batch_size
+        DELETE s
+        RETURN count(*) as deleted
+    """, "swipes"),
+    ("likes", """
+        MATCH (:User {user_id: $user_id})-[l:LIKES]-()
+        WITH l LIMIT $batch_size
+        DELETE l
+        RETURN count(*) as deleted
+    """, "likes"),
+    ("matches", """
+        MATCH (:User {user_id: $user_id})-[m:MATCHES]-()
+        WITH m LIMIT $batch_size
+        DELETE m
+        RETURN count(*) as deleted
+    """, "matches"),
+]
+
+REMAINING_RELATIONSHIPS_QUERY = """
+MATCH (:User {user_id: $user_id})-[r]-(other)
+WHERE NOT other:Photo
+WITH r LIMIT $batch_size
+DELETE r
+RETURN count(*) as deleted
+"""
+
+PHOTO_BATCH_QUERY = """
+MATCH (p:Photo {user_id: $user_id})
+RETURN p.photo_id as photo_id, p.public_id as public_id, p.url as url
+LIMIT $batch_size
+"""
+
+DELETE_PHOTOS_QUERY = """
+UNWIND $photo_ids as photo_id
+MATCH (p:Photo {photo_id: photo_id})
+DETACH DELETE p
+"""
+
+DELETE_ARCHIVED_IDS_QUERY = """
+MATCH (a:ArchivedSwipes {user_id: $user_id})
+DELETE a
+"""
+
+DELETE_USER_QUERY = """
+MATCH (u:User {user_id: $user_id})
+WITH u, coalesce(u.is_verified, false) as was_verified, coalesce(u.is_banned, false) as was_banned
+DETACH DELETE u
+RETURN was_verified, was_banned
+"""
+
+def _delete_in_batches(session, job, query, user_id: str, batch_size: int):
+    deleted = 0
+    while True:
+        count = session.run(query, {"user_id": user_id, "batch_size": batch_size}).single()["deleted"]
+        if not count:
+            return deleted
+        deleted += count
+        job.advance(count)
+
+def _delete_photos(session, job, user_id: str, batch_size: int):
+    deleted = 0
+    storage_failures = []
+    while True:
+        records = list(session.run(PHOTO_BATCH_QUERY, {"user_id": user_id, "batch_size": batch_size}))
+        if not records:
+            return deleted, storage_failures
+
+        for record in records:
+            public_id = record["public_id"] or cloudinary_service.public_id_from_url(record["url"])
+            if not public_id:
+                continue
+            try:
+                cloudinary_service.delete_photo(public_id)
+            except Exception as e:
+                # The photo node still goes; the object is reported for manual cleanup
+                print(f"Failed to delete stored photo {public_id} for {user_id}: {e}")
+                storage_failures.append(public_id)
+
+        photo_ids = [record["photo_id"] for record in records]
+        session.run(DELETE_PHOTOS_QUERY, {"photo_ids": photo_ids}).consume()
+        deleted += len(photo_ids)
+        job.advance(len(photo_ids))
+
+def delete_account(job, user_id: str, batch_size: int = ACCOUNT_DELETE_BATCH_SIZE):
+    """Delete a user and everything attached to them in bounded batches"""
+    session = get_db()
+    try:
+        job.update(total=session.run(COUNT_QUERY, {"user_id": user_id}).single()["total"], stage="counting")
+
+        deleted = {}
+        for stage, query, metric in BATCH_STAGES:
+            job.update(stage=stage)
+            deleted[stage] = _delete_in_batches(session, job, query, user_id, batch_size)
+            metrics.decrement(metric, deleted[stage])
+
+        job.update(stage="photos")
+        deleted["photos"], storage_failures = _delete_photos(session, job, user_id, batch_size)
+
+        job.update(stage="relationships")
+        deleted["relationships"] = _delete_in_batches(session, job, REMAINING_RELATIONSHIPS_QUERY, user_id, batch_size)
+
+        job.update(stage="user")
+        session.run(DELETE_ARCHIVED_IDS_QUERY, {"user_id": user_id}).consume()
+        record = session.run(DELETE_USER_QUERY, {"user_id": user_id}).single()
+        deleted["user"] = 1 if record else 0
+        if record:
+            metrics.decrement("users")
+            if record["was_verified"]:
+                metrics.decrement("verified_users")
+            if record["was_banned"]:
+                metrics.decrement("banned_users")
+                ban_list.unban(user_id)
+            job.advance(1)
+
+        invalidate_users(user_id)
+        candidate_index.remove(user_id)
+        delete_exports(user_id)
+
+        return {"user_id": user_id, "deleted": deleted, "storage_failures": storage_failures}
+    finally:
+        session.close()
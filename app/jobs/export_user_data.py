@@ -0,0 +1,169 @@
+# app/jobs/export_user_data.py
+import json
+import os
+import shutil
+import time
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from app import crud
+from app.config import get_db
+
+# A user's data export is a zip of NDJSON files (one JSON object per line)
+# written to DATA_EXPORT_DIR/<user_id>/<export_id>.zip, where export_id is
+# the job ID. Every section is read in keyset pages or as a streamed result
+# and written straight into its zip entry, so memory use does not grow with
+# the user's history. Finished archives are removed after
+# DATA_EXPORT_TTL_HOURS.
+DATA_EXPORT_DIR = Path(os.getenv("DATA_EXPORT_DIR", "exports"))
+DATA_EXPORT_TTL_HOURS = int(os.getenv("DATA_EXPORT_TTL_HOURS", "72"))
+DATA_EXPORT_BATCH_SIZE = int(os.getenv("DATA_EXPORT_BATCH_SIZE", "1000"))
+
+# Internal or secret properties that are not part of the user's data
+PRIVATE_USER_FIELDS = {"password_hash", "reset_code", "reset_code_expires", "swiped_filter", "cf_embedding", "cf_trained_at", "sync_seq"}
+
+def export_path(user_id: str, export_id: str):
+    """Path of an export archive; raises ValueError for a malformed user or export ID"""
+    if not user_id or Path(user_id).name != user_id or user_id in (".", ".."):
+        raise ValueError(f"Invalid user ID: {user_id}")
+    return DATA_EXPORT_DIR / user_id / f"{uuid.UUID(export_id)}.zip"
+
+def _write_ndjson(zf: zipfile.ZipFile, name: str, rows):
+    count = 0
+    with zf.open(name, "w", force_zip64=True) as f:
+        for row in rows:
+            f.write((json.dumps(row, default=str) + "\n").encode("utf-8"))
+            count += 1
+    return count
+
+def _profile(session, user_id: str):
+    result = session.run("MATCH (u:User {user_id: $user_id}) RETURN u", {"user_id": user_id}).single()
+    if not result:
+        return None
+    return {k: v for k, v in dict(result["u"]).items() if k not in PRIVATE_USER_FIELDS}
+
+def _photos(session, user_id: str):
+    query = "MATCH (p:Photo {user_id: $user_id}) RETURN p ORDER BY p.uploaded_at"
+    for record in session.run(query, {"user_id": user_id}):
+        yield dict(record["p"])
+
+def _swipes(user_id: str, job):
+    cursor = None
+    while True:
+        page = crud.Swipe.get_swipe_history(user_id, limit=DATA_EXPORT_BATCH_SIZE, cursor=cursor)
+        yield from page["swipes"]
+        job.advance(len(page["swipes"]))
+        cursor = page["next_cursor"]
+        if not cursor:
+            return
+
+def _matches(session, user_id: str):
+    query = """
+    MATCH (u:User {user_id: $user_id})-[m:MATCHES]-(other:User)
+    RETURN m, other.user_id as other_user_id, other.name as other_user_name
+    ORDER BY m.matched_at
+    """
+    for record in session.run(query, {"user_id": user_id}):
+        yield {**dict(record["m"]), "other_user_id": record["other_user_id"], "other_user_name": record["other_user_name"]}
+
+def _blocks(session, user_id: str):
+    query = """
+    MATCH (u:User {user_id: $user_id})-[b:BLOCKS]->(blocked:User)
+    RETURN b, blocked.user_id as blocked_id
+    ORDER BY b.timestamp
+    """
+    for record in session.run(query, {"user_id": user_id}):
+        yield {**dict(record["b"]), "blocked_id": record["blocked_id"]}
+
+def _messages(session, user_id: str, job):
+    # Sent and received messages are paged separately so each pass can use
+    # the sender_id / receiver_id index
+    for field in ("sender_id", "receiver_id"):
+        query = f"""
+        MATCH (m:Message {{{field}: $user_id}})
+        WHERE $after_sent_at IS NULL
+           OR m.sent_at > $after_sent_at
+           OR (m.sent_at = $after_sent_at AND m.message_id > $after_message_id)
+        RETURN m
+        ORDER BY m.sent_at, m.message_id
+        LIMIT $batch_size
+        """
+        after = (None, None)
+        while True:
+            records = list(session.run(query, {
+                "user_id": user_id,
+                "after_sent_at": after[0],
+                "after_message_id": after[1],
+                "batch_size": DATA_EXPORT_BATCH_SIZE
+            }))
+            for record in records:
+                yield dict(record["m"])
+            job.advance(len(records))
+            if len(records) < DATA_EXPORT_BATCH_SIZE:
+                break
+            last = records[-1]["m"]
+            after = (last["sent_at"], last["message_id"])
+
+def export_user_data(job, user_id: str):
+    """Write a user's profile, photos, swipes, matches, blocks and messages to a zip archive"""
+    path = export_path(user_id, job.job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".partial")
+    session = get_db()
+
+    try:
+        job.update(stage="profile")
+        profile = _profile(session, user_id)
+        if profile is None:
+            raise ValueError(f"User {user_id} not found")
+
+        counts = {}
+        with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("profile.json", json.dumps(profile, default=str, indent=2))
+
+            job.update(stage="photos")
+            counts["photos"] = _write_ndjson(zf, "photos.ndjson", _photos(session, user_id))
+            job.update(stage="swipes")
+            counts["swipes"] = _write_ndjson(zf, "swipes.ndjson", _swipes(user_id, job))
+            job.update(stage="matches")
+            counts["matches"] = _write_ndjson(zf, "matches.ndjson", _matches(session, user_id))
+            job.update(stage="blocks")
+            counts["blocks"] = _write_ndjson(zf, "blocks.ndjson", _blocks(session, user_id))
+            job.update(stage="messages")
+            counts["messages"] = _write_ndjson(zf, "messages.ndjson", _messages(session, user_id, job))
+
+            zf.writestr("manifest.json", json.dumps({
+                "user_id": user_id,
+                "export_id": job.job_id,
+                "generated_at": datetime.utcnow().isoformat(),
+                "counts": counts
+            }, indent=2))
+
+        # Only complete archives ever appear under the final name
+        os.replace(partial, path)
+        return {"export_id": job.job_id, "size_bytes": path.stat().st_size, "counts": counts}
+    except Exception:
+        partial.unlink(missing_ok=True)
+        raise
+    finally:
+        session.close()
+
+def delete_exports(user_id: str):
+    """Remove all of a user's export archives"""
+    shutil.rmtree(DATA_EXPORT_DIR / user_id, ignore_errors=True)
+
+def purge_expired_exports():
+    """Delete archives (and leftovers of crashed jobs) older than DATA_EXPORT_TTL_HOURS"""
+    if not DATA_EXPORT_DIR.exists():
+        return 0
+
+    cutoff = time.time() - DATA_EXPORT_TTL_HOURS * 3600
+    purged = 0
+    for archive in DATA_EXPORT_DIR.glob("*/*"):
+        if archive.suffix in (".zip", ".partial") and archive.stat().st_mtime < cutoff:
+            archive.unlink(missing_ok=True)
+            purged += 1
+    if purged:
+        print(f"Purged {purged} expired data exports")
+    return purged
@@ -0,0 +1,103 @@
+# app/jobs/runner.py
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Background jobs run in a small thread pool inside the API process. Job
+# state lives in memory, so a job ID is only known to the worker that
+# started it; finished jobs are kept for inspection up to JOB_HISTORY_SIZE.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "500"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs = {}
+_lock = threading.Lock()
+
+class Job:
+    def __init__(self, kind: str, params: dict = None):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"  # queued, running, completed, failed
+        self.processed = 0
+        self.total = None
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at = None
+        self.finished_at = None
+
+    def update(self, processed: int = None, total: int = None, stage: str = None):
+        """Report progress from inside the job function"""
+        if processed is not None:
+            self.processed = processed
+        if total is not None:
+            self.total = total
+        if stage is not None:
+            self.stage = stage
+
+    def advance(self, count: int):
+        self.processed += count
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.stage,
+            "processed": self.processed,
+            "total": self.total,
+            "progress": round(self.processed / self.total, 4) if self.total else None,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+def _run(job: Job, fn, args, kwargs):
+    job.status = "running"
+    job.started_at = datetime.utcnow().isoformat()
+    try:
+        job.result = fn(job, *args, **kwargs)
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        print(f"Job {job.kind} {job.job_id} failed: {e}")
+        traceback.print_exc()
+    finally:
+        job.finished_at = datetime.utcnow().isoformat()
+
+def _prune():
+    finished = [j for j in _jobs.values() if j.finished_at]
+    if len(finished) > JOB_HISTORY_SIZE:
+        finished.sort(key=lambda j: j.finished_at)
+        for j in finished[:len(finished) - JOB_HISTORY_SIZE]:
+            _jobs.pop(j.job_id, None)
+
+def submit_job(kind: str, fn, *args, params: dict = None, **kwargs):
+    """
+    Run fn(job, *args, **kwargs) in the background and return the Job.
+    The function reports progress through job.update()/job.advance() and
+    its return value becomes job.result.
+    """
+    job = Job(kind, params)
+    with _lock:
+        _prune()
+        _jobs[job.job_id] = job
+    _executor.submit(_run, job, fn, args, kwargs)
+    return job
+
+def get_job(job_id: str):
+    return _jobs.get(job_id)
+
+def list_jobs(kind: str = None):
+    jobs = [j for j in list(_jobs.values()) if kind is None or j.kind == kind]
+    jobs.sort(key=lambda j: j.created_at, reverse=True)
+    return jobs
@@ -0,0 +1,44 @@
+# app/jobs/scheduler.py
+import threading
+import traceback
+
+# Minimal in-process periodic task runner. Tasks are registered with
+# every() before start(); each runs on its own daemon thread so a slow
+# task does not delay the others.
+_tasks = []
+_stop = threading.Event()
+_threads = []
+
+def every(name: str, interval_seconds: float, fn, run_at_start: bool = False):
+    """Register fn() to run every interval_seconds once the scheduler starts"""
+    _tasks.append((name, interval_seconds, fn, run_at_start))
+
+def _loop(name: str, interval_seconds: float, fn, run_at_start: bool):
+    if not run_at_start and _stop.wait(interval_seconds):
+        return
+    while not _stop.is_set():
+        try:
+            fn()
+        except Exception as e:
+            print(f"Scheduled task {name} failed: {e}")
+            traceback.print_exc()
+        if _stop.wait(interval_seconds):
+            return
+
+def start():
+    _stop.clear()
+    for name, interval_seconds, fn, run_at_start in _tasks:
+        thread = threading.Thread(
+            target=_loop,
+            args=(name, interval_seconds, fn, run_at_start),
+            name=f"scheduler-{name}",
+            daemon=True
+        )
+        thread.start()
+        _threads.append(thread)
+
+def stop(timeout: float = 5):
+    _stop.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
@@ -0,0 +1,113 @@
+# app/jobs/train_recommender.py
+import os
+from datetime import datetime
+from app.config import get_db
+from app.utils import recommender
+
+# Try to import scipy (optional dependency)
+try:
+    import numpy as np
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    print("WARNING: scipy module not installed. The recommender cannot be trained.")
+    print("Install with: pip install scipy numpy")
+
+CF_WRITE_BATCH_SIZE = int(os.getenv("CF_WRITE_BATCH_SIZE", "1000"))
+
+# Archived (cold-storage) dislikes are left out: they are old, and only
+# likes can be confident positives
+SWIPES_QUERY = """
+MATCH (a:User)-[s:SWIPED]->(b:User)
+WHERE a.deletion_requested_at IS NULL AND b.deletion_requested_at IS NULL
+RETURN a.user_id as from_user_id, b.user_id as to_user_id, s.action as action, s.action_code as action_code
+"""
+
+WRITE_EMBEDDINGS_QUERY = """
+UNWIND $rows as row
+MATCH (u:User {user_id: row.user_id})
+SET u.cf_embedding = row.embedding,
+    u.cf_trained_at = $trained_at
+"""
+
+PUBLISH_MODEL_QUERY = """
+MERGE (m:RecommenderModel {name: $name})
+SET m.trained_at = $trained_at,
+    m.factors = $factors,
+    m.users = $users,
+    m.interactions = $interactions
+"""
+
+def _export_matrices(session):
+    """Swipe matrix as (user_ids, preference, confidence) CSR matrices"""
+    from app.crud.Swipe import ACTION_NAMES
+
+    positions = {}
+    rows, cols, preference, confidence = [], [], [], []
+    for record in session.run(SWIPES_QUERY):
+        action = record["action"] or ACTION_NAMES.get(record["action_code"])
+        if action not in recommender.ACTION_FEEDBACK:
+            continue
+        p, weight = recommender.ACTION_FEEDBACK[action]
+        rows.append(positions.setdefault(record["from_user_id"], len(positions)))
+        cols.append(positions.setdefault(record["to_user_id"], len(positions)))
+        preference.append(p)
+        confidence.append(recommender.CF_ALPHA * weight)
+
+    n = len(positions)
+    shape = (n, n)
+    coords = (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))
+    preference = sparse.csr_matrix((np.asarray(preference), coords), shape=shape)
+    confidence = sparse.csr_matrix((np.asarray(confidence), coords), shape=shape)
+    # Explicit zeros (dislikes) must stay in the preference pattern
+    preference.data[preference.data > 1] = 1.0
+    user_ids = sorted(positions, key=positions.get)
+    return user_ids, preference, confidence
+
+def train_recommender(job, factors: int = recommender.CF_FACTORS, iterations: int = recommender.CF_ITERATIONS):
+    """Train the swipe factorization model, store user embeddings and publish the model"""
+    if not SCIPY_AVAILABLE or not recommender.NUMPY_AVAILABLE:
+        raise RuntimeError("Training the recommender requires numpy and scipy")
+
+    session = get_db()
+    try:
+        job.update(stage="exporting")
+        user_ids, preference, confidence = _export_matrices(session)
+        if not user_ids:
+            return {"users": 0, "interactions": 0}
+
+        job.update(stage="training", processed=0, total=iterations)
+        X, Y = recommender.train_als(
+            preference, confidence, factors=factors, iterations=iterations,
+            progress=lambda done: job.update(processed=done)
+        )
+
+        # Users nobody swiped on and who never swiped have nothing to embed
+        embeddings = np.hstack([X, Y]).astype(np.float32)
+        keep = np.flatnonzero(np.abs(embeddings).sum(axis=1) > 0)
+
+        trained_at = datetime.utcnow().isoformat()
+        job.update(stage="writing", processed=0, total=len(keep))
+        for start in range(0, len(keep), CF_WRITE_BATCH_SIZE):
+            batch = keep[start:start + CF_WRITE_BATCH_SIZE]
+            session.run(WRITE_EMBEDDINGS_QUERY, {
+                "rows": [{"user_id": user_ids[i], "embedding": embeddings[i].tolist()} for i in batch],
+                "trained_at": trained_at
+            }).consume()
+            job.advance(len(batch))
+
+        # Workers switch to the new embeddings on their next refresh
+        job.update(stage="publishing")
+        session.run(PUBLISH_MODEL_QUERY, {
+            "name": recommender.MODEL_NAME,
+            "trained_at": trained_at,
+            "factors": factors,
+            "users": int(len(keep)),
+            "interactions": int(confidence.nnz)
+        }).consume()
+        recommender.load()
+
+        return {"trained_at": trained_at, "users": int(len(keep)), "interactions": int(confidence.nnz)}
+    finally:
+        session.close()
@@ -0,0 +1,198 @@
+# app/jobs/user_scores.py
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from app.config import get_db
+from app.utils import metrics
+
+# Per-user ranking signals, recomputed for every user in keyset batches of
+# USER_SCORE_BATCH_SIZE so memory use does not grow with the graph:
+#   like_rate       likes received / swipes received, smoothed towards the
+#                   global like rate with USER_SCORE_PRIOR_SWIPES virtual swipes
+#   response_rate   share of conversations (last USER_SCORE_WINDOW_DAYS) in
+#                   which the user answered the other person's messages
+#   activity_score  0.5 ** (days since last_active / USER_SCORE_HALF_LIFE_DAYS)
+# Inbound swipe and like totals come from relationship degrees (plus the
+# archived dislike count kept by jobs.archive_swipes), so popular users cost
+# no more than anyone else.
+#
+# The periodic task runs on every worker but a lease on a JobLease node lets
+# only one of them start a run per USER_SCORE_INTERVAL.
+USER_SCORE_INTERVAL = int(os.getenv("USER_SCORE_INTERVAL", "3600"))  # 0 = never scheduled
+USER_SCORE_BATCH_SIZE = int(os.getenv("USER_SCORE_BATCH_SIZE", "1000"))
+USER_SCORE_WINDOW_DAYS = int(os.getenv("USER_SCORE_WINDOW_DAYS", "30"))
+USER_SCORE_HALF_LIFE_DAYS = float(os.getenv("USER_SCORE_HALF_LIFE_DAYS", "7"))
+USER_SCORE_PRIOR_SWIPES = float(os.getenv("USER_SCORE_PRIOR_SWIPES", "20"))
+
+LEASE_NAME = "user_scores"
+
+BATCH_QUERY = """
+MATCH (u:User)
+WHERE u.user_id > $after
+WITH u ORDER BY u.user_id LIMIT $batch_size
+CALL {
+    WITH u
+    OPTIONAL MATCH (m:Message {receiver_id: u.user_id})
+    WHERE m.sent_at >= $window_start
+    RETURN collect(DISTINCT m.match_id) as received_in
+}
+CALL {
+    WITH u
+    OPTIONAL MATCH (m:Message {sender_id: u.user_id})
+    WHERE m.sent_at >= $window_start
+    RETURN collect(DISTINCT m.match_id) as sent_in
+}
+RETURN u.user_id as user_id,
+       u.last_active as last_active,
+       COUNT { (u)<-[:SWIPED]-() } + coalesce(u.archived_dislikes_received, 0) as swipes_received,
+       COUNT { (u)<-[:LIKES]-() } as likes_received,
+       size(received_in) as conversations,
+       size([match_id IN received_in WHERE match_id IN sent_in]) as answered
+"""
+
+WRITE_QUERY = """
+UNWIND $rows as row
+MATCH (u:User {user_id: row.user_id})
+SET u.like_rate = row.like_rate,
+    u.response_rate = row.response_rate,
+    u.activity_score = row.activity_score,
+    u.scores_updated_at = $updated_at
+"""
+
+ACQUIRE_LEASE_QUERY = """
+MERGE (l:JobLease {name: $name})
+SET l.lease_lock = true
+REMOVE l.lease_lock
+WITH l
+WHERE (l.expires_at IS NULL OR l.expires_at < $now)
+  AND (l.finished_at IS NULL OR l.finished_at < $due_before)
+SET l.holder = $holder, l.expires_at = $expires_at
+RETURN l
+"""
+
+RELEASE_LEASE_QUERY = """
+MATCH (l:JobLease {name: $name})
+SET l.expires_at = null,
+    l.finished_at = $finished_at,
+    l.last_status = $status,
+    l.last_users = $users,
+    l.last_duration_seconds = $duration_seconds,
+    l.last_users_per_second = $users_per_second
+"""
+
+def _activity(last_active, now: datetime):
+    if not last_active:
+        return None
+    try:
+        last_active = datetime.fromisoformat(str(last_active).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if last_active.tzinfo is not None:
+        last_active = last_active.astimezone(timezone.utc).replace(tzinfo=None)
+    idle_days = max((now - last_active).total_seconds(), 0) / 86400
+    return round(0.5 ** (idle_days / USER_SCORE_HALF_LIFE_DAYS), 4)
+
+def _scores(record, global_like_rate: float, now: datetime):
+    like_rate = (record["likes_received"] + USER_SCORE_PRIOR_SWIPES * global_like_rate) / (
+        record["swipes_received"] + USER_SCORE_PRIOR_SWIPES
+    )
+    response_rate = record["answered"] / record["conversations"] if record["conversations"] else None
+    return {
+        "user_id": record["user_id"],
+        "like_rate": round(like_rate, 4),
+        "response_rate": round(response_rate, 4) if response_rate is not None else None,
+        "activity_score": _activity(record["last_active"], now)
+    }
+
+def compute_user_scores(job, batch_size: int = USER_SCORE_BATCH_SIZE):
+    """Recompute like_rate, response_rate and activity_score for every user"""
+    started = time.monotonic()
+    now = datetime.utcnow()
+    counters = metrics.get_counters()
+    # Archived dislikes left the graph but still count as swipes received
+    all_swipes = counters["swipes"] + counters["archived_swipes"]
+    global_like_rate = counters["likes"] / all_swipes if all_swipes else 0.5
+    job.update(total=counters["users"] or None, stage="scoring")
+
+    session = get_db()
+    try:
+        users = 0
+        after = ""
+        while True:
+            records = list(session.run(BATCH_QUERY, {
+                "after": after,
+                "batch_size": batch_size,
+                "window_start": (now - timedelta(days=USER_SCORE_WINDOW_DAYS)).isoformat()
+            }))
+            if not records:
+                break
+
+            session.run(WRITE_QUERY, {
+                "rows": [_scores(record, global_like_rate, now) for record in records],
+                "updated_at": now.isoformat()
+            }).consume()
+
+            users += len(records)
+            job.advance(len(records))
+            after = records[-1]["user_id"]
+            if len(records) < batch_size:
+                break
+    finally:
+        session.close()
+
+    duration = time.monotonic() - started
+    result = {
+        "users": users,
+        "duration_seconds": round(duration, 2),
+        "users_per_second": round(users / duration, 1) if duration else None,
+        "global_like_rate": round(global_like_rate, 4)
+    }
+    print(f"User scores: {users} users in {result['duration_seconds']}s ({result['users_per_second']} users/s)")
+    return result
+
+def _release(status: str, result: dict):
+    session = get_db()
+    try:
+        session.run(RELEASE_LEASE_QUERY, {
+            "name": LEASE_NAME,
+            "finished_at": datetime.utcnow().isoformat(),
+            "status": status,
+            "users": result.get("users"),
+            "duration_seconds": result.get("duration_seconds"),
+            "users_per_second": result.get("users_per_second")
+        }).consume()
+    finally:
+        session.close()
+
+def compute_user_scores_leased(job, batch_size: int = USER_SCORE_BATCH_SIZE):
+    """compute_user_scores that records its run on the lease node when done"""
+    try:
+        result = compute_user_scores(job, batch_size)
+    except Exception:
+        _release("failed", {})
+        raise
+    _release("completed", result)
+    return result
+
+def schedule_user_scores():
+    """Periodic task: start a scoring job unless another worker ran or is running one"""
+    from app.jobs import runner
+
+    now = datetime.utcnow()
+    session = get_db()
+    try:
+        lease = session.run(ACQUIRE_LEASE_QUERY, {
+            "name": LEASE_NAME,
+            "now": now.isoformat(),
+            # A little slack so workers' timers drifting apart do not skip a run
+            "due_before": (now - timedelta(seconds=USER_SCORE_INTERVAL * 0.9)).isoformat(),
+            "holder": f"{socket.gethostname()}:{os.getpid()}",
+            # A crashed worker's lease runs out after a few intervals
+            "expires_at": (now + timedelta(seconds=USER_SCORE_INTERVAL * 3)).isoformat()
+        }).single()
+    finally:
+        session.close()
+
+    if lease:
+        runner.submit_job("user_scores", compute_user_scores_leased)
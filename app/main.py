@@ -2,7 +2,18 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from app.routes import User, Match, Swipe, Message, Photo, Auth, Admin, Block
+from app.routes import User, Match, Swipe, Message, Photo, Auth, Admin, Block, Interest, Sync
+from app.jobs import scheduler
+from app.jobs.analytics_rollup import rollup_recent_days, ANALYTICS_ROLLUP_INTERVAL
+from app.jobs.export_user_data import purge_expired_exports
+from app.jobs.user_scores import schedule_user_scores, USER_SCORE_INTERVAL
+from app.utils import metrics, ban_list, recommender, candidate_index, activity
+from app.db import ensure_schema
+import os
+
+# Periodic background work (seconds)
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", "10"))
+METRICS_ROLLUP_INTERVAL = int(os.getenv("METRICS_ROLLUP_INTERVAL", "3600"))
 
 app = FastAPI(title="Dating App Backend 🚀")
 
@@ -28,7 +39,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    # "*" is ignored for credentialed requests, so headers clients read
+    # (list endpoints' next-page cursor) must be named
+    expose_headers=["*", "X-Next-Cursor"],
 )
 
 # ✅ Routers
@@ -40,6 +53,46 @@ app.include_router(Swipe.router)
 app.include_router(Message.router)
 app.include_router(Photo.router)
 app.include_router(Block.router)
+app.include_router(Interest.router)
+app.include_router(Sync.router)
+
+# ✅ Background tasks
+scheduler.every("metrics-flush", METRICS_FLUSH_INTERVAL, metrics.flush)
+scheduler.every("activity-flush", activity.ACTIVITY_FLUSH_INTERVAL, activity.flush)
+scheduler.every("metrics-rollup", METRICS_ROLLUP_INTERVAL, metrics.rollup, run_at_start=True)
+scheduler.every("analytics-rollup", ANALYTICS_ROLLUP_INTERVAL, rollup_recent_days, run_at_start=True)
+scheduler.every("ban-sync", ban_list.BAN_POLL_INTERVAL, ban_list.sync)
+scheduler.every("export-purge", 3600, purge_expired_exports, run_at_start=True)
+scheduler.every("candidate-index-rebuild", candidate_index.CANDIDATE_INDEX_REBUILD_INTERVAL, candidate_index.rebuild, run_at_start=True)
+scheduler.every("recommender-refresh", recommender.CF_REFRESH_INTERVAL, recommender.load, run_at_start=True)
+if USER_SCORE_INTERVAL > 0:
+    # Checked more often than it runs; the lease decides which worker goes
+    scheduler.every("user-scores", min(USER_SCORE_INTERVAL, 300), schedule_user_scores)
+
+@app.on_event("startup")
+def start_background_tasks():
+    try:
+        ensure_schema()
+    except Exception as e:
+        print(f"WARNING: could not ensure database schema: {e}")
+    try:
+        print(f"Loaded {ban_list.load()} banned users")
+    except Exception as e:
+        # ban-sync retries the full load on its next run
+        print(f"WARNING: could not load banned users: {e}")
+    scheduler.start()
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    scheduler.stop()
+    try:
+        metrics.flush()
+    except Exception as e:
+        print(f"Failed to flush metrics on shutdown: {e}")
+    try:
+        activity.flush()
+    except Exception as e:
+        print(f"Failed to flush user activity on shutdown: {e}")
 
 @app.get("/")
 def root():
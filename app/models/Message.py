@@ -12,7 +12,8 @@ class Message:
         content: str,
         sent_at: Optional[str] = None,
         read_at: Optional[str] = None,
-        is_read: bool = False
+        is_read: bool = False,
+        seq: Optional[int] = None
     ):
         self.message_id = message_id
         self.match_id = match_id
@@ -22,3 +23,4 @@ class Message:
         self.sent_at = sent_at or datetime.utcnow().isoformat()
         self.read_at = read_at
         self.is_read = is_read
+        self.seq = seq  # position in the conversation; None for older messages
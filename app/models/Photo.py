@@ -10,7 +10,8 @@ class Photo:
         url: str,
         is_primary: bool = False,
         order: int = 0,
-        uploaded_at: Optional[str] = None
+        uploaded_at: Optional[str] = None,
+        thumb_url: Optional[str] = None
     ):
         self.photo_id = photo_id
         self.user_id = user_id
@@ -18,3 +19,4 @@ class Photo:
         self.is_primary = is_primary
         self.order = order
         self.uploaded_at = uploaded_at or datetime.utcnow().isoformat()
+        self.thumb_url = thumb_url or url
@@ -27,7 +27,10 @@ class User:
         min_age: Optional[int] = None,
         max_age: Optional[int] = None,
         max_distance: Optional[int] = None,
-        gender_preference: Optional[List[str]] = None
+        gender_preference: Optional[List[str]] = None,
+        # Denormalized from the user's cover photo
+        primary_photo_url: Optional[str] = None,
+        primary_photo_thumb_url: Optional[str] = None
     ):
         self.user_id = user_id
         self.name = name
@@ -51,3 +54,5 @@ class User:
         self.max_age = max_age
         self.max_distance = max_distance
         self.gender_preference = gender_preference or []
+        self.primary_photo_url = primary_photo_url
+        self.primary_photo_thumb_url = primary_photo_thumb_url
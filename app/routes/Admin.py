@@ -1,13 +1,22 @@
 # app/routes/Admin.py
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from datetime import timedelta
+from datetime import timedelta, datetime, date
 from app import crud
 from app.auth import create_access_token, verify_password, ACCESS_TOKEN_EXPIRE_MINUTES
-from typing import List
+from app.utils import metrics, ban_list, activity
+from typing import List, Optional
+import csv
+import io
+import json
+import os
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+# Rows fetched per keyset page while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("ADMIN_EXPORT_BATCH_SIZE", "1000"))
+
 # Admin credentials (in production, store securely in database)
 ADMIN_CREDENTIALS = {
     "admin@datingapp.com": {
@@ -25,6 +34,31 @@ class Token(BaseModel):
     token_type: str
     role: str
 
+class BulkUserFilter(BaseModel):
+    verified: Optional[bool] = None
+    banned: Optional[bool] = None
+    city: Optional[str] = None
+    created_from: Optional[date] = None
+    created_to: Optional[date] = None
+
+class BulkUserAction(BaseModel):
+    action: str  # ban, unban, verify, delete
+    user_ids: Optional[List[str]] = None
+    filter: Optional[BulkUserFilter] = None
+
+class BulkReportUpdate(BaseModel):
+    status: str  # pending, reviewed, resolved
+    report_ids: Optional[List[str]] = None
+    reported_id: Optional[str] = None
+    current_status: Optional[str] = None
+
+class CaseClaim(BaseModel):
+    moderator: str
+
+class CaseResolution(BaseModel):
+    moderator: str
+    outcome: str  # dismissed, actioned
+
 class UserStats(BaseModel):
     total_users: int
     active_today: int
@@ -65,99 +99,182 @@ def admin_login(credentials: AdminLogin):
 # ---------- Dashboard Stats ----------
 @router.get("/stats")
 def get_dashboard_stats():
-    """Get admin dashboard statistics"""
+    """Get admin dashboard statistics from the pre-aggregated metrics store"""
     try:
-        # Get all users for stats calculation
-        from app.config import get_db
-        session = get_db()
-
-        # Total users
-        total_result = session.run("MATCH (u:User) RETURN count(u) as total")
-        total_users = total_result.single()["total"] if total_result.peek() else 0
-
-        # Verified users
-        verified_result = session.run("MATCH (u:User {is_verified: true}) RETURN count(u) as verified")
-        verified_users = verified_result.single()["verified"] if verified_result.peek() else 0
-
-        # Total matches
-        matches_result = session.run("MATCH (m:Match) RETURN count(m) as matches")
-        total_matches = matches_result.single()["matches"] if matches_result.peek() else 0
-
-        # Total messages
-        messages_result = session.run("MATCH (msg:Message) RETURN count(msg) as messages")
-        total_messages = messages_result.single()["messages"] if messages_result.peek() else 0
+        counters = metrics.get_counters()
+        today = datetime.utcnow().date()
+        daily = crud.Analytics.get_daily_stats(today - timedelta(days=6), today)
 
         return {
-            "total_users": total_users,
-            "verified_users": verified_users,
-            "total_matches": total_matches,
-            "total_messages": total_messages,
-            "active_today": 0,  # TODO: implement with last_active tracking
-            "new_this_week": 0  # TODO: implement with date filtering
+            "total_users": counters["users"],
+            "verified_users": counters["verified_users"],
+            "banned_users": counters["banned_users"],
+            "total_swipes": counters["swipes"] + counters["archived_swipes"],
+            "total_likes": counters["likes"],
+            "total_matches": counters["matches"],
+            "total_messages": counters["messages"],
+            "active_today": daily[-1]["active_users"],
+            "new_this_week": sum(row["signups"] for row in daily),
+            "updated_at": counters["updated_at"],
+            "rolled_up_at": counters["rolled_up_at"]
         }
     except Exception as e:
         return {
             "total_users": 0,
             "verified_users": 0,
+            "banned_users": 0,
+            "total_swipes": 0,
+            "total_likes": 0,
             "total_matches": 0,
             "total_messages": 0,
             "active_today": 0,
             "new_this_week": 0
         }
 
-# ---------- User Management ----------
-@router.get("/users")
-def get_all_users(skip: int = 0, limit: int = 50):
-    """Get all users with pagination"""
+@router.post("/stats/rollup")
+def rollup_dashboard_stats():
+    """Recount dashboard metrics from the graph now instead of waiting for the periodic rollup"""
     try:
-        from app.config import get_db
-        session = get_db()
-
-        query = """
-        MATCH (u:User)
-        RETURN u
-        ORDER BY u.created_at DESC
-        SKIP $skip
-        LIMIT $limit
-        """
+        metrics.rollup()
+        return metrics.get_counters()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        result = session.run(query, {"skip": skip, "limit": limit})
-        users = []
+@router.get("/stats/activity")
+def get_activity_buffer_stats():
+    """last_active write-behind buffer: pending users, batch sizes and flush latency on this worker"""
+    return activity.get_stats()
 
-        for record in result:
-            node = record["u"]
-            user_dict = dict(node)
-            user_dict.pop("password_hash", None)  # Remove sensitive data
-            users.append(user_dict)
+# ---------- User Management ----------
+def _parse_user_fields(fields: str):
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in crud.user.ADMIN_USER_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def _user_filters(verified, banned, city, created_from, created_to):
+    return {
+        "verified": verified,
+        "banned": banned,
+        "city": city,
+        "created_from": created_from.isoformat() if created_from else None,
+        "created_to": created_to.isoformat() if created_to else None
+    }
 
-        return {"users": users, "count": len(users)}
+@router.get("/users")
+def get_all_users(
+    cursor: str = None,
+    limit: int = Query(50, ge=1, le=500),
+    verified: bool = None,
+    banned: bool = None,
+    city: str = None,
+    created_from: date = None,
+    created_to: date = None,
+    fields: str = Query(None, description="Comma-separated fields to return")
+):
+    """Get users newest first, filtered server-side, with cursor pagination"""
+    field_list = _parse_user_fields(fields)
+    filters = _user_filters(verified, banned, city, created_from, created_to)
+    try:
+        users, next_cursor = crud.user.list_users_page(filters, cursor, limit, field_list)
+        return {"users": users, "count": len(users), "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/users/{user_id}")
-def delete_user(user_id: str):
-    """Delete a user and all related data"""
-    try:
-        from app.config import get_db
-        session = get_db()
+@router.get("/users/export")
+def export_users(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    verified: bool = None,
+    banned: bool = None,
+    city: str = None,
+    created_from: date = None,
+    created_to: date = None,
+    fields: str = Query(None, description="Comma-separated fields to return")
+):
+    """Stream every matching user as NDJSON or CSV without loading them all"""
+    field_list = _parse_user_fields(fields) or crud.user.ADMIN_USER_FIELDS
+    filters = _user_filters(verified, banned, city, created_from, created_to)
+    rows = crud.user.iter_users(filters, field_list, batch_size=EXPORT_BATCH_SIZE)
+
+    if format == "csv":
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=field_list)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({k: v if not isinstance(v, list) else ";".join(map(str, v)) for k, v in row.items()})
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+
+        return StreamingResponse(
+            generate(),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=users.csv"}
+        )
 
-        # Delete user and all relationships
-        query = """
-        MATCH (u:User {user_id: $user_id})
-        DETACH DELETE u
-        RETURN count(u) as deleted
-        """
+    def generate():
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=users.ndjson"}
+    )
 
-        result = session.run(query, {"user_id": user_id})
-        deleted = result.single()["deleted"]
+@router.post("/users/bulk", status_code=status.HTTP_202_ACCEPTED)
+def bulk_user_action(request: BulkUserAction):
+    """Ban, unban, verify or delete many users, given by ID or by filter, as a background job"""
+    from app.jobs import runner
+    from app.jobs.bulk_moderation import bulk_moderate_users, BULK_USER_ACTIONS
+
+    if request.action not in BULK_USER_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid action. Must be one of: {', '.join(BULK_USER_ACTIONS)}")
+    if (request.user_ids is None) == (request.filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of user_ids or filter")
+
+    filters = None
+    if request.filter is not None:
+        f = request.filter
+        filters = _user_filters(f.verified, f.banned, f.city, f.created_from, f.created_to)
+        if not any(value is not None for value in filters.values()):
+            raise HTTPException(status_code=400, detail="Filter must set at least one condition")
+
+    job = runner.submit_job(
+        "bulk_users", bulk_moderate_users, request.action,
+        user_ids=request.user_ids, filters=filters,
+        params={
+            "action": request.action,
+            "user_count": len(request.user_ids) if request.user_ids is not None else None,
+            "filter": filters
+        }
+    )
+    return job.to_dict()
 
-        if deleted == 0:
-            raise HTTPException(status_code=404, detail="User not found")
+@router.delete("/users/{user_id}", status_code=status.HTTP_202_ACCEPTED)
+def delete_user(user_id: str):
+    """Delete a user and all related data in a background job"""
+    from app.jobs import runner
+    from app.jobs.delete_account import delete_account
 
-        return {"message": "User deleted successfully"}
+    try:
+        found = crud.user.request_account_deletion(user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if not found:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    job = runner.submit_job("account_deletion", delete_account, user_id, params={"user_id": user_id})
+    return job.to_dict()
+
 @router.put("/users/{user_id}/verify")
 def verify_user(user_id: str):
     """Verify a user"""
@@ -167,15 +284,21 @@ def verify_user(user_id: str):
 
         query = """
         MATCH (u:User {user_id: $user_id})
+        WITH u, coalesce(u.is_verified, false) as was_verified
         SET u.is_verified = true
-        RETURN u
+        RETURN was_verified
         """
 
-        result = session.run(query, {"user_id": user_id})
-        if not result.peek():
+        result = session.run(query, {"user_id": user_id}).single()
+        if not result:
             raise HTTPException(status_code=404, detail="User not found")
 
+        if not result["was_verified"]:
+            metrics.increment("verified_users")
+
         return {"message": "User verified successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -188,46 +311,67 @@ def ban_user(user_id: str):
 
         query = """
         MATCH (u:User {user_id: $user_id})
+        WITH u, coalesce(u.is_banned, false) as was_banned
         SET u.is_banned = true, u.banned_at = $banned_at
-        RETURN u
+        RETURN was_banned
         """
 
-        from datetime import datetime
         result = session.run(query, {
             "user_id": user_id,
             "banned_at": datetime.utcnow().isoformat()
-        })
+        }).single()
 
-        if not result.peek():
+        if not result:
             raise HTTPException(status_code=404, detail="User not found")
 
+        if not result["was_banned"]:
+            metrics.increment("banned_users")
+        ban_list.ban(user_id)
+
         return {"message": "User banned successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# ---------- Match Management ----------
-@router.get("/matches")
-def get_all_matches(skip: int = 0, limit: int = 50):
-    """Get all matches"""
+@router.put("/users/{user_id}/unban")
+def unban_user(user_id: str):
+    """Lift a user's ban"""
     try:
         from app.config import get_db
         session = get_db()
 
         query = """
-        MATCH (m:Match)
-        RETURN m
-        ORDER BY m.matched_at DESC
-        SKIP $skip
-        LIMIT $limit
+        MATCH (u:User {user_id: $user_id})
+        WITH u, coalesce(u.is_banned, false) as was_banned
+        SET u.is_banned = false
+        REMOVE u.banned_at
+        RETURN was_banned
         """
 
-        result = session.run(query, {"skip": skip, "limit": limit})
-        matches = []
+        result = session.run(query, {"user_id": user_id}).single()
+        if not result:
+            raise HTTPException(status_code=404, detail="User not found")
 
-        for record in result:
-            matches.append(dict(record["m"]))
+        if result["was_banned"]:
+            metrics.decrement("banned_users")
+        ban_list.unban(user_id)
 
-        return {"matches": matches, "count": len(matches)}
+        return {"message": "User unbanned successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ---------- Match Management ----------
+@router.get("/matches")
+def get_all_matches(cursor: str = None, limit: int = Query(50, ge=1, le=500)):
+    """Get all matches newest first with cursor pagination"""
+    try:
+        matches, next_cursor = crud.Match.list_matches_page(cursor, limit)
+        return {"matches": matches, "count": len(matches), "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -235,75 +379,266 @@ def get_all_matches(skip: int = 0, limit: int = 50):
 def delete_match(match_id: str):
     """Delete a match"""
     try:
-        from app.config import get_db
-        session = get_db()
-
-        query = """
-        MATCH (m:Match {match_id: $match_id})
-        DETACH DELETE m
-        RETURN count(m) as deleted
-        """
+        deleted = crud.Match.delete_match(match_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        result = session.run(query, {"match_id": match_id})
-        deleted = result.single()["deleted"]
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Match not found")
 
-        if deleted == 0:
-            raise HTTPException(status_code=404, detail="Match not found")
+    return {"message": "Match deleted successfully"}
 
-        return {"message": "Match deleted successfully"}
+# ---------- Reports & Analytics ----------
+@router.get("/reports/queue")
+def get_moderation_queue(
+    status: str = Query("open", pattern="^(open|claimed|resolved)$"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None
+):
+    """Reported users grouped into cases, highest priority first"""
+    try:
+        cases, next_cursor = crud.Block.get_moderation_queue(status, limit, cursor)
+        return {"cases": cases, "count": len(cases), "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# ---------- Reports & Analytics ----------
-@router.get("/analytics/users-growth")
-def get_users_growth():
-    """Get user growth analytics"""
+@router.post("/reports/queue/rebuild")
+def rebuild_moderation_queue():
+    """Recompute every moderation case from the reports, e.g. after upgrading"""
     try:
-        from app.config import get_db
-        session = get_db()
+        return {"cases": crud.Block.rebuild_moderation_queue()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # This is a simplified version - in production, group by date
-        query = """
-        MATCH (u:User)
-        RETURN u.created_at as date, count(u) as count
-        ORDER BY u.created_at DESC
-        LIMIT 30
-        """
+@router.post("/reports/queue/claim-next")
+def claim_next_case(claim: CaseClaim):
+    """Claim the highest-priority open case"""
+    case = crud.Block.claim_next_case(claim.moderator)
+    if not case:
+        raise HTTPException(status_code=404, detail="No open cases")
+    return case
+
+@router.get("/reports/queue/{reported_id}")
+def get_case_reports(reported_id: str):
+    """All reports about a user"""
+    return {"reported_id": reported_id, "reports": [r.__dict__ for r in crud.Block.get_case_reports(reported_id)]}
+
+@router.post("/reports/queue/{reported_id}/claim")
+def claim_case(reported_id: str, claim: CaseClaim):
+    """Claim a case so other moderators skip it"""
+    case = crud.Block.claim_case(reported_id, claim.moderator)
+    if not case:
+        raise HTTPException(status_code=409, detail="Case not found or claimed by another moderator")
+    return case
+
+@router.post("/reports/queue/{reported_id}/release")
+def release_case(reported_id: str, claim: CaseClaim):
+    """Return a claimed case to the queue"""
+    case = crud.Block.release_case(reported_id, claim.moderator)
+    if not case:
+        raise HTTPException(status_code=409, detail="Case is not claimed by this moderator")
+    return case
+
+@router.post("/reports/queue/{reported_id}/resolve")
+def resolve_case(reported_id: str, resolution: CaseResolution):
+    """Resolve a claimed case and close its open reports"""
+    if resolution.outcome not in crud.Block.CASE_OUTCOMES:
+        raise HTTPException(status_code=400, detail=f"Invalid outcome. Must be one of: {', '.join(crud.Block.CASE_OUTCOMES)}")
+
+    case = crud.Block.resolve_case(reported_id, resolution.moderator, resolution.outcome)
+    if not case:
+        raise HTTPException(status_code=409, detail="Case is not claimed by this moderator")
+    return case
+
+@router.post("/reports/bulk", status_code=status.HTTP_202_ACCEPTED)
+def bulk_update_reports(request: BulkReportUpdate):
+    """Update the status of many reports, given by ID or by reported user / current status"""
+    from app.jobs import runner
+    from app.jobs.bulk_moderation import bulk_update_reports as run_bulk_update
+
+    statuses = crud.Block.REPORT_STATUSES
+    if request.status not in statuses or (request.current_status and request.current_status not in statuses):
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(statuses)}")
+    has_filter = request.reported_id is not None or request.current_status is not None
+    if (request.report_ids is None) == (not has_filter):
+        raise HTTPException(status_code=400, detail="Provide either report_ids or a reported_id/current_status filter")
+
+    job = runner.submit_job(
+        "bulk_reports", run_bulk_update, request.status,
+        report_ids=request.report_ids, reported_id=request.reported_id,
+        current_status=request.current_status,
+        params={
+            "status": request.status,
+            "report_count": len(request.report_ids) if request.report_ids is not None else None,
+            "reported_id": request.reported_id,
+            "current_status": request.current_status
+        }
+    )
+    return job.to_dict()
 
-        result = session.run(query)
-        growth_data = [{"date": record["date"], "count": record["count"]} for record in result]
+@router.get("/analytics/users-growth")
+def get_users_growth(days: int = Query(30, ge=1, le=366)):
+    """Get daily signups for the last `days` days"""
+    try:
+        end_date = datetime.utcnow().date()
+        start_date = end_date - timedelta(days=days - 1)
+        daily = crud.Analytics.get_daily_stats(start_date, end_date)
+        growth_data = [{"date": row["date"], "count": row["signups"]} for row in daily]
 
         return {"growth": growth_data}
     except Exception as e:
         return {"growth": []}
 
+@router.get("/analytics/timeseries")
+def get_analytics_timeseries(
+    start: date = None,
+    end: date = None,
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    stats: str = None
+):
+    """
+    Daily or weekly signups, active users, swipes, likes, matches and messages
+    served from the pre-computed rollups. `stats` is a comma-separated subset.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    if (end - start).days > 731:
+        raise HTTPException(status_code=400, detail="Range is limited to two years")
+
+    from app.jobs.analytics_rollup import STATS
+    selected = [s.strip() for s in stats.split(",")] if stats else STATS
+    unknown = [s for s in selected if s not in STATS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown stats: {', '.join(unknown)}")
+
+    try:
+        series = crud.Analytics.get_timeseries(start, end, bucket, selected)
+        return {"start": start.isoformat(), "end": end.isoformat(), "bucket": bucket, "series": series}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/analytics/match-rate")
 def get_match_rate():
     """Get match rate analytics"""
     try:
-        from app.config import get_db
-        session = get_db()
-
-        # Get total swipes and matches
-        swipes_query = "MATCH (s:Swipe) RETURN count(s) as total_swipes"
-        matches_query = "MATCH (m:Match) RETURN count(m) as total_matches"
+        counters = metrics.get_counters()
 
-        swipes_result = session.run(swipes_query)
-        matches_result = session.run(matches_query)
-
-        total_swipes = swipes_result.single()["total_swipes"] if swipes_result.peek() else 0
-        total_matches = matches_result.single()["total_matches"] if matches_result.peek() else 0
+        total_swipes = counters["swipes"] + counters["archived_swipes"]
+        total_likes = counters["likes"]
+        total_matches = counters["matches"]
 
         match_rate = (total_matches / total_swipes * 100) if total_swipes > 0 else 0
+        like_rate = (total_likes / total_swipes * 100) if total_swipes > 0 else 0
 
         return {
             "total_swipes": total_swipes,
+            "total_likes": total_likes,
             "total_matches": total_matches,
-            "match_rate": round(match_rate, 2)
+            "match_rate": round(match_rate, 2),
+            "like_rate": round(like_rate, 2)
         }
     except Exception as e:
         return {
             "total_swipes": 0,
+            "total_likes": 0,
             "total_matches": 0,
-            "match_rate": 0
+            "match_rate": 0,
+            "like_rate": 0
         }
+
+# ---------- Data Consistency ----------
+@router.get("/consistency/primary-photos")
+def check_primary_photos(fix: bool = False):
+    """Check (and optionally repair) denormalized primary photo URLs on users"""
+    try:
+        from app.crud import Photo as crud_photo
+        return crud_photo.check_primary_photo_consistency(fix)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/storage/swipes")
+def get_swipe_storage_report():
+    """Estimated storage used by SWIPED relationships, current vs compact format"""
+    try:
+        return crud.Swipe.get_swipe_storage_report()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ---------- Background Jobs ----------
+@router.get("/jobs")
+def list_jobs(kind: str = None):
+    """List background jobs known to this worker"""
+    from app.jobs import runner
+    return {"jobs": [job.to_dict() for job in runner.list_jobs(kind)]}
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Get status and progress of a background job"""
+    from app.jobs import runner
+    job = runner.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.post("/jobs/swipe-archive", status_code=status.HTTP_202_ACCEPTED)
+def start_swipe_archive(max_age_days: int = None):
+    """Move old dislikes from the graph into cold storage"""
+    from app.jobs import runner
+    from app.jobs.archive_swipes import archive_old_dislikes, SWIPE_ARCHIVE_AGE_DAYS
+
+    max_age_days = max_age_days or SWIPE_ARCHIVE_AGE_DAYS
+    job = runner.submit_job("swipe_archive", archive_old_dislikes, max_age_days, params={"max_age_days": max_age_days})
+    return job.to_dict()
+
+@router.post("/jobs/swipe-archive-index", status_code=status.HTTP_202_ACCEPTED)
+def start_swipe_archive_index():
+    """Record per-swiper archived IDs for swipes archived before they were kept"""
+    from app.jobs import runner
+    from app.jobs.archive_swipes import index_archived_swipes
+
+    job = runner.submit_job("swipe_archive_index", index_archived_swipes)
+    return job.to_dict()
+
+@router.post("/jobs/analytics-rollup", status_code=status.HTTP_202_ACCEPTED)
+def start_analytics_rollup(start: date, end: date = None):
+    """(Re)compute daily analytics rollups for a date range, e.g. to backfill history"""
+    from app.jobs import runner
+    from app.jobs.analytics_rollup import rollup_date_range
+
+    end = end or datetime.utcnow().date()
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+
+    job = runner.submit_job(
+        "analytics_rollup", rollup_date_range, start, end,
+        params={"start": start.isoformat(), "end": end.isoformat()}
+    )
+    return job.to_dict()
+
+@router.post("/jobs/user-scores", status_code=status.HTTP_202_ACCEPTED)
+def start_user_scores():
+    """Recompute every user's like rate, response rate and activity score now"""
+    from app.jobs import runner
+    from app.jobs.user_scores import compute_user_scores
+
+    job = runner.submit_job("user_scores", compute_user_scores)
+    return job.to_dict()
+
+@router.post("/jobs/recommender-train", status_code=status.HTTP_202_ACCEPTED)
+def start_recommender_training(factors: int = None, iterations: int = None):
+    """Retrain the collaborative-filtering recommender from swipes"""
+    from app.jobs import runner
+    from app.jobs.train_recommender import train_recommender
+    from app.utils import recommender
+
+    factors = factors or recommender.CF_FACTORS
+    iterations = iterations or recommender.CF_ITERATIONS
+    job = runner.submit_job(
+        "recommender_train", train_recommender, factors, iterations,
+        params={"factors": factors, "iterations": iterations}
+    )
+    return job.to_dict()
@@ -9,6 +9,7 @@ from app.auth import (
     create_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.utils import ban_list, activity
 from app.schemas.User import UserCreate
 import secrets
 
@@ -109,11 +110,18 @@ def login(credentials: LoginRequest):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        if ban_list.is_banned(user.user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Account has been banned"
+            )
+
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.user_id},
             expires_delta=access_token_expires
         )
+        activity.record(user.user_id)
 
         user_dict = user.__dict__.copy()
         user_dict.pop("password_hash", None)
@@ -340,9 +348,9 @@ def change_password(user_id: str, request: ChangePasswordRequest):
         session.close()
 
 # ---------- Delete Account ----------
-@router.delete("/delete-account/{user_id}")
+@router.delete("/delete-account/{user_id}", status_code=status.HTTP_202_ACCEPTED)
 def delete_account(user_id: str, request: DeleteAccountRequest):
-    """Delete user account"""
+    """Delete user account. Data is removed by a background job; poll its status with the returned job_id."""
     user = crud_user.get_user_by_id(user_id)
     if not user:
         raise HTTPException(
@@ -357,29 +365,30 @@ def delete_account(user_id: str, request: DeleteAccountRequest):
             detail="Incorrect password"
         )
 
-    from app.config import get_db
-    session = get_db()
+    from app.jobs import runner
+    from app.jobs.delete_account import delete_account as run_delete_account
 
-    try:
-        # Delete all user data (messages, swipes, matches, photos, etc.)
-        query = """
-        MATCH (u:User {user_id: $user_id})
-        OPTIONAL MATCH (u)-[r]-()
-        OPTIONAL MATCH (p:Photo)-[:BELONGS_TO]->(u)
-        OPTIONAL MATCH (m:Message) WHERE m.sender_id = $user_id OR m.receiver_id = $user_id
-        DELETE r, p, m, u
-        RETURN count(u) as deleted_count
-        """
+    crud_user.request_account_deletion(user_id)
+    job = runner.submit_job("account_deletion", run_delete_account, user_id, params={"user_id": user_id})
 
-        result = session.run(query, {"user_id": user_id})
-        record = result.single()
+    return {"message": "Account deletion started", "job_id": job.job_id}
 
-        if not record or record["deleted_count"] == 0:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to delete account"
-            )
+@router.get("/delete-account/{user_id}/status/{job_id}")
+def get_account_deletion_status(user_id: str, job_id: str):
+    """Progress of an account deletion job"""
+    from app.jobs import runner
 
-        return {"message": "Account deleted successfully"}
-    finally:
-        session.close()
+    job = runner.get_job(job_id)
+    if not job or job.kind != "account_deletion" or job.params.get("user_id") != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deletion job not found"
+        )
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "stage": job.stage,
+        "processed": job.processed,
+        "total": job.total
+    }
@@ -1,5 +1,5 @@
 # app/routes/block.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from app import crud
 from app.schemas.Block import BlockCreate, BlockResponse, ReportCreate, ReportResponse
 from typing import List
@@ -18,11 +18,11 @@ def block_user(block: BlockCreate):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check if already blocked
-    already_blocked = crud.block.is_user_blocked(block.blocker_id, block.blocked_id)
+    already_blocked = crud.Block.is_user_blocked(block.blocker_id, block.blocked_id)
     if already_blocked:
         raise HTTPException(status_code=400, detail="User is already blocked")
 
-    new_block = crud.block.create_block(
+    new_block = crud.Block.create_block(
         block.blocker_id,
         block.blocked_id,
         block.reason,
@@ -33,7 +33,7 @@ def block_user(block: BlockCreate):
 
 @router.get("/{block_id}", response_model=BlockResponse)
 def get_block(block_id: str):
-    block = crud.block.get_block_by_id(block_id)
+    block = crud.Block.get_block_by_id(block_id)
     if not block:
         raise HTTPException(status_code=404, detail="Block not found")
     return block.__dict__
@@ -41,13 +41,13 @@ def get_block(block_id: str):
 @router.get("/user/{user_id}")
 def get_user_blocks(user_id: str):
     """Get all users blocked by this user"""
-    blocks = crud.block.get_user_blocks(user_id)
+    blocks = crud.Block.get_user_blocks(user_id)
     return blocks
 
 @router.delete("/{blocker_id}/{blocked_id}")
 def unblock_user(blocker_id: str, blocked_id: str):
     """Unblock a user"""
-    crud.block.unblock_user(blocker_id, blocked_id)
+    crud.Block.unblock_user(blocker_id, blocked_id)
     return {"message": "User unblocked successfully"}
 
 # Report endpoints
@@ -61,7 +61,7 @@ def report_user(report: ReportCreate):
     if not reporter or not reported:
         raise HTTPException(status_code=404, detail="User not found")
 
-    new_report = crud.block.create_report(
+    new_report = crud.Block.create_report(
         report.reporter_id,
         report.reported_id,
         report.reason,
@@ -72,24 +72,38 @@ def report_user(report: ReportCreate):
 
 @router.get("/reports/{report_id}", response_model=ReportResponse)
 def get_report(report_id: str):
-    report = crud.block.get_report_by_id(report_id)
+    report = crud.Block.get_report_by_id(report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     return report.__dict__
 
 @router.get("/reports", response_model=List[ReportResponse])
-def get_all_reports(status: str = None):
-    """Get all reports, optionally filtered by status (pending, reviewed, resolved)"""
-    reports = crud.block.get_all_reports(status)
+def get_all_reports(
+    response: Response,
+    status: str = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: str = None
+):
+    """
+    Get reports newest first, optionally filtered by status (pending, reviewed, resolved).
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        reports, next_cursor = crud.Block.get_all_reports(status, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [r.__dict__ for r in reports]
 
 @router.patch("/reports/{report_id}/status", response_model=ReportResponse)
 def update_report_status(report_id: str, status: str):
     """Update report status (pending, reviewed, resolved)"""
-    if status not in ["pending", "reviewed", "resolved"]:
+    if status not in crud.Block.REPORT_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status. Must be: pending, reviewed, or resolved")
 
-    updated_report = crud.block.update_report_status(report_id, status)
+    updated_report = crud.Block.update_report_status(report_id, status)
     if not updated_report:
         raise HTTPException(status_code=404, detail="Report not found")
 
@@ -1,7 +1,11 @@
 # app/routes/interest.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from app import crud
-from app.schemas.Interest import InterestCreate, InterestResponse, UserInterestCreate, UserInterestsResponse
+from app.schemas.Interest import (
+    InterestCreate, InterestResponse, UserInterestCreate, UserInterestsResponse,
+    CommonInterestsBatchRequest, CommonInterestsBatchResponse
+)
+from app.utils import interest_catalog
 from typing import List
 
 router = APIRouter(prefix="/interests", tags=["Interests"])
@@ -9,18 +13,24 @@ router = APIRouter(prefix="/interests", tags=["Interests"])
 @router.post("/", response_model=InterestResponse)
 def create_interest(interest: InterestCreate):
     """Create a new interest"""
-    new_interest = crud.interest.create_interest(interest.name, interest.category)
+    new_interest = crud.Interest.create_interest(interest.name, interest.category)
     return new_interest.__dict__
 
 @router.get("/", response_model=List[InterestResponse])
-def get_all_interests(category: str = None):
-    """Get all interests, optionally filtered by category"""
-    interests = crud.interest.get_all_interests(category)
+def get_all_interests(request: Request, response: Response, category: str = None):
+    """Get all interests, optionally filtered by category. Supports If-None-Match."""
+    etag = interest_catalog.get_catalog().etag
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    interests = crud.Interest.get_all_interests(category)
     return [i.__dict__ for i in interests]
 
 @router.get("/{interest_id}", response_model=InterestResponse)
 def get_interest(interest_id: str):
-    interest = crud.interest.get_interest_by_id(interest_id)
+    interest = crud.Interest.get_interest_by_id(interest_id)
     if not interest:
         raise HTTPException(status_code=404, detail="Interest not found")
     return interest.__dict__
@@ -34,11 +44,11 @@ def add_user_interest(user_interest: UserInterestCreate):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Verify interest exists
-    interest = crud.interest.get_interest_by_id(user_interest.interest_id)
+    interest = crud.Interest.get_interest_by_id(user_interest.interest_id)
     if not interest:
         raise HTTPException(status_code=404, detail="Interest not found")
 
-    result = crud.interest.add_user_interest(user_interest.user_id, user_interest.interest_id)
+    result = crud.Interest.add_user_interest(user_interest.user_id, user_interest.interest_id)
     if not result:
         raise HTTPException(status_code=400, detail="Failed to add interest")
 
@@ -47,13 +57,13 @@ def add_user_interest(user_interest: UserInterestCreate):
 @router.delete("/user/{user_id}/{interest_id}")
 def remove_user_interest(user_id: str, interest_id: str):
     """Remove an interest from a user's profile"""
-    crud.interest.remove_user_interest(user_id, interest_id)
+    crud.Interest.remove_user_interest(user_id, interest_id)
     return {"message": "Interest removed successfully"}
 
 @router.get("/user/{user_id}")
 def get_user_interests(user_id: str):
     """Get all interests for a user"""
-    interests = crud.interest.get_user_interests(user_id)
+    interests = crud.Interest.get_user_interests(user_id)
     return {
         "user_id": user_id,
         "interests": [i.__dict__ for i in interests]
@@ -62,5 +72,14 @@ def get_user_interests(user_id: str):
 @router.get("/common/{user1_id}/{user2_id}", response_model=List[InterestResponse])
 def get_common_interests(user1_id: str, user2_id: str):
     """Get common interests between two users"""
-    interests = crud.interest.get_common_interests(user1_id, user2_id)
+    interests = crud.Interest.get_common_interests(user1_id, user2_id)
     return [i.__dict__ for i in interests]
+
+@router.post("/common/batch", response_model=CommonInterestsBatchResponse)
+def get_common_interests_batch(request: CommonInterestsBatchRequest):
+    """Get common interests between one user and many others (e.g. a whole deck) at once"""
+    common = crud.Interest.get_common_interests_batch(request.user_id, request.other_user_ids)
+    return {
+        "user_id": request.user_id,
+        "common": {other_id: [i.__dict__ for i in interests] for other_id, interests in common.items()}
+    }
@@ -1,5 +1,5 @@
 # app/routes/match.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from app import crud
 from app.schemas.Match import MatchResponse, MatchWithProfile
 from typing import List
@@ -14,24 +14,34 @@ def get_match(match_id: str):
     return match.__dict__
 
 @router.get("/user/{user_id}", response_model=List[dict])
-def get_user_matches(user_id: str):
-    """Get all matches for a user"""
-    print(f"Fetching matches for user: {user_id}")
-    matches = crud.Match.get_user_matches(user_id)
-    print(f"Found {len(matches)} matches: {matches}")
+def get_user_matches(
+    user_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str = None
+):
+    """
+    Get a user's matches, most recent activity first.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        matches, next_cursor = crud.Match.get_user_matches(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return matches
 
+@router.get("/user/{user_id}/count")
+def count_user_matches(user_id: str):
+    """Get the number of matches a user has"""
+    return {"user_id": user_id, "count": crud.Match.count_user_matches(user_id)}
+
 @router.delete("/{match_id}")
 def delete_match(match_id: str):
     """Unmatch users"""
-    match = crud.Match.get_match_by_id(match_id)
-    if not match:
+    if not crud.Match.delete_match(match_id):
         raise HTTPException(status_code=404, detail="Match not found")
 
-    # Remove the match relationship from Neo4j
-    from app.config import get_db
-    session = get_db()
-    query = "MATCH ()-[m:MATCHES {match_id: $match_id}]-() DELETE m"
-    session.run(query, {"match_id": match_id})
-
     return {"message": "Match deleted successfully"}
@@ -1,7 +1,9 @@
 # app/routes/message.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from app import crud
+from app.auth import ensure_not_banned
 from app.schemas.Message import MessageCreate, MessageResponse, ConversationResponse
+from app.utils import block_index, activity
 from typing import List
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
@@ -9,48 +11,26 @@ router = APIRouter(prefix="/messages", tags=["Messages"])
 @router.post("/", response_model=MessageResponse)
 def send_message(message: MessageCreate):
     """Send a message between matched users"""
-    # Verify both users exist
-    sender = crud.user.get_user_by_id(message.sender_id)
-    if not sender:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Sender not found with ID: {message.sender_id}"
-        )
+    ensure_not_banned(message.sender_id)
+    if block_index.is_blocked_between(message.sender_id, message.receiver_id):
+        raise HTTPException(status_code=403, detail="Cannot message this user")
 
-    receiver = crud.user.get_user_by_id(message.receiver_id)
-    if not receiver:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Receiver not found with ID: {message.receiver_id}"
-        )
-
-    # Find match_id between the two users
-    match_id = message.match_id if hasattr(message, 'match_id') else None
-    if not match_id:
-        # Query to find the match between these two users
-        from app.config import get_db
-        session = get_db()
-        match_query = """
-        MATCH (u1:User {user_id: $user1_id})-[m:MATCHES]-(u2:User {user_id: $user2_id})
-        RETURN m.match_id as match_id
-        LIMIT 1
-        """
-        result = session.run(match_query, {
-            "user1_id": message.sender_id,
-            "user2_id": message.receiver_id
-        }).single()
-
-        if result:
-            match_id = result["match_id"]
-
-    # Create message with match_id
-    new_message = crud.Message.create_message(
+    # Users, match and conversation metadata are checked and written together
+    new_message, status = crud.Message.create_message(
         message.sender_id,
         message.receiver_id,
         message.content,
-        match_id
+        message.match_id
     )
 
+    if status == "sender_not_found":
+        raise HTTPException(status_code=404, detail=f"Sender not found with ID: {message.sender_id}")
+    if status == "receiver_not_found":
+        raise HTTPException(status_code=404, detail=f"Receiver not found with ID: {message.receiver_id}")
+    if status == "match_mismatch":
+        raise HTTPException(status_code=400, detail="Match does not belong to these users")
+
+    activity.record(message.sender_id)
     return new_message.__dict__
 
 @router.get("/{message_id}", response_model=MessageResponse)
@@ -81,6 +61,7 @@ def mark_message_read(message_id: str):
     message = crud.Message.mark_message_as_read(message_id)
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
+    activity.record(message.receiver_id)
     return message.__dict__
 
 @router.get("/unread/{user_id}")
@@ -90,48 +71,36 @@ def get_unread_count(user_id: str):
     return {"user_id": user_id, "unread_count": count}
 
 @router.get("/{user_id}/conversations")
-def get_user_conversations(user_id: str):
-    """Get all conversations for a user (list of matches with last message)"""
-    # Get all matches for the user
-    matches = crud.Match.get_user_matches(user_id)
+def get_user_conversations(
+    user_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str = None
+):
+    """
+    Get a user's conversations (matches with their last message), most
+    recent first. The cursor for the next page is returned in the
+    X-Next-Cursor header.
+    """
+    try:
+        matches, next_cursor = crud.Match.get_user_matches(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     conversations = []
     for match in matches:
-        other_user_id = match["other_user_id"]
-        other_user = crud.user.get_user_by_id(other_user_id)
-
-        if not other_user:
-            continue
-
-        # Get last message between these users
-        try:
-            messages = crud.Message.get_messages_between_users(user_id, other_user_id, limit=1)
-            last_message = messages[0] if messages else None
-        except:
-            last_message = None
-
-        # Get user's primary photo
-        try:
-            from app.crud import Photo as crud_photo_module
-            photos = crud_photo_module.get_user_photos(other_user_id)
-            primary_photo = next((p for p in photos if p.is_primary), photos[0] if photos else None)
-            photo_url = primary_photo.url if primary_photo else None
-        except:
-            photo_url = None
-
         conversations.append({
             "conversation_id": match["match_id"],
-            "user_id": other_user_id,
-            "name": other_user.name,
-            "photo": photo_url,
-            "last_message": last_message.content if last_message else None,
-            "last_message_time": last_message.sent_at if last_message else match["matched_at"],
+            "user_id": match["other_user_id"],
+            "name": match["other_user_name"],
+            "photo": match["other_user"].get("primary_photo"),
+            "last_message": match["last_message"],
+            "last_message_time": match["last_message_time"] or match["matched_at"],
             "unread_count": 0  # Can be implemented later
         })
 
-    # Sort by last message time
-    conversations.sort(key=lambda x: x["last_message_time"] or "", reverse=True)
-
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return conversations
 
 @router.get("/{user_id1}/{user_id2}")
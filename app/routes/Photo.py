@@ -47,6 +47,7 @@ async def upload_photo_file(
         # Upload to Cloudinary
         upload_result = cloudinary_service.upload_photo(file_content, user_id)
         photo_url = upload_result["url"]
+        public_id = upload_result["public_id"]
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload photo: {str(e)}")
@@ -56,7 +57,8 @@ async def upload_photo_file(
         user_id,
         photo_url,
         is_primary,
-        order
+        order,
+        public_id
     )
 
     return new_photo.__dict__
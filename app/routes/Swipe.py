@@ -1,7 +1,9 @@
 # app/routes/swipe.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from app import crud
-from app.schemas.Swipe import SwipeCreate, SwipeResponse
+from app.auth import ensure_not_banned
+from app.schemas.Swipe import SwipeCreate, SwipeResponse, SwipeBatchCreate, SwipeBatchResponse
+from app.utils import activity
 from typing import List
 
 router = APIRouter(prefix="/swipes", tags=["Swipes"])
@@ -9,6 +11,8 @@ router = APIRouter(prefix="/swipes", tags=["Swipes"])
 @router.post("/", response_model=SwipeResponse)
 def create_swipe(swipe: SwipeCreate):
     """Create a swipe (like, dislike, super_like)"""
+    ensure_not_banned(swipe.from_user_id)
+
     # Check if user has already swiped on this person
     already_swiped = crud.Swipe.check_already_swiped(swipe.from_user_id, swipe.to_user_id)
     if already_swiped:
@@ -23,6 +27,7 @@ def create_swipe(swipe: SwipeCreate):
 
     # Create swipe
     result = crud.Swipe.create_swipe(swipe.from_user_id, swipe.to_user_id, swipe.action)
+    activity.record(swipe.from_user_id)
 
     return SwipeResponse(
         swipe_id=result["swipe"].swipe_id,
@@ -33,12 +38,40 @@ def create_swipe(swipe: SwipeCreate):
         is_match=result["is_match"]
     )
 
+@router.post("/batch", response_model=SwipeBatchResponse)
+def create_swipes_batch(batch: SwipeBatchCreate):
+    """Replay a batch of swipes queued by an offline client in one transaction"""
+    ensure_not_banned(batch.from_user_id)
+    results = crud.Swipe.create_swipes_batch(
+        batch.from_user_id,
+        [(item.to_user_id, item.action.value) for item in batch.swipes]
+    )
+
+    if results is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    activity.record(batch.from_user_id)
+
+    return {
+        "from_user_id": batch.from_user_id,
+        "results": results,
+        "created_count": sum(1 for r in results if r["status"] == "created"),
+        "match_count": sum(1 for r in results if r["is_match"])
+    }
+
 @router.get("/user/{user_id}", response_model=List[dict])
 def get_user_swipes(user_id: str, action: str = None):
     """Get all swipes by a user, optionally filtered by action"""
     swipes = crud.Swipe.get_user_swipes(user_id, action)
     return swipes
 
+@router.get("/user/{user_id}/history")
+def get_swipe_history(user_id: str, action: str = None, limit: int = Query(50, ge=1, le=200), cursor: str = None):
+    """Page through a user's swipe history, including archived swipes"""
+    try:
+        return crud.Swipe.get_swipe_history(user_id, action, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/likes/{user_id}", response_model=List[dict])
 def get_user_likes(user_id: str):
     """Get all users this user has liked"""
@@ -47,28 +80,22 @@ def get_user_likes(user_id: str):
     return likes + super_likes
 
 @router.get("/received-likes/{user_id}")
-def get_received_likes(user_id: str):
-    """Get all users who liked this user (but not matched yet)"""
-    from app.config import get_db
-    session = get_db()
-
-    # Get users who liked current user but aren't matched yet
-    query = """
-    MATCH (other:User)-[:LIKES]->(u:User {user_id: $user_id})
-    WHERE NOT (u)-[:MATCHES]-(other)
-    RETURN other.user_id as user_id, other.name as name, other.age as age, other.bio as bio
-    ORDER BY other.name
+def get_received_likes(
+    user_id: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str = None
+):
     """
-    results = session.run(query, {"user_id": user_id})
-
-    received_likes = []
-    for record in results:
-        received_likes.append({
-            "user_id": record["user_id"],
-            "name": record["name"],
-            "age": record.get("age"),
-            "bio": record.get("bio")
-        })
+    Get users who liked this user (but not matched yet), newest first.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    ensure_not_banned(user_id)
+    try:
+        received_likes, next_cursor = crud.Swipe.get_received_likes(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    print(f"User {user_id} has {len(received_likes)} received likes")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return received_likes
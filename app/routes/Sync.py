@@ -0,0 +1,33 @@
+# app/routes/sync.py
+from fastapi import APIRouter, HTTPException, Query
+from app import crud
+from app.auth import ensure_not_banned
+from app.utils import activity
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+@router.get("")
+def sync(
+    user_id: str,
+    since: int = Query(None, ge=0),
+    limit: int = Query(crud.Sync.SYNC_MAX_CHANGES, ge=1, le=crud.Sync.SYNC_MAX_CHANGES)
+):
+    """
+    Changes for a user since the watermark of their last sync: new
+    messages, read receipts, matches and likes. Without `since` only the
+    current watermark is returned, for clients that just loaded full state
+    from the list endpoints. Call again with `since` set to the returned
+    watermark; `has_more` means another call has changes waiting.
+    """
+    ensure_not_banned(user_id)
+    if since is None:
+        watermark = crud.Sync.get_watermark(user_id)
+        if watermark is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return {"user_id": user_id, "watermark": watermark, "has_more": False}
+
+    delta = crud.Sync.get_changes(user_id, since, limit)
+    if delta is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    activity.record(user_id)
+    return {"user_id": user_id, **delta}
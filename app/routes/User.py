@@ -1,7 +1,10 @@
 # app/routes/user.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
 from app.crud import user as crud_user
 from app.crud import Photo as crud_photo
+from app.utils import activity
+from app.auth import ensure_not_banned
 from app.schemas.User import UserCreate, UserResponse, UserUpdate
 from typing import List
 from pydantic import BaseModel
@@ -44,10 +47,13 @@ def get_user(user_id: str):
 @router.get("/{user_id}/potential-matches")
 def get_potential_matches(user_id: str):
     """Get users that this user can swipe on (excluding already swiped users)"""
+    ensure_not_banned(user_id)
     user = crud_user.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    activity.record(user_id)
+
     # Get all users except self and already swiped users
     potential_matches = crud_user.get_potential_matches(user_id)
     return potential_matches
@@ -73,3 +79,53 @@ def update_user_interests(user_id: str, interests_data: InterestsUpdate):
     user_update = UserUpdate(interests=interests_data.interests)
     updated_user = crud_user.update_user(user_id, user_update)
     return updated_user.__dict__
+
+# ---------- Data Export ----------
+@router.post("/{user_id}/export", status_code=status.HTTP_202_ACCEPTED)
+def request_data_export(user_id: str):
+    """Start building an archive of all the user's data"""
+    from app.jobs import runner
+    from app.jobs.export_user_data import export_user_data
+
+    user = crud_user.get_user_by_id(user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    job = runner.submit_job("data_export", export_user_data, user_id, params={"user_id": user_id})
+    return {"export_id": job.job_id, "status": job.status}
+
+@router.get("/{user_id}/export/{export_id}")
+def get_data_export_status(user_id: str, export_id: str):
+    """Progress of a data export, or its availability once finished"""
+    from app.jobs import runner
+    from app.jobs.export_user_data import export_path
+
+    try:
+        path = export_path(user_id, export_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    job = runner.get_job(export_id)
+    if job and job.kind == "data_export" and job.params.get("user_id") == user_id and job.status != "completed":
+        return {"export_id": export_id, "status": job.status, "stage": job.stage, "error": job.error}
+
+    # Job state is per worker; a finished archive on disk is authoritative
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    return {"export_id": export_id, "status": "completed", "size_bytes": path.stat().st_size}
+
+@router.get("/{user_id}/export/{export_id}/download")
+def download_data_export(user_id: str, export_id: str):
+    """Download a finished export archive (supports Range requests for resuming)"""
+    from app.jobs.export_user_data import export_path
+
+    try:
+        path = export_path(user_id, export_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    return FileResponse(path, media_type="application/zip", filename=f"data-export-{user_id}.zip")
@@ -1,8 +1,11 @@
 # app/schemas/interest.py
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 from enum import Enum
 
+# Most users one common-interests batch request may ask about
+MAX_COMMON_INTERESTS_BATCH = 500
+
 class InterestCategoryEnum(str, Enum):
     sports = "sports"
     music = "music"
@@ -34,3 +37,11 @@ class UserInterestsResponse(BaseModel):
     """All interests for a user"""
     user_id: str
     interests: list[InterestResponse]
+
+class CommonInterestsBatchRequest(BaseModel):
+    user_id: str
+    other_user_ids: List[str] = Field(..., max_length=MAX_COMMON_INTERESTS_BATCH)
+
+class CommonInterestsBatchResponse(BaseModel):
+    user_id: str
+    common: Dict[str, List[InterestResponse]]
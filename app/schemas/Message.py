@@ -20,6 +20,7 @@ class MessageResponse(BaseModel):
     match_id: Optional[str] = None
     read_at: Optional[str] = None
     is_read: bool = False
+    seq: Optional[int] = None
 
 class ConversationResponse(BaseModel):
     """All messages in a conversation"""
@@ -19,6 +19,7 @@ class PhotoResponse(BaseModel):
     is_primary: bool
     order: int
     uploaded_at: str
+    thumb_url: Optional[str] = None
 
 class UserPhotosResponse(BaseModel):
     """All photos for a user"""
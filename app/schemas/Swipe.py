@@ -1,5 +1,6 @@
 # app/schemas/swipe.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from enum import Enum
 
 class SwipeActionEnum(str, Enum):
@@ -19,3 +20,29 @@ class SwipeResponse(BaseModel):
     action: SwipeActionEnum
     timestamp: str
     is_match: bool = False  # True if both users liked each other
+
+# Maximum swipes accepted in one offline-replay batch
+MAX_SWIPE_BATCH = 500
+
+class SwipeBatchItem(BaseModel):
+    to_user_id: str
+    action: SwipeActionEnum
+
+class SwipeBatchCreate(BaseModel):
+    from_user_id: str
+    swipes: List[SwipeBatchItem] = Field(min_length=1, max_length=MAX_SWIPE_BATCH)
+
+class SwipeBatchItemResult(BaseModel):
+    to_user_id: str
+    action: SwipeActionEnum
+    status: str  # created, already_swiped, duplicate, user_not_found, invalid
+    swipe_id: Optional[str] = None
+    timestamp: Optional[str] = None
+    is_match: bool = False
+    match_id: Optional[str] = None
+
+class SwipeBatchResponse(BaseModel):
+    from_user_id: str
+    results: List[SwipeBatchItemResult]
+    created_count: int
+    match_count: int
@@ -59,6 +59,8 @@ class UserResponse(BaseModel):
     is_verified: bool = False
     created_at: Optional[str] = None
     last_active: Optional[str] = None
+    primary_photo_url: Optional[str] = None
+    primary_photo_thumb_url: Optional[str] = None
     photos: Optional[List[dict]] = None
 
 class UserProfile(BaseModel):
@@ -0,0 +1,111 @@
+# app/utils/activity.py
+import os
+import threading
+import time
+from datetime import datetime
+from app.config import get_db
+from app.utils.cache import TTLCache
+
+# Write-behind u.last_active. record() only notes the time in memory, and a
+# user whose activity was queued in the last ACTIVITY_INTERVAL seconds is
+# not queued again, so a busy user costs at most one write per interval on
+# each worker. flush() writes everything pending with UNWIND, in statements
+# of up to ACTIVITY_FLUSH_BATCH_SIZE users, every ACTIVITY_FLUSH_INTERVAL
+# seconds and on shutdown. last_active is therefore up to about
+# ACTIVITY_INTERVAL + ACTIVITY_FLUSH_INTERVAL seconds behind, which is fine
+# for ranking and the daily "active users" rollup.
+ACTIVITY_INTERVAL = int(os.getenv("ACTIVITY_INTERVAL", "300"))
+ACTIVITY_FLUSH_INTERVAL = int(os.getenv("ACTIVITY_FLUSH_INTERVAL", "15"))
+ACTIVITY_FLUSH_BATCH_SIZE = int(os.getenv("ACTIVITY_FLUSH_BATCH_SIZE", "5000"))
+ACTIVITY_RECENT_USERS = int(os.getenv("ACTIVITY_RECENT_USERS", "100000"))
+
+# Never moves last_active backwards (another worker may have written a
+# later time already)
+FLUSH_QUERY = """
+UNWIND $rows as row
+MATCH (u:User {user_id: row.user_id})
+WHERE u.last_active IS NULL OR u.last_active < row.last_active
+SET u.last_active = row.last_active
+"""
+
+_pending = {}  # user_id -> last_active
+_recent = TTLCache(maxsize=ACTIVITY_RECENT_USERS, ttl=ACTIVITY_INTERVAL)
+_lock = threading.Lock()
+_stats = {
+    "recorded": 0,
+    "coalesced": 0,
+    "flushes": 0,
+    "failed_flushes": 0,
+    "flushed_users": 0,
+    "last_flush_at": None,
+    "last_batch_size": 0,
+    "last_flush_ms": None,
+    "max_batch_size": 0,
+    "max_flush_ms": None
+}
+
+def record(user_id: str):
+    """Note that a user is active now"""
+    if not user_id:
+        return
+    with _lock:
+        _stats["recorded"] += 1
+        if user_id in _recent:
+            _stats["coalesced"] += 1
+            return
+        _recent.set(user_id, True)
+        _pending[user_id] = datetime.utcnow().isoformat()
+
+def _take_pending():
+    global _pending
+    with _lock:
+        rows, _pending = _pending, {}
+    return rows
+
+def _restore(rows: dict):
+    # Put rows back for the next flush, keeping any newer time recorded since
+    with _lock:
+        for user_id, last_active in rows.items():
+            if _pending.get(user_id, "") < last_active:
+                _pending[user_id] = last_active
+
+def flush():
+    """Write pending last_active times. Returns the number of users written."""
+    rows = _take_pending()
+    if not rows:
+        return 0
+
+    started = time.perf_counter()
+    items = [{"user_id": user_id, "last_active": last_active} for user_id, last_active in rows.items()]
+    session = get_db()
+    try:
+        for start in range(0, len(items), ACTIVITY_FLUSH_BATCH_SIZE):
+            session.run(FLUSH_QUERY, {"rows": items[start:start + ACTIVITY_FLUSH_BATCH_SIZE]}).consume()
+    except Exception:
+        _restore(rows)
+        with _lock:
+            _stats["failed_flushes"] += 1
+        raise
+    finally:
+        session.close()
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    with _lock:
+        _stats["flushes"] += 1
+        _stats["flushed_users"] += len(items)
+        _stats["last_flush_at"] = datetime.utcnow().isoformat()
+        _stats["last_batch_size"] = len(items)
+        _stats["last_flush_ms"] = elapsed_ms
+        _stats["max_batch_size"] = max(_stats["max_batch_size"], len(items))
+        _stats["max_flush_ms"] = max(_stats["max_flush_ms"] or 0, elapsed_ms)
+    return len(items)
+
+def get_stats():
+    """This worker's activity buffer counters and flush timings"""
+    with _lock:
+        return {
+            **_stats,
+            "pending": len(_pending),
+            "interval_seconds": ACTIVITY_INTERVAL,
+            "flush_interval_seconds": ACTIVITY_FLUSH_INTERVAL
+        }
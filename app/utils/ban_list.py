@@ -0,0 +1,164 @@
+# app/utils/ban_list.py
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from app.config import get_db
+
+# In-memory set of banned user IDs, checked on every authenticated request
+# and when building decks and search results instead of reading
+# u.is_banned from Neo4j each time.
+#
+# The set is loaded at startup and updated locally on ban/unban. Changes
+# reach other workers through the channel chosen by BAN_CHANNEL:
+#   local - no propagation (single worker, or tolerate BAN_RELOAD_INTERVAL lag)
+#   neo4j - ban changes are written as BanEvent nodes that every worker
+#           polls every BAN_POLL_INTERVAL seconds
+# Every worker also reloads the full set every BAN_RELOAD_INTERVAL seconds
+# as a safety net.
+BAN_CHANNEL = os.getenv("BAN_CHANNEL", "neo4j")
+BAN_POLL_INTERVAL = int(os.getenv("BAN_POLL_INTERVAL", "5"))
+BAN_RELOAD_INTERVAL = int(os.getenv("BAN_RELOAD_INTERVAL", "600"))
+BAN_EVENT_RETENTION_HOURS = int(os.getenv("BAN_EVENT_RETENTION_HOURS", "24"))
+
+_banned = set()
+_lock = threading.Lock()
+_loaded_at = None
+_listeners = []
+
+class LocalBanChannel:
+    """Channel that only updates the current process"""
+
+    def publish(self, changes):
+        pass
+
+    def poll(self):
+        return []
+
+class Neo4jBanChannel:
+    """
+    Propagates ban changes through BanEvent nodes. Polls re-read a small
+    overlap window so events written with a slightly skewed clock are not
+    missed; replaying an event is harmless because the latest event per
+    user wins.
+    """
+
+    OVERLAP = timedelta(seconds=30)
+
+    def __init__(self):
+        self._since = datetime.utcnow()
+
+    def publish(self, changes):
+        session = get_db()
+        query = """
+        UNWIND $events as event
+        CREATE (:BanEvent {
+            event_id: event.event_id,
+            user_id: event.user_id,
+            banned: event.banned,
+            at: $at
+        })
+        """
+        session.run(query, {
+            "events": [
+                {"event_id": str(uuid.uuid4()), "user_id": user_id, "banned": banned}
+                for user_id, banned in changes
+            ],
+            "at": datetime.utcnow().isoformat()
+        }).consume()
+
+    def poll(self):
+        session = get_db()
+        now = datetime.utcnow()
+        query = """
+        MATCH (e:BanEvent)
+        WHERE e.at >= $since
+        RETURN e.user_id as user_id, e.banned as banned
+        ORDER BY e.at ASC
+        """
+        records = session.run(query, {"since": (self._since - self.OVERLAP).isoformat()})
+        events = [(record["user_id"], record["banned"]) for record in records]
+        self._since = now
+        return events
+
+    def prune(self):
+        session = get_db()
+        cutoff = datetime.utcnow() - timedelta(hours=BAN_EVENT_RETENTION_HOURS)
+        session.run("MATCH (e:BanEvent) WHERE e.at < $cutoff DELETE e", {"cutoff": cutoff.isoformat()}).consume()
+
+CHANNELS = {
+    "local": LocalBanChannel,
+    "neo4j": Neo4jBanChannel
+}
+
+if BAN_CHANNEL not in CHANNELS:
+    raise ValueError(f"Unknown BAN_CHANNEL: {BAN_CHANNEL} (expected one of: {', '.join(CHANNELS)})")
+
+_channel = CHANNELS[BAN_CHANNEL]()
+
+def on_change(fn):
+    """Register fn(changes) to be called with (user_id, banned) pairs as they are applied"""
+    _listeners.append(fn)
+    return fn
+
+def _apply(changes):
+    with _lock:
+        for user_id, banned in changes:
+            if banned:
+                _banned.add(user_id)
+            else:
+                _banned.discard(user_id)
+    for fn in _listeners:
+        fn(changes)
+
+def load():
+    """(Re)load the full banned set from Neo4j"""
+    global _banned, _loaded_at
+    session = get_db()
+    query = "MATCH (u:User) WHERE u.is_banned = true RETURN u.user_id as user_id"
+    banned = {record["user_id"] for record in session.run(query)}
+    with _lock:
+        # Bans and unbans the reload picked up (e.g. missed or pruned events)
+        changes = [(user_id, True) for user_id in banned - _banned]
+        changes.extend((user_id, False) for user_id in _banned - banned)
+        _banned = banned
+        _loaded_at = datetime.utcnow()
+    if changes:
+        for fn in _listeners:
+            fn(changes)
+    return len(banned)
+
+def sync():
+    """Apply changes published by other workers; reload fully when due"""
+    if _loaded_at is None or datetime.utcnow() - _loaded_at > timedelta(seconds=BAN_RELOAD_INTERVAL):
+        load()
+        if hasattr(_channel, "prune"):
+            _channel.prune()
+    _apply(_channel.poll())
+
+def publish(changes):
+    """
+    Record ban state changes, as (user_id, banned) pairs, after they were
+    written to Neo4j: apply them here and send them to the other workers.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    _apply(changes)
+    _channel.publish(changes)
+
+def ban(*user_ids: str):
+    publish((user_id, True) for user_id in user_ids)
+
+def unban(*user_ids: str):
+    publish((user_id, False) for user_id in user_ids)
+
+def is_banned(user_id: str):
+    return user_id in _banned
+
+def filter_banned(items, key=lambda item: item):
+    """Drop items whose key(item) user ID is banned"""
+    banned = _banned
+    if not banned:
+        return list(items)
+    return [item for item in items if key(item) not in banned]
@@ -0,0 +1,44 @@
+# app/utils/block_index.py
+import os
+from app.config import get_db
+from app.utils.cache import TTLCache, register_invalidator
+
+# Per-user set of user IDs hidden by a block in either direction.
+# Entries are invalidated locally on block/unblock; the TTL bounds how long
+# another worker's block change can take to show up here.
+BLOCK_CACHE_SIZE = int(os.getenv("BLOCK_CACHE_SIZE", "50000"))
+BLOCK_CACHE_TTL = int(os.getenv("BLOCK_CACHE_TTL", "600"))
+
+_block_sets = TTLCache(maxsize=BLOCK_CACHE_SIZE, ttl=BLOCK_CACHE_TTL)
+
+def _load_block_set(user_id: str):
+    session = get_db()
+    query = """
+    MATCH (u:User {user_id: $user_id})-[:BLOCKS]-(other:User)
+    RETURN collect(DISTINCT other.user_id) as user_ids
+    """
+    result = session.run(query, {"user_id": user_id}).single()
+    return frozenset(result["user_ids"]) if result else frozenset()
+
+def get_block_set(user_id: str):
+    """Get the IDs of users this user blocked or was blocked by"""
+    if not user_id:
+        return frozenset()
+    return _block_sets.get_or_load(user_id, _load_block_set)
+
+def is_blocked_between(user1_id: str, user2_id: str):
+    """Check if either user has blocked the other"""
+    return user2_id in get_block_set(user1_id)
+
+def filter_blocked(user_id: str, items, key=lambda item: item):
+    """Drop items whose key(item) user ID is blocked in either direction"""
+    blocked = get_block_set(user_id)
+    if not blocked:
+        return list(items)
+    return [item for item in items if key(item) not in blocked]
+
+@register_invalidator
+def invalidate(*user_ids: str):
+    """Forget cached block sets, e.g. after a block or unblock"""
+    for user_id in user_ids:
+        _block_sets.pop(user_id)
@@ -0,0 +1,85 @@
+# app/utils/bloom.py
+import hashlib
+import math
+import struct
+import threading
+
+# Serialized layout: version, bit count, hash count, capacity, items added,
+# followed by the raw bit array.
+_HEADER = struct.Struct(">BIBII")
+_VERSION = 1
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings.
+
+    Membership tests never return a false negative; false positives happen
+    at roughly `error_rate` once `capacity` items have been added. Sizes are
+    chosen with the standard m = -n ln(p) / ln(2)^2 formula, and positions
+    come from double hashing a single BLAKE2b digest.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack(">QQ", digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        """Add an item; returns True if it was (probably) not present before"""
+        positions = self._positions(item)
+        with self._lock:
+            is_new = False
+            for pos in positions:
+                mask = 1 << (pos & 7)
+                if not self._bits[pos >> 3] & mask:
+                    self._bits[pos >> 3] |= mask
+                    is_new = True
+            if is_new:
+                self.count += 1
+            return is_new
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def is_saturated(self):
+        """True once more items were added than the filter was sized for"""
+        return self.count > self.capacity
+
+    def to_bytes(self):
+        with self._lock:
+            header = _HEADER.pack(_VERSION, self.num_bits, self.hash_count, self.capacity, self.count)
+            return header + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        data = bytes(data)
+        version, num_bits, hash_count, capacity, count = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported bloom filter version: {version}")
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.num_bits = num_bits
+        bloom.hash_count = hash_count
+        bloom.count = count
+        bloom._bits = bytearray(data[_HEADER.size:])
+        bloom._lock = threading.Lock()
+        if len(bloom._bits) != (num_bits + 7) // 8:
+            raise ValueError("Corrupt bloom filter: bit array length mismatch")
+        return bloom
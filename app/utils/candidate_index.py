@@ -0,0 +1,385 @@
+# app/utils/candidate_index.py
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+from app.config import get_db
+from app.utils import ban_list
+
+# Try to import numpy (optional dependency)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("WARNING: numpy module not installed. Discovery will query Neo4j for every deck.")
+    print("Install with: pip install numpy")
+
+# In-process columnar index of discovery candidates: one row per user active
+# in the last CANDIDATE_INDEX_ACTIVE_DAYS, held as compact NumPy columns
+# (age, gender code, preferences, quantized coordinates, activity score,
+# flags). A deck request filters every row against the viewer's preferences
+# (and the viewer against each candidate's) in a few vectorized passes and
+# only then fetches the chosen candidates' profiles from Neo4j by user_id.
+#
+# The index is rebuilt from a snapshot at startup and every
+# CANDIDATE_INDEX_REBUILD_INTERVAL seconds, and updated in place when this
+# worker creates, updates, bans or deletes a user. Changes made on other
+# workers show up with the next rebuild (bans sooner, through ban_list).
+CANDIDATE_INDEX_ACTIVE_DAYS = int(os.getenv("CANDIDATE_INDEX_ACTIVE_DAYS", "180"))
+CANDIDATE_INDEX_REBUILD_INTERVAL = int(os.getenv("CANDIDATE_INDEX_REBUILD_INTERVAL", "3600"))
+CANDIDATE_INDEX_LOAD_BATCH_SIZE = int(os.getenv("CANDIDATE_INDEX_LOAD_BATCH_SIZE", "10000"))
+
+# Coordinates are stored as integers in units of 1e-4 degrees (about 11 m)
+COORD_SCALE = 10000
+EARTH_RADIUS_KM = 6371.0
+KM_PER_UNIT = math.radians(1 / COORD_SCALE) * EARTH_RADIUS_KM
+
+GENDER_CODES = {"male": 0, "female": 1, "other": 2}
+
+NO_MAX_AGE = 32767
+
+# Rows filtered per vectorized pass
+QUERY_BLOCK_ROWS = 32768
+
+# Row flags
+ALIVE = 1
+BANNED = 2
+HAS_LOCATION = 4
+
+# Properties a row is built from
+FIELDS = [
+    "user_id", "age", "gender", "gender_preference", "min_age", "max_age",
+    "max_distance", "latitude", "longitude", "activity_score", "is_banned"
+]
+
+SNAPSHOT_QUERY = """
+MATCH (u:User)
+WHERE u.user_id > $after
+  AND u.deletion_requested_at IS NULL
+  AND u.last_active >= $active_since
+WITH u ORDER BY u.user_id LIMIT $batch_size
+RETURN u {.user_id, .age, .gender, .gender_preference, .min_age, .max_age,
+          .max_distance, .latitude, .longitude, .activity_score, .is_banned} as user
+"""
+
+_lock = threading.RLock()
+_index = None
+_rebuilding = None  # user_id -> row dict (None = removed) changed during a rebuild
+
+def _gender_mask(genders):
+    mask = 0
+    for gender in genders or ():
+        code = GENDER_CODES.get(getattr(gender, "value", gender))
+        if code is not None:
+            mask |= 1 << code
+    return mask
+
+class CandidateIndex:
+    """
+    Growable column arrays, one row per user; removed rows are only flagged
+    dead. Rows loaded from a snapshot are ordered: users without a location
+    first, then the rest by latitude, so a distance query only scans the
+    latitude band it needs. Rows added later are appended unordered (a user
+    whose location changes gets a new row) until the next rebuild.
+    """
+
+    COLUMNS = {
+        "age": "int16",
+        "gender": "int8",
+        "wants": "int8",  # bitmask of gender codes, 0 = any
+        "min_age": "int16",  # 0 = no limit
+        "max_age": "int16",  # NO_MAX_AGE = no limit
+        "max_distance": "float32",  # km, NaN = no limit
+        "lat": "int32",
+        "lon": "int32",
+        "activity": "float32",
+        "flags": "uint8",
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.unlocated_end = 0  # rows [0, unlocated_end) have no location
+        self.sorted_end = 0  # rows [unlocated_end, sorted_end) are ordered by latitude
+        self.user_ids = []
+        self.rows = {}
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+
+    @classmethod
+    def from_users(cls, users):
+        users = sorted(users, key=lambda u: (
+            u.get("latitude") is not None and u.get("longitude") is not None,
+            round((u.get("latitude") or 0) * COORD_SCALE)
+        ))
+        n = len(users)
+        index = cls(capacity=max(1024, n))
+        index.size = n
+        index.user_ids = [u["user_id"] for u in users]
+        index.rows = {user_id: row for row, user_id in enumerate(index.user_ids)}
+
+        # Column by column; the same conversions as upsert()
+        c = index.columns
+        located = [u.get("latitude") is not None and u.get("longitude") is not None for u in users]
+        c["age"][:n] = [u.get("age") or 0 for u in users]
+        c["gender"][:n] = [GENDER_CODES.get(u.get("gender"), -1) for u in users]
+        c["wants"][:n] = [_gender_mask(u.get("gender_preference")) for u in users]
+        c["min_age"][:n] = [u.get("min_age") or 0 for u in users]
+        c["max_age"][:n] = [u.get("max_age") or NO_MAX_AGE for u in users]
+        c["max_distance"][:n] = [u.get("max_distance") or np.nan for u in users]
+        c["activity"][:n] = [0.5 if u.get("activity_score") is None else u["activity_score"] for u in users]
+        c["lat"][:n] = [round(u["latitude"] * COORD_SCALE) if ok else 0 for u, ok in zip(users, located)]
+        c["lon"][:n] = [round(u["longitude"] * COORD_SCALE) if ok else 0 for u, ok in zip(users, located)]
+        c["flags"][:n] = [
+            ALIVE | (BANNED if u.get("is_banned") else 0) | (HAS_LOCATION if ok else 0)
+            for u, ok in zip(users, located)
+        ]
+
+        index.unlocated_end = n - sum(located)
+        index.sorted_end = n
+        return index
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self.columns["flags"]))
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def upsert(self, user: dict):
+        """Insert or overwrite a user's row from their User properties"""
+        row = self.rows.get(user["user_id"])
+        if row is not None and row < self.sorted_end and self._location_key(row) != self._location_key_of(user):
+            # Moving would break the ordered region; re-add at the end
+            self.remove(user["user_id"])
+            row = None
+        if row is None:
+            if self.size == len(self.columns["flags"]):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.user_ids.append(user["user_id"])
+            self.rows[user["user_id"]] = row
+
+        c = self.columns
+        c["age"][row] = user.get("age") or 0
+        c["gender"][row] = GENDER_CODES.get(user.get("gender"), -1)
+        c["wants"][row] = _gender_mask(user.get("gender_preference"))
+        c["min_age"][row] = user.get("min_age") or 0
+        c["max_age"][row] = user.get("max_age") or NO_MAX_AGE
+        c["max_distance"][row] = user.get("max_distance") or np.nan
+        activity = user.get("activity_score")
+        c["activity"][row] = 0.5 if activity is None else activity
+
+        flags = ALIVE
+        if user.get("is_banned"):
+            flags |= BANNED
+        latitude, longitude = user.get("latitude"), user.get("longitude")
+        if latitude is not None and longitude is not None:
+            c["lat"][row] = round(latitude * COORD_SCALE)
+            c["lon"][row] = round(longitude * COORD_SCALE)
+            flags |= HAS_LOCATION
+        c["flags"][row] = flags
+
+    def _location_key(self, row: int):
+        if row < self.unlocated_end:
+            return None
+        return int(self.columns["lat"][row])
+
+    @staticmethod
+    def _location_key_of(user: dict):
+        if user.get("latitude") is None or user.get("longitude") is None:
+            return None
+        return round(user["latitude"] * COORD_SCALE)
+
+    def _ranges(self, f: dict):
+        """Row ranges that can hold matches for the filters prepared by query()"""
+        if not f["box"] or self.sorted_end == self.unlocated_end:
+            return [(0, self.size)]
+        band = self.columns["lat"][self.unlocated_end:self.sorted_end]
+        # Same dtype as the column, or searchsorted converts the whole band
+        lo = self.unlocated_end + int(np.searchsorted(band, band.dtype.type(f["box"][0]), side="left"))
+        hi = self.unlocated_end + int(np.searchsorted(band, band.dtype.type(f["box"][1]), side="right"))
+        return [(0, self.unlocated_end), (lo, hi), (self.sorted_end, self.size)]
+
+    def remove(self, user_id: str):
+        row = self.rows.pop(user_id, None)
+        if row is not None:
+            self.columns["flags"][row] = 0
+
+    def set_banned(self, user_id: str, banned: bool):
+        row = self.rows.get(user_id)
+        if row is not None:
+            flags = self.columns["flags"]
+            flags[row] = (flags[row] | BANNED) if banned else (flags[row] & (0xFF ^ BANNED))
+
+    def _match_block(self, start: int, end: int, f: dict):
+        """Row numbers in [start, end) that pass the filters prepared by query()"""
+        c = {name: column[start:end] for name, column in self.columns.items()}
+        mask = (c["flags"] & (ALIVE | BANNED)) == ALIVE
+
+        # Viewer's preferences
+        if f["genders"]:
+            gender_ok = c["gender"] == f["genders"][0]
+            for code in f["genders"][1:]:
+                gender_ok |= c["gender"] == code
+            mask &= gender_ok
+        if f["min_age"]:
+            mask &= c["age"] >= f["min_age"]
+        if f["max_age"]:
+            mask &= c["age"] <= f["max_age"]
+
+        # Candidates' preferences (unset limits never exclude anyone)
+        if f["gender_bit"]:
+            mask &= (c["wants"] == 0) | ((c["wants"] & f["gender_bit"]) != 0)
+        if f["age"]:
+            mask &= (c["min_age"] <= f["age"]) & (c["max_age"] >= f["age"])
+
+        # Distance, first pass: a bounding box on the quantized grid
+        if f["box"]:
+            lat_lo, lat_hi, lon_lo, lon_hi = f["box"]
+            in_box = (c["lat"] >= lat_lo) & (c["lat"] <= lat_hi) & (c["lon"] >= lon_lo) & (c["lon"] <= lon_hi)
+            mask &= in_box | ((c["flags"] & HAS_LOCATION) == 0)
+
+        return np.flatnonzero(mask) + start
+
+    def query(self, viewer: dict, limit: int, exclude=(), rng=None):
+        """
+        IDs of up to `limit` users who pass the viewer's age, gender and
+        distance preferences and whose own age and gender preferences accept
+        the viewer. Rows are sampled at random, weighted towards recently
+        active users. Missing data (no location, no preference) passes.
+        """
+        rng = rng or np.random.default_rng()
+        wants = _gender_mask(viewer.get("gender_preference"))
+        viewer_gender = GENDER_CODES.get(viewer.get("gender"))
+        f = {
+            "genders": [code for code in GENDER_CODES.values() if wants & (1 << code)],
+            "min_age": viewer.get("min_age"),
+            "max_age": viewer.get("max_age"),
+            "gender_bit": 1 << viewer_gender if viewer_gender is not None else 0,
+            "age": viewer.get("age"),
+            "box": None
+        }
+
+        latitude, longitude = viewer.get("latitude"), viewer.get("longitude")
+        if viewer.get("max_distance") and latitude is not None and longitude is not None:
+            center_lat, center_lon = round(latitude * COORD_SCALE), round(longitude * COORD_SCALE)
+            lon_scale = max(math.cos(math.radians(latitude)), 0.01)
+            radius = viewer["max_distance"] / KM_PER_UNIT
+            # Integer bounds keep the comparisons in int32
+            box_lat, box_lon = math.ceil(radius), math.ceil(radius / lon_scale)
+            f["box"] = (center_lat - box_lat, center_lat + box_lat, center_lon - box_lon, center_lon + box_lon)
+
+        # Blocks small enough for the temporaries to stay in CPU cache
+        candidates = np.concatenate([
+            self._match_block(start, min(start + QUERY_BLOCK_ROWS, end), f)
+            for range_start, end in self._ranges(f)
+            for start in range(range_start, end, QUERY_BLOCK_ROWS)
+        ] or [np.zeros(0, dtype=np.int64)])
+
+        excluded = [self.rows[user_id] for user_id in (viewer.get("user_id"), *exclude) if user_id in self.rows]
+        if excluded:
+            candidates = candidates[~np.isin(candidates, excluded)]
+
+        # Distance, second pass: exact (equirectangular) radius on the rows left
+        if f["box"]:
+            located = (self.columns["flags"][candidates] & HAS_LOCATION) > 0
+            dlat = (self.columns["lat"][candidates] - center_lat).astype(np.float32)
+            dlon = (self.columns["lon"][candidates] - center_lon).astype(np.float32) * lon_scale
+            candidates = candidates[(dlat * dlat + dlon * dlon <= radius * radius) | ~located]
+
+        if len(candidates) > 8 * limit:
+            # Thin out a large result uniformly before the weighted draw
+            candidates = np.unique(candidates[rng.integers(0, len(candidates), 8 * limit)])
+        if len(candidates) > limit:
+            # Random keys weighted by activity (Efraimidis-Spirakis)
+            weights = np.maximum(self.columns["activity"][candidates], 0.01)
+            keys = rng.random(len(candidates)) ** (1.0 / weights)
+            candidates = candidates[np.argpartition(-keys, limit)[:limit]]
+        return [self.user_ids[row] for row in candidates]
+
+def _snapshot():
+    session = get_db()
+    users = []
+    active_since = (datetime.utcnow() - timedelta(days=CANDIDATE_INDEX_ACTIVE_DAYS)).isoformat()
+    after = ""
+    while True:
+        records = list(session.run(SNAPSHOT_QUERY, {
+            "after": after,
+            "active_since": active_since,
+            "batch_size": CANDIDATE_INDEX_LOAD_BATCH_SIZE
+        }))
+        users.extend(record["user"] for record in records)
+        if len(records) < CANDIDATE_INDEX_LOAD_BATCH_SIZE:
+            return CandidateIndex.from_users(users)
+        after = records[-1]["user"]["user_id"]
+
+def rebuild():
+    """Replace the index with a fresh snapshot; returns the number of users indexed"""
+    global _index, _rebuilding
+    if not NUMPY_AVAILABLE:
+        return 0
+
+    with _lock:
+        _rebuilding = {}
+    try:
+        index = _snapshot()
+    except Exception:
+        with _lock:
+            _rebuilding = None
+        raise
+
+    with _lock:
+        # Replay changes made while the snapshot was being read
+        for user_id, user in _rebuilding.items():
+            if user is None:
+                index.remove(user_id)
+            else:
+                index.upsert(user)
+        _rebuilding = None
+        _index = index
+    print(f"Rebuilt candidate index: {len(index)} users")
+    return len(index)
+
+def is_ready():
+    return _index is not None
+
+def query(viewer: dict, limit: int, exclude=()):
+    """Candidate user IDs for a viewer (a dict or Neo4j node with User properties)"""
+    index = _index
+    if index is None:
+        return []
+    with _lock:
+        return index.query(viewer, limit, exclude)
+
+def upsert(user: dict):
+    """Index a created or updated user (a dict or Neo4j node with User properties)"""
+    if not NUMPY_AVAILABLE:
+        return
+    user = {field: user.get(field) for field in FIELDS}
+    with _lock:
+        if _rebuilding is not None:
+            _rebuilding[user["user_id"]] = user
+        if _index is not None:
+            _index.upsert(user)
+
+def remove(*user_ids: str):
+    """Drop users from discovery, e.g. when their account is being deleted"""
+    with _lock:
+        for user_id in user_ids:
+            if _rebuilding is not None:
+                _rebuilding[user_id] = None
+            if _index is not None:
+                _index.remove(user_id)
+
+@ban_list.on_change
+def set_banned(changes):
+    """Apply (user_id, banned) pairs from ban_list"""
+    with _lock:
+        if _index is None:
+            return
+        for user_id, banned in changes:
+            _index.set_banned(user_id, banned)
@@ -1,5 +1,6 @@
 # app/utils/cloudinary_service.py
 import os
+import re
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -24,6 +25,9 @@ except ImportError:
     print("WARNING: cloudinary module not installed. Photo upload features will be disabled.")
     print("Install with: pip install cloudinary")
 
+# Size of the square thumbnail variant used on swipe cards and match lists
+THUMBNAIL_SIZE = int(os.getenv("PHOTO_THUMBNAIL_SIZE", "200"))
+
 def upload_photo(file_content, user_id: str, folder: str = "dating_app/photos"):
     """
     Upload a photo to Cloudinary
@@ -119,3 +123,52 @@ def get_optimized_url(public_id: str, width: int = None, height: int = None):
         return url
     except Exception as e:
         raise Exception(f"Failed to generate optimized URL: {str(e)}")
+
+
+def build_thumbnail_url(url: str, size: int = THUMBNAIL_SIZE):
+    """
+    Build the thumbnail variant of a photo URL
+
+    Cloudinary delivery URLs get an on-the-fly crop transformation inserted
+    after the /upload/ segment. Any other URL is returned unchanged.
+
+    Args:
+        url: Full photo URL
+        size: Thumbnail width and height in pixels
+
+    Returns:
+        str: Thumbnail URL
+    """
+    if not url or "res.cloudinary.com" not in url or "/image/upload/" not in url:
+        return url
+
+    transformation = f"c_fill,g_face,w_{size},h_{size},q_auto,f_auto"
+    return url.replace("/image/upload/", f"/image/upload/{transformation}/", 1)
+
+
+def public_id_from_url(url: str):
+    """
+    Recover the public_id of an image from its Cloudinary delivery URL, for
+    photos stored before public_ids were recorded.
+
+    Returns:
+        str: The public_id, or None if the URL is not a Cloudinary upload URL
+    """
+    if not url or "res.cloudinary.com" not in url or "/image/upload/" not in url:
+        return None
+
+    segments = url.split("/image/upload/", 1)[1].split("?", 1)[0].split("/")
+
+    # The public_id follows the version (v123) when there is one; otherwise
+    # skip leading transformation segments (e.g. c_fill,w_200)
+    versions = [i for i, segment in enumerate(segments) if re.match(r"^v\d+$", segment)]
+    if versions:
+        segments = segments[versions[0] + 1:]
+    else:
+        while segments and ("," in segments[0] or re.match(r"^(a|ar|b|bo|c|co|dpr|e|f|fl|g|h|l|o|q|r|t|w|x|y|z)_[^_/]+$", segments[0])):
+            segments.pop(0)
+    if not segments:
+        return None
+
+    path = "/".join(segments)
+    return path.rsplit(".", 1)[0] if "." in segments[-1] else path
@@ -0,0 +1,83 @@
+# app/utils/interest_catalog.py
+import hashlib
+import os
+import threading
+import time
+from app.config import get_db
+
+# In-memory snapshot of the Interest catalog. It is small and read on every
+# profile, deck and catalog request, so it is loaded once and refreshed
+# after INTEREST_CATALOG_TTL seconds or when this worker changes it.
+#
+# Every interest has a stable integer ordinal (i.ordinal, assigned from a
+# Sequence node when the interest is created), so a user's interests can be
+# handled as a set of small ints or a bitmask instead of UUID strings.
+INTEREST_CATALOG_TTL = int(os.getenv("INTEREST_CATALOG_TTL", "300"))
+
+_lock = threading.Lock()
+_snapshot = None
+_loaded_at = 0.0
+
+def normalize_name(name: str):
+    """Key used to match free-text interest names to catalog entries"""
+    return " ".join(name.split()).lower()
+
+class Catalog:
+    def __init__(self, interests):
+        self.interests = interests  # dicts with interest_id, name, category, ordinal; sorted by name
+        self.by_id = {i["interest_id"]: i for i in interests}
+        self.by_name = {normalize_name(i["name"]): i for i in interests}
+        self.by_ordinal = {i["ordinal"]: i for i in interests if i["ordinal"] is not None}
+
+        digest = hashlib.sha1()
+        for i in interests:
+            digest.update(f"{i['interest_id']}|{i['name']}|{i['category']}|{i['ordinal']}\n".encode("utf-8"))
+        self.etag = f'"{digest.hexdigest()}"'
+
+    def common(self, ordinals_a, ordinals_b):
+        """Catalog entries shared by two ordinal lists, sorted by name"""
+        if not ordinals_a or not ordinals_b:
+            return []
+        shared = set(ordinals_a).intersection(ordinals_b)
+        entries = [self.by_ordinal[o] for o in shared if o in self.by_ordinal]
+        entries.sort(key=lambda i: i["name"])
+        return entries
+
+    def ordinals(self, interest_ids):
+        """Ordinals of the given interest IDs, skipping unknown ones"""
+        by_id = self.by_id
+        return [by_id[i]["ordinal"] for i in interest_ids if i in by_id and by_id[i]["ordinal"] is not None]
+
+def _load():
+    session = get_db()
+    query = """
+    MATCH (i:Interest)
+    RETURN i.interest_id as interest_id, i.name as name, i.category as category, i.ordinal as ordinal
+    ORDER BY i.name
+    """
+    return Catalog([dict(record) for record in session.run(query)])
+
+def get_catalog():
+    """Get the current catalog snapshot, reloading it when stale"""
+    global _snapshot, _loaded_at
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _loaded_at < INTEREST_CATALOG_TTL:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or time.monotonic() - _loaded_at >= INTEREST_CATALOG_TTL:
+            _snapshot = _load()
+            _loaded_at = time.monotonic()
+        return _snapshot
+
+def invalidate():
+    """Force a reload on next access, e.g. after creating an interest"""
+    global _loaded_at
+    _loaded_at = 0.0
+
+def to_bitmask(ordinals):
+    """Pack interest ordinals into an int bitmask (bit n set for ordinal n)"""
+    mask = 0
+    for ordinal in ordinals or ():
+        mask |= 1 << ordinal
+    return mask
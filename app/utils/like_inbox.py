@@ -0,0 +1,106 @@
+# app/utils/like_inbox.py
+import os
+import threading
+from app.config import get_db
+from app.utils.cache import TTLCache, register_invalidator
+
+# Per-user "likes you" inbox: the users who liked this user and are not
+# matched with them yet, with the time of each like (l.created_at; LIKES
+# edges written before it was recorded sort last). It backs the paginated
+# received-likes list, so that list no longer scans every inbound LIKES
+# edge and evaluates NOT (u)-[:MATCHES]-(other) per row on each request.
+#
+# Inboxes are updated locally on like, match and unmatch; the TTL bounds
+# how long a change made by another worker can take to show up here.
+# Match detection itself does not rely on this cache: it happens inside
+# the write that creates the LIKES edge.
+LIKE_INBOX_CACHE_SIZE = int(os.getenv("LIKE_INBOX_CACHE_SIZE", "20000"))
+LIKE_INBOX_CACHE_TTL = int(os.getenv("LIKE_INBOX_CACHE_TTL", "300"))
+
+_inboxes = TTLCache(maxsize=LIKE_INBOX_CACHE_SIZE, ttl=LIKE_INBOX_CACHE_TTL)
+_lock = threading.Lock()
+
+class LikeInbox:
+    """Pending inbound likes of one user, newest first"""
+
+    def __init__(self, likes: dict):
+        self.likes = likes  # liker user_id -> liked_at ("" if unknown)
+        self._ordered = None
+
+    def __contains__(self, user_id):
+        return user_id in self.likes
+
+    def __len__(self):
+        return len(self.likes)
+
+    def ordered(self):
+        """(liked_at, user_id) pairs, newest first"""
+        if self._ordered is None:
+            self._ordered = sorted(((at, user_id) for user_id, at in self.likes.items()), reverse=True)
+        return self._ordered
+
+    def with_like(self, user_id: str, liked_at: str):
+        return LikeInbox({**self.likes, user_id: liked_at or ""})
+
+    def without(self, user_id: str):
+        likes = dict(self.likes)
+        likes.pop(user_id, None)
+        return LikeInbox(likes)
+
+def _load_inbox(user_id: str):
+    session = get_db()
+    query = """
+    MATCH (other:User)-[l:LIKES]->(u:User {user_id: $user_id})
+    WHERE NOT EXISTS { (u)-[:MATCHES]-(other) }
+    RETURN other.user_id as user_id, l.created_at as liked_at
+    """
+    results = session.run(query, {"user_id": user_id})
+    return LikeInbox({record["user_id"]: record["liked_at"] or "" for record in results})
+
+def get_inbox(user_id: str):
+    return _inboxes.get_or_load(user_id, _load_inbox)
+
+def has_pending_like(user_id: str, liker_id: str):
+    """Check if liker_id liked user_id and they are not matched yet"""
+    return liker_id in get_inbox(user_id)
+
+def get_page(user_id: str, limit: int, before: tuple = None):
+    """
+    One page of (liked_at, liker_id) pairs newest first, starting after the
+    `before` pair of the previous page.
+    """
+    ordered = get_inbox(user_id).ordered()
+    if before is not None:
+        before = tuple(before)
+        # ordered is descending; skip everything >= before
+        lo, hi = 0, len(ordered)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ordered[mid] >= before:
+                lo = mid + 1
+            else:
+                hi = mid
+        ordered = ordered[lo:]
+    return ordered[:limit]
+
+def _update(user_id: str, change):
+    # Only cached inboxes are updated; others are loaded fresh when needed
+    with _lock:
+        inbox = _inboxes.get(user_id)
+        if inbox is not None:
+            _inboxes.set(user_id, change(inbox))
+
+def record_like(liker_id: str, liked_id: str, liked_at: str):
+    """A like that did not produce a match lands in the liked user's inbox"""
+    _update(liked_id, lambda inbox: inbox.with_like(liker_id, liked_at))
+
+def record_match(user1_id: str, user2_id: str):
+    """Matched users leave each other's inboxes"""
+    _update(user1_id, lambda inbox: inbox.without(user2_id))
+    _update(user2_id, lambda inbox: inbox.without(user1_id))
+
+@register_invalidator
+def invalidate(*user_ids: str):
+    """Forget cached inboxes, e.g. after an unmatch brings pending likes back"""
+    for user_id in user_ids:
+        _inboxes.pop(user_id)
@@ -0,0 +1,135 @@
+# app/utils/metrics.py
+import threading
+from datetime import datetime
+from app.config import get_db
+
+# Dashboard counters are kept on a single (:Metrics {key: 'global'}) node.
+# Writes only bump in-process deltas; flush() folds them into the node in
+# one statement every few seconds, so the hot write paths never contend on
+# the metrics node. rollup() periodically recounts everything from the
+# graph (count-store lookups) to correct any drift.
+#
+# A rollup also bumps m.rollup_epoch. Deltas a worker accumulated before it
+# saw the new epoch may already be part of the recount, so flush() drops
+# them for the recounted counters instead of adding them a second time
+# (at worst a few events miss the totals until the next rollup).
+COUNTERS = [
+    "users",
+    "verified_users",
+    "banned_users",
+    "swipes",
+    "archived_swipes",
+    "likes",
+    "matches",
+    "messages"
+]
+
+# Counters rollup() recomputes from the graph
+ROLLUP_COUNTERS = ["users", "verified_users", "banned_users", "swipes", "likes", "matches", "messages"]
+
+_pending = {}
+_epoch = None  # rollup epoch the pending deltas were accumulated under
+_lock = threading.Lock()
+
+def increment(name: str, amount: int = 1):
+    """Record a change to a dashboard counter"""
+    if name not in COUNTERS:
+        raise ValueError(f"Unknown counter: {name}")
+    if not amount:
+        return
+    with _lock:
+        _pending[name] = _pending.get(name, 0) + amount
+
+def decrement(name: str, amount: int = 1):
+    increment(name, -amount)
+
+def _take_pending():
+    global _pending
+    with _lock:
+        deltas, _pending = _pending, {}
+    return deltas
+
+def flush():
+    """Fold pending deltas into the metrics node"""
+    global _epoch
+    deltas = _take_pending()
+    if not deltas:
+        return 0
+
+    recounted = [name for name in deltas if name in ROLLUP_COUNTERS]
+    kept = [name for name in deltas if name not in ROLLUP_COUNTERS]
+    recounted_updates = " ".join(f"SET m.{name} = coalesce(m.{name}, 0) + ${name}" for name in recounted)
+    kept_updates = "".join(f"m.{name} = coalesce(m.{name}, 0) + ${name}, " for name in kept)
+    query = f"""
+    MERGE (m:Metrics {{key: 'global'}})
+    WITH m, $epoch IS NULL OR coalesce(m.rollup_epoch, 0) = $epoch as current
+    FOREACH (_ IN CASE WHEN current THEN [1] ELSE [] END | {recounted_updates})
+    SET {kept_updates}m.updated_at = $updated_at
+    RETURN current, coalesce(m.rollup_epoch, 0) as epoch
+    """ if recounted else f"""
+    MERGE (m:Metrics {{key: 'global'}})
+    SET {kept_updates}m.updated_at = $updated_at
+    RETURN true as current, coalesce(m.rollup_epoch, 0) as epoch
+    """
+
+    session = get_db()
+    try:
+        record = session.run(query, {**deltas, "epoch": _epoch, "updated_at": datetime.utcnow().isoformat()}).single()
+    except Exception:
+        # Put the deltas back so the next flush retries them
+        for name, amount in deltas.items():
+            increment(name, amount)
+        raise
+    finally:
+        session.close()
+
+    if not record["current"]:
+        print(f"Dropped metric deltas from before rollup epoch {record['epoch']}: {', '.join(recounted)}")
+    _epoch = record["epoch"]
+    return sum(abs(v) for v in deltas.values())
+
+def rollup():
+    """Recount all counters from the graph and overwrite the stored values"""
+    query = """
+    CALL { MATCH (u:User) RETURN count(u) as users }
+    CALL { MATCH (u:User {is_verified: true}) RETURN count(u) as verified_users }
+    CALL { MATCH (u:User {is_banned: true}) RETURN count(u) as banned_users }
+    CALL { MATCH ()-[s:SWIPED]->() RETURN count(s) as swipes }
+    CALL { MATCH ()-[l:LIKES]->() RETURN count(l) as likes }
+    CALL { MATCH ()-[r:MATCHES]->() RETURN count(r) as matches }
+    CALL { MATCH (msg:Message) RETURN count(msg) as messages }
+    MERGE (m:Metrics {key: 'global'})
+    SET m.users = users,
+        m.verified_users = verified_users,
+        m.banned_users = banned_users,
+        m.swipes = swipes,
+        m.likes = likes,
+        m.matches = matches,
+        m.messages = messages,
+        m.rollup_epoch = coalesce(m.rollup_epoch, 0) + 1,
+        m.rolled_up_at = $now,
+        m.updated_at = $now
+    """
+    flush()
+    session = get_db()
+    try:
+        session.run(query, {"now": datetime.utcnow().isoformat()}).consume()
+    finally:
+        session.close()
+
+def get_counters():
+    """Current counter values: stored totals plus this worker's unflushed deltas"""
+    session = get_db()
+    try:
+        record = session.run("MATCH (m:Metrics {key: 'global'}) RETURN m").single()
+    finally:
+        session.close()
+
+    node = dict(record["m"]) if record else {}
+    with _lock:
+        pending = dict(_pending)
+
+    counters = {name: (node.get(name) or 0) + pending.get(name, 0) for name in COUNTERS}
+    counters["updated_at"] = node.get("updated_at")
+    counters["rolled_up_at"] = node.get("rolled_up_at")
+    return counters
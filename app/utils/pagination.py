@@ -0,0 +1,24 @@
+# app/utils/pagination.py
+import base64
+import json
+
+def encode_cursor(*values):
+    """Encode the sort-key values of the last row on a page as an opaque cursor"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int = None):
+    """
+    Decode a cursor produced by encode_cursor. Returns None for an empty
+    cursor and raises ValueError for a malformed one.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or (size is not None and len(values) != size):
+        raise ValueError("Invalid cursor")
+    return values
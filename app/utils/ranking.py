@@ -0,0 +1,197 @@
+# app/utils/ranking.py
+import math
+import os
+from datetime import datetime, timezone
+
+# Try to import numpy (optional dependency)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("WARNING: numpy module not installed. Discovery decks will not be ranked.")
+    print("Install with: pip install numpy")
+
+# Discovery ranking: every candidate gets a score in one vectorized pass
+#   score = w_interests   * Jaccard(viewer interests, candidate interests)
+#         + w_distance    * exp(-distance_km / RANK_DISTANCE_SCALE_KM)
+#         + w_preferences * share of mutual preference checks passed
+#         + w_recency     * 0.5 ** (days since last active / half-life)
+#         + w_affinity    * collaborative-filtering affinity scaled to [0, 1]
+#         + w_like_rate   * like_rate      (from the user_scores job)
+#         + w_response    * response_rate  (from the user_scores job)
+#         + RANK_NOISE    * uniform(0, 1)
+# Missing data (no coordinates, no interests, no preferences) scores a
+# neutral value so incomplete profiles are not buried. The noise term keeps
+# decks from being identical on every refresh.
+RANKING_WEIGHTS = {
+    "interests": float(os.getenv("RANK_WEIGHT_INTERESTS", "0.35")),
+    "distance": float(os.getenv("RANK_WEIGHT_DISTANCE", "0.25")),
+    "preferences": float(os.getenv("RANK_WEIGHT_PREFERENCES", "0.25")),
+    "recency": float(os.getenv("RANK_WEIGHT_RECENCY", "0.15")),
+    "affinity": float(os.getenv("RANK_WEIGHT_AFFINITY", "0.25")),
+    "like_rate": float(os.getenv("RANK_WEIGHT_LIKE_RATE", "0.1")),
+    "response": float(os.getenv("RANK_WEIGHT_RESPONSE", "0.1")),
+}
+RANK_NOISE = float(os.getenv("RANK_NOISE", "0.05"))
+RANK_DISTANCE_SCALE_KM = float(os.getenv("RANK_DISTANCE_SCALE_KM", "25"))
+RANK_RECENCY_HALF_LIFE_DAYS = float(os.getenv("RANK_RECENCY_HALF_LIFE_DAYS", "3"))
+
+EARTH_RADIUS_KM = 6371.0
+
+def _timestamp(value):
+    """Epoch seconds of an ISO string or datetime (naive = UTC); NaN if unknown"""
+    if value is None:
+        return math.nan
+    try:
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if hasattr(value, "to_native"):
+            value = value.to_native()
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+def _timestamps(values):
+    """Epoch seconds for a list of timestamps; NaN where unknown"""
+    # Naive ISO strings (what the API writes) parse in one numpy call
+    if all(isinstance(v, str) and v[-1:].isdigit() and "+" not in v for v in values):
+        try:
+            parsed = np.array(values, dtype="datetime64[us]")
+            return parsed.astype(np.int64) / 1_000_000
+        except ValueError:
+            pass
+    return np.array([_timestamp(v) for v in values], dtype=np.float64)
+
+def _number(value):
+    return math.nan if value is None else float(value)
+
+class CandidateFeatures:
+    """Column arrays describing a batch of candidates, built once per deck"""
+
+    def __init__(self, candidates, viewer: dict):
+        n = len(candidates)
+        self.size = n
+        get = [c.get for c in candidates]
+
+        self.age = np.array([_number(g("age")) for g in get], dtype=np.float64)
+        self.latitude = np.array([_number(g("latitude")) for g in get], dtype=np.float64)
+        self.longitude = np.array([_number(g("longitude")) for g in get], dtype=np.float64)
+        self.min_age = np.array([_number(g("min_age")) for g in get], dtype=np.float64)
+        self.max_age = np.array([_number(g("max_age")) for g in get], dtype=np.float64)
+        self.last_active = _timestamps([g("last_active") for g in get])
+        self.like_rate = np.array([_number(g("like_rate")) for g in get], dtype=np.float64)
+        self.response_rate = np.array([_number(g("response_rate")) for g in get], dtype=np.float64)
+
+        # Preference checks that compare strings are resolved here, leaving
+        # booleans for the vectorized pass
+        viewer_gender = viewer.get("gender")
+        wanted = set(viewer.get("gender_preference") or [])
+        self.gender_ok = np.array([not wanted or g("gender") in wanted for g in get], dtype=bool)
+        self.accepts_viewer = np.array(
+            [not g("gender_preference") or viewer_gender in g("gender_preference") for g in get],
+            dtype=bool
+        )
+
+        # Interest ordinals flattened into (row, ordinal) pairs
+        ordinals = [g("interest_ordinals") or [] for g in get]
+        self.interest_counts = np.fromiter((len(o) for o in ordinals), dtype=np.int64, count=n)
+        self.interest_rows = np.repeat(np.arange(n), self.interest_counts)
+        self.interest_ordinals = np.fromiter(
+            (o for row in ordinals for o in row), dtype=np.int64, count=int(self.interest_counts.sum())
+        )
+
+def build_features(candidates, viewer: dict):
+    return CandidateFeatures(candidates, viewer)
+
+def _scaled_affinity(affinity, n: int):
+    """Min-max scale affinity scores to [0, 1]; unknown (None) scores are neutral"""
+    if affinity is None:
+        return np.full(n, 0.5)
+    values = np.array([math.nan if a is None else a for a in affinity], dtype=np.float64)
+    known = ~np.isnan(values)
+    if not known.any():
+        return np.full(n, 0.5)
+    low, high = values[known].min(), values[known].max()
+    scaled = (values - low) / (high - low) if high > low else np.full(n, 0.5)
+    return np.where(known, scaled, 0.5)
+
+def score_features(features: CandidateFeatures, viewer: dict, weights: dict = None,
+                   noise: float = RANK_NOISE, now: float = None, rng=None, affinity=None):
+    """
+    Score every candidate in one vectorized pass; returns a float array.
+    affinity optionally holds a collaborative-filtering score (or None) per
+    candidate.
+    """
+    weights = {**RANKING_WEIGHTS, **(weights or {})}
+    n = features.size
+    rng = rng or np.random.default_rng()
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+
+    # Interest overlap (Jaccard)
+    viewer_ordinals = np.asarray(sorted(set(viewer.get("interest_ordinals") or [])), dtype=np.int64)
+    if viewer_ordinals.size and features.interest_ordinals.size:
+        shared = np.isin(features.interest_ordinals, viewer_ordinals)
+        intersection = np.bincount(features.interest_rows, weights=shared, minlength=n)
+        union = features.interest_counts + viewer_ordinals.size - intersection
+        interests = np.divide(intersection, union, out=np.zeros(n), where=union > 0)
+    else:
+        interests = np.zeros(n)
+
+    # Distance decay (haversine)
+    viewer_lat = _number(viewer.get("latitude"))
+    viewer_lon = _number(viewer.get("longitude"))
+    distance_km = np.full(n, np.nan)
+    if not (math.isnan(viewer_lat) or math.isnan(viewer_lon)):
+        lat1, lon1 = math.radians(viewer_lat), math.radians(viewer_lon)
+        lat2, lon2 = np.radians(features.latitude), np.radians(features.longitude)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    proximity = np.where(np.isnan(distance_km), 0.5, np.exp(-np.nan_to_num(distance_km) / RANK_DISTANCE_SCALE_KM))
+
+    # Mutual preference fit: candidate's age and gender for the viewer, the
+    # viewer's age and gender for the candidate, and the viewer's max distance
+    with np.errstate(invalid="ignore"):
+        viewer_min_age = _number(viewer.get("min_age"))
+        viewer_max_age = _number(viewer.get("max_age"))
+        age_ok = ~((features.age < viewer_min_age) | (features.age > viewer_max_age))
+        viewer_age = _number(viewer.get("age"))
+        viewer_age_ok = ~((viewer_age < features.min_age) | (viewer_age > features.max_age))
+        max_distance = _number(viewer.get("max_distance"))
+        distance_ok = ~(distance_km > max_distance)
+    preferences = (
+        age_ok.astype(np.float64) + features.gender_ok + viewer_age_ok + features.accepts_viewer + distance_ok
+    ) / 5.0
+
+    # Activity recency
+    idle_days = np.maximum(now - features.last_active, 0.0) / 86400.0
+    recency = np.where(np.isnan(idle_days), 0.5, 0.5 ** (np.nan_to_num(idle_days) / RANK_RECENCY_HALF_LIFE_DAYS))
+
+    score = (
+        weights["interests"] * interests
+        + weights["distance"] * proximity
+        + weights["preferences"] * preferences
+        + weights["recency"] * recency
+        + weights["affinity"] * _scaled_affinity(affinity, n)
+        + weights["like_rate"] * np.nan_to_num(features.like_rate, nan=0.5)
+        + weights["response"] * np.nan_to_num(features.response_rate, nan=0.5)
+    )
+    if noise:
+        score = score + noise * rng.random(n)
+    return score
+
+def rank_candidates(viewer: dict, candidates, weights: dict = None, noise: float = RANK_NOISE, affinity=None):
+    """
+    Return candidates ordered best first. Candidates and the viewer are
+    dicts or Neo4j nodes with User properties; affinity, if given, is
+    aligned with candidates. Without numpy the input order is kept.
+    """
+    candidates = list(candidates)
+    if not NUMPY_AVAILABLE or len(candidates) < 2:
+        return candidates
+
+    features = build_features(candidates, viewer)
+    scores = score_features(features, viewer, weights, noise, affinity=affinity)
+    return [candidates[i] for i in np.argsort(-scores, kind="stable")]
@@ -0,0 +1,223 @@
+# app/utils/recommender.py
+import os
+import threading
+from app.config import get_db
+
+# Try to import numpy (optional dependency)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("WARNING: numpy module not installed. Collaborative filtering is disabled.")
+    print("Install with: pip install numpy")
+
+# Collaborative filtering over swipes. The train_recommender job factorizes
+# the (swiper x swiped) matrix with implicit-feedback ALS, giving every user
+# two vectors: a taste vector x (who they like) and an appeal vector y (who
+# likes them). They are stored together as u.cf_embedding = [x, y].
+#
+# Discovery wants candidates the viewer likes AND who are likely to like the
+# viewer back, i.e. a high x_u.y_v + x_v.y_u. That is a single inner product
+# between the query [x_u, y_u] and the item vector [y_v, x_v], so one
+# inner-product index over [y, x] answers it.
+#
+# Each worker keeps an in-memory IVF index (k-means clusters, only the
+# CF_NPROBE clusters closest to the query are scanned) over the embeddings
+# of the latest model, and reloads it when a newer model is published.
+CF_FACTORS = int(os.getenv("CF_FACTORS", "32"))
+CF_ITERATIONS = int(os.getenv("CF_ITERATIONS", "10"))
+CF_REGULARIZATION = float(os.getenv("CF_REGULARIZATION", "0.1"))
+CF_ALPHA = float(os.getenv("CF_ALPHA", "20"))
+CF_NLIST = int(os.getenv("CF_NLIST", "0"))  # 0 = about sqrt(users)
+CF_NPROBE = int(os.getenv("CF_NPROBE", "8"))
+CF_REFRESH_INTERVAL = int(os.getenv("CF_REFRESH_INTERVAL", "300"))
+# Points assigned to clusters per pass while building the index; bounds the
+# distance matrix to CF_ASSIGN_CHUNK_ROWS x nlist floats
+CF_ASSIGN_CHUNK_ROWS = int(os.getenv("CF_ASSIGN_CHUNK_ROWS", "8192"))
+
+# Confidence multiplier per swipe action (times CF_ALPHA); dislikes are
+# confident negatives rather than missing data
+ACTION_FEEDBACK = {
+    "like": (1.0, 1.0),
+    "super_like": (1.0, 2.0),
+    "dislike": (0.0, 0.5),
+}
+
+MODEL_NAME = "cf"
+
+_lock = threading.Lock()
+_index = None
+
+def train_als(preference, confidence, factors: int = CF_FACTORS, iterations: int = CF_ITERATIONS,
+              regularization: float = CF_REGULARIZATION, rng=None, progress=None):
+    """
+    Implicit-feedback ALS (Hu, Koren & Volinsky). preference and confidence
+    are scipy CSR matrices with the same sparsity pattern: p in {0, 1} and
+    the extra confidence c - 1 of each observed entry. Returns the row
+    factors X and column factors Y.
+    """
+    rng = rng or np.random.default_rng()
+    n_rows, n_cols = preference.shape
+    X = rng.normal(scale=0.01, size=(n_rows, factors))
+    Y = rng.normal(scale=0.01, size=(n_cols, factors))
+    preference_t = preference.T.tocsr()
+    confidence_t = confidence.T.tocsr()
+
+    for iteration in range(iterations):
+        _als_step(X, Y, preference, confidence, regularization)
+        _als_step(Y, X, preference_t, confidence_t, regularization)
+        if progress:
+            progress(iteration + 1)
+    return X, Y
+
+def _als_step(solve_for, fixed, preference, confidence, regularization: float):
+    factors = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(factors)
+    indptr, indices = confidence.indptr, confidence.indices
+    for row in range(solve_for.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            solve_for[row] = 0.0
+            continue
+        cols = indices[start:end]
+        extra = confidence.data[start:end]
+        fixed_rows = fixed[cols]
+        a = gram + (fixed_rows.T * extra) @ fixed_rows
+        b = (fixed_rows.T * (1.0 + extra)) @ preference.data[start:end]
+        solve_for[row] = np.linalg.solve(a, b)
+
+def item_vectors(embeddings):
+    """[x, y] embeddings -> [y, x] vectors to index"""
+    half = embeddings.shape[1] // 2
+    return np.hstack([embeddings[:, half:], embeddings[:, :half]])
+
+class IVFIndex:
+    """Inverted-file approximate inner-product index over user vectors"""
+
+    def __init__(self, user_ids, embeddings, trained_at: str, nlist: int = CF_NLIST, iterations: int = 10, rng=None):
+        rng = rng or np.random.default_rng(0)
+        self.trained_at = trained_at
+        self.user_ids = list(user_ids)
+        self.rows = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.queries = np.asarray(embeddings, dtype=np.float32)
+        self.vectors = item_vectors(self.queries)
+
+        n = len(self.user_ids)
+        nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        self.centroids = self.vectors[rng.choice(n, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._nearest_centroid(self.vectors)
+            counts = np.bincount(assignment, minlength=nlist)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, self.vectors)
+            filled = counts > 0
+            self.centroids[filled] = sums[filled] / counts[filled, None]
+        assignment = self._nearest_centroid(self.vectors)
+
+        # Members of cluster c are order[offsets[c]:offsets[c + 1]]
+        self.order = np.argsort(assignment, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+
+    def _nearest_centroid(self, vectors):
+        # |v|^2 is the same for every centroid, so it does not change the argmin
+        centroid_norms = (self.centroids ** 2).sum(axis=1)
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), CF_ASSIGN_CHUNK_ROWS):
+            chunk = vectors[start:start + CF_ASSIGN_CHUNK_ROWS]
+            distances = centroid_norms[None, :] - 2 * chunk @ self.centroids.T
+            assignment[start:start + len(chunk)] = distances.argmin(axis=1)
+        return assignment
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def search(self, user_id: str, k: int, nprobe: int = CF_NPROBE, exclude=(), skip=None):
+        """
+        Top-k (user_id, score) for a user by reciprocal affinity; [] if the
+        user is not indexed. Users in `exclude` or for whom skip(user_id) is
+        true are passed over before the cut.
+        """
+        row = self.rows.get(user_id)
+        if row is None:
+            return []
+        query = self.queries[row]
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        members = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probes])
+        scores = self.vectors[members] @ query
+
+        results = []
+        for i in np.argsort(-scores):
+            other_id = self.user_ids[members[i]]
+            if members[i] == row or other_id in exclude or (skip and skip(other_id)):
+                continue
+            results.append((other_id, float(scores[i])))
+            if len(results) == k:
+                break
+        return results
+
+    def score(self, user_id: str, other_user_ids):
+        """Exact affinity of a user to each given user; None where either is not indexed"""
+        row = self.rows.get(user_id)
+        if row is None:
+            return [None] * len(other_user_ids)
+        query = self.queries[row]
+        return [
+            float(self.vectors[self.rows[other_id]] @ query) if other_id in self.rows else None
+            for other_id in other_user_ids
+        ]
+
+def _latest_model(session):
+    query = "MATCH (m:RecommenderModel {name: $name}) RETURN m.trained_at as trained_at"
+    record = session.run(query, {"name": MODEL_NAME}).single()
+    return record["trained_at"] if record else None
+
+def _load_embeddings(session, trained_at: str):
+    # One index seek on cf_trained_at, streamed by the driver; no sort
+    query = """
+    MATCH (u:User)
+    WHERE u.cf_trained_at = $trained_at
+    RETURN u.user_id as user_id, u.cf_embedding as embedding
+    """
+    user_ids, embeddings = [], []
+    for record in session.run(query, {"trained_at": trained_at}):
+        user_ids.append(record["user_id"])
+        embeddings.append(record["embedding"])
+    return user_ids, embeddings
+
+def load(force: bool = False):
+    """Build the index from the latest published model if it changed; returns the indexed user count"""
+    global _index
+    if not NUMPY_AVAILABLE:
+        return 0
+
+    session = get_db()
+    trained_at = _latest_model(session)
+    if trained_at is None:
+        return 0
+    if not force and _index is not None and _index.trained_at == trained_at:
+        return len(_index)
+
+    with _lock:
+        user_ids, embeddings = _load_embeddings(session, trained_at)
+        _index = IVFIndex(user_ids, embeddings, trained_at) if user_ids else None
+    if _index is not None:
+        print(f"Loaded recommender index: {len(_index)} users (model {trained_at})")
+    return len(user_ids)
+
+def is_ready():
+    return _index is not None
+
+def recommend(user_id: str, k: int, exclude=(), skip=None):
+    """Users the given user is likely to like and be liked back by, best first"""
+    index = _index
+    if index is None:
+        return []
+    return index.search(user_id, k, exclude=exclude, skip=skip)
+
+def affinity(user_id: str, other_user_ids):
+    """Reciprocal affinity scores aligned with other_user_ids (None where unknown)"""
+    index = _index
+    if index is None:
+        return [None] * len(other_user_ids)
+    return index.score(user_id, other_user_ids)
@@ -0,0 +1,152 @@
+# app/utils/swipe_archive.py
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Cold storage for archived swipes.
+#
+# Files are partitioned by month of the swipe and sharded by the swiping
+# user: <SWIPE_ARCHIVE_DIR>/<YYYY-MM>/shard-<NN>.swc. Each file is
+# append-only and holds a sequence of frames; a frame is a 4-byte
+# big-endian length followed by a zlib-compressed JSON object of parallel
+# columns (from, to, action, ts). Timestamps are microseconds since the
+# epoch (UTC). A truncated trailing frame from an interrupted append is
+# ignored by readers.
+SWIPE_ARCHIVE_DIR = Path(os.getenv("SWIPE_ARCHIVE_DIR", "archive/swipes"))
+SWIPE_ARCHIVE_SHARDS = int(os.getenv("SWIPE_ARCHIVE_SHARDS", "16"))
+
+_FRAME_HEADER = struct.Struct(">I")
+_write_lock = threading.Lock()
+
+def _shard(user_id: str):
+    return int(hashlib.md5(user_id.encode("utf-8")).hexdigest()[:8], 16) % SWIPE_ARCHIVE_SHARDS
+
+def _partition_path(month: str, shard: int):
+    return SWIPE_ARCHIVE_DIR / month / f"shard-{shard:02d}.swc"
+
+def _month_of(ts_us: int):
+    return datetime.fromtimestamp(ts_us / 1_000_000, tz=timezone.utc).strftime("%Y-%m")
+
+def to_microseconds(value):
+    """Convert an ISO string or datetime (naive = UTC) to epoch microseconds"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+def from_microseconds(ts_us: int):
+    """Epoch microseconds to the API's naive-UTC ISO string"""
+    return datetime.fromtimestamp(ts_us / 1_000_000, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+def append_swipes(rows):
+    """
+    Append swipes to cold storage. Each row is a dict with from_user_id,
+    to_user_id, action_code and ts_us. Data is fsynced before returning so
+    callers can safely delete the hot copies afterwards.
+    """
+    groups = {}
+    for row in rows:
+        key = (_month_of(row["ts_us"]), _shard(row["from_user_id"]))
+        groups.setdefault(key, []).append(row)
+
+    with _write_lock:
+        for (month, shard), group in groups.items():
+            group.sort(key=lambda r: (r["from_user_id"], r["ts_us"]))
+            columns = {
+                "from": [r["from_user_id"] for r in group],
+                "to": [r["to_user_id"] for r in group],
+                "action": [r["action_code"] for r in group],
+                "ts": [r["ts_us"] for r in group]
+            }
+            blob = zlib.compress(json.dumps(columns, separators=(",", ":")).encode("utf-8"), 6)
+
+            path = _partition_path(month, shard)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "ab") as f:
+                f.write(_FRAME_HEADER.pack(len(blob)) + blob)
+                f.flush()
+                os.fsync(f.fileno())
+
+    return len(rows)
+
+def _read_frames(path: Path):
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                return
+            (length,) = _FRAME_HEADER.unpack(header)
+            blob = f.read(length)
+            if len(blob) < length:
+                return
+            yield json.loads(zlib.decompress(blob))
+
+def _months_desc(until_month: str = None):
+    if not SWIPE_ARCHIVE_DIR.exists():
+        return []
+    months = sorted((p.name for p in SWIPE_ARCHIVE_DIR.iterdir() if p.is_dir()), reverse=True)
+    if until_month:
+        months = [m for m in months if m <= until_month]
+    return months
+
+def _user_rows(path: Path, user_id: str):
+    rows = {}
+    for columns in _read_frames(path):
+        froms = columns["from"]
+        for i, from_user_id in enumerate(froms):
+            if from_user_id != user_id:
+                continue
+            # A retried archive run may have appended the same swipe twice
+            rows[(columns["to"][i], columns["ts"][i])] = {
+                "to_user_id": columns["to"][i],
+                "action_code": columns["action"][i],
+                "ts_us": columns["ts"][i]
+            }
+    return list(rows.values())
+
+def iter_user_swipes(user_id: str, before: tuple = None, action_code: int = None, after: int = None):
+    """
+    Yield a user's archived swipes newest first as dicts with to_user_id,
+    action_code and ts_us. `before` is an exclusive (ts_us, to_user_id)
+    keyset bound; swipes older than the `after` ts_us are not read, and
+    months before it are never opened.
+    """
+    shard = _shard(user_id)
+    until_month = _month_of(before[0]) if before else None
+    from_month = _month_of(after) if after is not None else None
+
+    for month in _months_desc(until_month):
+        if from_month and month < from_month:
+            return
+        path = _partition_path(month, shard)
+        if not path.exists():
+            continue
+
+        rows = _user_rows(path, user_id)
+        rows.sort(key=lambda r: (r["ts_us"], r["to_user_id"]), reverse=True)
+        for row in rows:
+            if action_code is not None and row["action_code"] != action_code:
+                continue
+            if before and (row["ts_us"], row["to_user_id"]) >= tuple(before):
+                continue
+            if after is not None and row["ts_us"] < after:
+                return
+            yield row
+
+def iter_archived_pairs():
+    """Yield (from_user_id, to_user_ids) per frame across the whole archive"""
+    for month in _months_desc():
+        for path in sorted((SWIPE_ARCHIVE_DIR / month).glob("shard-*.swc")):
+            for columns in _read_frames(path):
+                groups = {}
+                for from_user_id, to_user_id in zip(columns["from"], columns["to"]):
+                    groups.setdefault(from_user_id, []).append(to_user_id)
+                yield from groups.items()
@@ -0,0 +1,167 @@
+# app/utils/swipe_filter.py
+import os
+from app.config import get_db
+from app.utils.bloom import BloomFilter
+from app.utils.cache import TTLCache, register_invalidator
+
+# Per-user Bloom filter over the IDs of users already swiped on.
+# It is persisted on the User node as a byte array (u.swiped_filter) so it
+# survives restarts and cache eviction, and lets discovery drop seen
+# candidates in Python instead of evaluating NOT (u)-[:SWIPED]->(other)
+# against every user in the graph. It also keeps archived swipes (which no
+# longer have SWIPED edges) out of the deck.
+SWIPE_FILTER_MIN_CAPACITY = int(os.getenv("SWIPE_FILTER_MIN_CAPACITY", "1024"))
+SWIPE_FILTER_ERROR_RATE = float(os.getenv("SWIPE_FILTER_ERROR_RATE", "0.01"))
+SWIPE_FILTER_CACHE_SIZE = int(os.getenv("SWIPE_FILTER_CACHE_SIZE", "20000"))
+SWIPE_FILTER_CACHE_TTL = int(os.getenv("SWIPE_FILTER_CACHE_TTL", "900"))
+
+_filters = TTLCache(maxsize=SWIPE_FILTER_CACHE_SIZE, ttl=SWIPE_FILTER_CACHE_TTL)
+
+def _new_filter(expected_items: int):
+    capacity = max(SWIPE_FILTER_MIN_CAPACITY, 2 * expected_items)
+    return BloomFilter(capacity, SWIPE_FILTER_ERROR_RATE)
+
+# Every write of u.swiped_filter first takes the user node's write lock and
+# re-reads the stored filter, so writers on different workers merge into
+# the stored bytes instead of overwriting them with their cached copies.
+LOCKED_FILTER_QUERY = """
+MATCH (u:User {user_id: $user_id})
+SET u.swiped_filter_lock = true
+REMOVE u.swiped_filter_lock
+RETURN u.swiped_filter as data
+"""
+
+LOCKED_SWIPED_IDS_QUERY = """
+MATCH (u:User {user_id: $user_id})
+SET u.swiped_filter_lock = true
+REMOVE u.swiped_filter_lock
+WITH u
+MATCH (u)-[:SWIPED]->(other:User)
+RETURN other.user_id as user_id
+"""
+
+STORE_FILTER_QUERY = "MATCH (u:User {user_id: $user_id}) SET u.swiped_filter = $swiped_filter"
+
+# IDs a user swiped on whose edges moved to cold storage, recorded by the
+# archive job in the same transaction that deletes the edges, so rebuilds
+# and duplicate checks never read the archive files
+ARCHIVED_IDS_QUERY = """
+MATCH (a:ArchivedSwipes {user_id: $user_id})
+RETURN a.to_user_ids as to_user_ids
+"""
+
+HAS_ARCHIVED_QUERY = """
+MATCH (a:ArchivedSwipes {user_id: $user_id})
+RETURN size(coalesce(a.to_user_ids, [])) > 0 as has_archived
+"""
+
+ARCHIVED_AMONG_QUERY = """
+MATCH (a:ArchivedSwipes {user_id: $user_id})
+RETURN [id IN $other_user_ids WHERE id IN a.to_user_ids] as archived
+"""
+
+def archived_swiped_ids(user_id: str):
+    """All user IDs this user swiped on that now live in cold storage"""
+    session = get_db()
+    result = session.run(ARCHIVED_IDS_QUERY, {"user_id": user_id}).single()
+    return set(result["to_user_ids"] or []) if result else set()
+
+def has_archived_swipes(user_id: str):
+    """Whether any of this user's swipes have been moved to cold storage"""
+    session = get_db()
+    result = session.run(HAS_ARCHIVED_QUERY, {"user_id": user_id}).single()
+    return bool(result and result["has_archived"])
+
+def archived_swipes_among(user_id: str, other_user_ids):
+    """
+    The given users this user swiped on in cold storage. Only filter hits
+    are looked up, so users the filter rules out cost nothing.
+    """
+    candidates = [other_id for other_id in other_user_ids if might_have_swiped(user_id, other_id)]
+    if not candidates:
+        return set()
+    session = get_db()
+    result = session.run(ARCHIVED_AMONG_QUERY, {"user_id": user_id, "other_user_ids": candidates}).single()
+    return set(result["archived"]) if result else set()
+
+def _parse_filter(user_id: str, data):
+    """A stored filter, or None if it is missing, unreadable or saturated"""
+    if not data:
+        return None
+    try:
+        bloom = BloomFilter.from_bytes(data)
+    except ValueError as e:
+        print(f"Discarding swipe filter for {user_id}: {e}")
+        return None
+    return None if bloom.is_saturated else bloom
+
+def rebuild_filter(user_id: str):
+    """Rebuild a user's filter from their SWIPED edges and archived swipes, resized to fit"""
+    archived_ids = archived_swiped_ids(user_id)
+
+    def _rebuild(tx):
+        # The lock is taken before reading the edges, so swipes committed by
+        # other workers are all seen and later ones merge into this filter
+        swiped_ids = {record["user_id"] for record in tx.run(LOCKED_SWIPED_IDS_QUERY, {"user_id": user_id})}
+        swiped_ids.update(archived_ids)
+        bloom = _new_filter(len(swiped_ids))
+        bloom.update(swiped_ids)
+        tx.run(STORE_FILTER_QUERY, {"user_id": user_id, "swiped_filter": bloom.to_bytes()}).consume()
+        return bloom
+
+    session = get_db()
+    try:
+        bloom = session.execute_write(_rebuild)
+    finally:
+        session.close()
+    _filters.set(user_id, bloom)
+    return bloom
+
+def _load_filter(user_id: str):
+    session = get_db()
+    query = "MATCH (u:User {user_id: $user_id}) RETURN u.swiped_filter as data"
+    result = session.run(query, {"user_id": user_id}).single()
+
+    bloom = _parse_filter(user_id, result["data"] if result else None)
+    return bloom if bloom is not None else rebuild_filter(user_id)
+
+def get_swipe_filter(user_id: str):
+    """Get the (cached) swiped-set filter for a user"""
+    return _filters.get_or_load(user_id, _load_filter)
+
+def might_have_swiped(user_id: str, other_user_id: str):
+    """False means definitely not swiped; True means probably swiped"""
+    return other_user_id in get_swipe_filter(user_id)
+
+def filter_unswiped(user_id: str, items, key=lambda item: item):
+    """Drop items whose key(item) user ID the user has (probably) swiped on"""
+    bloom = get_swipe_filter(user_id)
+    return [item for item in items if key(item) not in bloom]
+
+def merge_swipes(tx, user_id: str, other_user_ids):
+    """
+    Inside the write transaction that records swipes: lock the user node,
+    add the swiped IDs to the stored filter and write it back. Returns the
+    merged filter (pass it to remember() once committed), or None when the
+    stored filter is missing or outgrew its capacity; then call
+    rebuild_filter after the swipes are committed.
+    """
+    record = tx.run(LOCKED_FILTER_QUERY, {"user_id": user_id}).single()
+    bloom = _parse_filter(user_id, record["data"] if record else None)
+    if bloom is None:
+        return None
+
+    bloom.update(other_user_ids)
+    if bloom.is_saturated:
+        return None
+    tx.run(STORE_FILTER_QUERY, {"user_id": user_id, "swiped_filter": bloom.to_bytes()}).consume()
+    return bloom
+
+def remember(user_id: str, bloom: BloomFilter):
+    """Cache a filter that was just committed"""
+    _filters.set(user_id, bloom)
+
+@register_invalidator
+def invalidate(*user_ids: str):
+    for user_id in user_ids:
+        _filters.pop(user_id)
@@ -0,0 +1,58 @@
+import argparse
+import random
+import statistics
+import time
+from app.utils import candidate_index
+
+parser = argparse.ArgumentParser(description="Benchmark candidate index queries")
+parser.add_argument("--users", type=int, default=1000000, help="Indexed users")
+parser.add_argument("--runs", type=int, default=50, help="Timed runs")
+parser.add_argument("--limit", type=int, default=400, help="Candidates per query")
+parser.add_argument("--spread", type=float, default=2.0, help="Degrees of latitude/longitude users are spread over")
+args = parser.parse_args()
+
+if not candidate_index.NUMPY_AVAILABLE:
+    raise SystemExit("numpy is required: pip install numpy")
+
+random.seed(42)
+genders = ["male", "female", "other"]
+
+def fake_user(i):
+    located = random.random() > 0.05
+    return {
+        "user_id": f"user-{i}",
+        "age": random.randint(18, 60),
+        "gender": random.choice(genders),
+        "gender_preference": random.sample(genders, random.randint(0, 2)),
+        "min_age": random.choice([None, 18, 25]),
+        "max_age": random.choice([None, 40, 60]),
+        "max_distance": random.choice([10, 25, 50, 100]),
+        "latitude": 23.8 + random.uniform(-args.spread, args.spread) if located else None,
+        "longitude": 90.4 + random.uniform(-args.spread, args.spread) if located else None,
+        "activity_score": random.random()
+    }
+
+start = time.perf_counter()
+index = candidate_index.CandidateIndex.from_users(fake_user(i) for i in range(args.users))
+build_seconds = time.perf_counter() - start
+
+viewer = {**fake_user(0), "gender": "female", "gender_preference": ["male"], "min_age": 25, "max_age": 40,
+          "latitude": 23.8, "longitude": 90.4, "max_distance": 50}
+
+def timed(viewer):
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        index.query(viewer, args.limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+local_median, local_min = timed(viewer)
+anywhere_median, anywhere_min = timed({**viewer, "latitude": None, "longitude": None})
+
+print("=" * 60)
+print(f"CANDIDATE INDEX BENCHMARK ({args.users} users, {args.runs} runs)")
+print("=" * 60)
+print(f"{'snapshot build':>24}: {build_seconds:8.2f} s")
+print(f"{'within 50 km':>24}: median {local_median:8.2f} ms   min {local_min:8.2f} ms")
+print(f"{'no distance limit':>24}: median {anywhere_median:8.2f} ms   min {anywhere_min:8.2f} ms")
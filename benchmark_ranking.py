@@ -0,0 +1,56 @@
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from app.utils import ranking
+
+parser = argparse.ArgumentParser(description="Benchmark discovery deck ranking")
+parser.add_argument("--candidates", type=int, default=10000, help="Candidates per deck")
+parser.add_argument("--runs", type=int, default=50, help="Timed runs")
+parser.add_argument("--interests", type=int, default=120, help="Catalog size (ordinals)")
+args = parser.parse_args()
+
+if not ranking.NUMPY_AVAILABLE:
+    raise SystemExit("numpy is required: pip install numpy")
+
+random.seed(42)
+now = datetime.utcnow()
+
+def fake_user():
+    return {
+        "age": random.randint(18, 60),
+        "gender": random.choice(["male", "female", "non-binary"]),
+        "latitude": 23.8 + random.uniform(-1, 1),
+        "longitude": 90.4 + random.uniform(-1, 1),
+        "min_age": random.randint(18, 30),
+        "max_age": random.randint(30, 60),
+        "max_distance": random.choice([10, 25, 50, 100]),
+        "gender_preference": random.sample(["male", "female", "non-binary"], random.randint(0, 2)),
+        "interest_ordinals": random.sample(range(args.interests), random.randint(0, 10)),
+        "last_active": (now - timedelta(hours=random.uniform(0, 24 * 30))).isoformat()
+    }
+
+viewer = fake_user()
+candidates = [fake_user() for _ in range(args.candidates)]
+
+def timed(fn):
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+features = ranking.build_features(candidates, viewer)
+
+build_median, build_min = timed(lambda: ranking.build_features(candidates, viewer))
+score_median, score_min = timed(lambda: ranking.score_features(features, viewer))
+rank_median, rank_min = timed(lambda: ranking.rank_candidates(viewer, candidates))
+
+print("=" * 60)
+print(f"RANKING BENCHMARK ({args.candidates} candidates, {args.runs} runs)")
+print("=" * 60)
+print(f"{'build features':>24}: median {build_median:8.2f} ms   min {build_min:8.2f} ms")
+print(f"{'vectorized scoring':>24}: median {score_median:8.2f} ms   min {score_min:8.2f} ms")
+print(f"{'end-to-end rank':>24}: median {rank_median:8.2f} ms   min {rank_min:8.2f} ms")
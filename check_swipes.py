@@ -25,7 +25,7 @@ with driver.session(database=NEO4J_DATABASE) as session:
         MATCH (from:User)-[s:SWIPED]->(to:User)
         RETURN from.name as from_name, from.user_id as from_id,
                to.name as to_name, to.user_id as to_id,
-               s.action as action
+               coalesce(s.action, ['dislike', 'like', 'super_like'][s.action_code]) as action
         ORDER BY from_name
     ''')
     swipes = list(result)
@@ -0,0 +1,15 @@
+import argparse
+from app.crud import Interest as crud_interest
+
+parser = argparse.ArgumentParser(description="Normalize user interest lists into HAS_INTEREST relationships")
+parser.add_argument("--batch-size", type=int, default=500, help="Users per batch")
+args = parser.parse_args()
+
+print("=" * 60)
+print("INTEREST MIGRATION")
+print("=" * 60)
+
+result = crud_interest.migrate_interest_lists(args.batch_size)
+print(f"Assigned ordinals to {result['interests_numbered']} interests")
+print(f"Migrated interests for {result['users_migrated']} users")
+print("\nRun this once after deploying; new and updated profiles are kept in sync automatically.")
@@ -0,0 +1,26 @@
+import argparse
+from app.crud import Swipe as crud_swipe
+
+parser = argparse.ArgumentParser(description="Convert SWIPED relationships to the compact storage format")
+parser.add_argument("--report", action="store_true", help="Only print the storage-size report")
+parser.add_argument("--batch-size", type=int, default=10000, help="Relationships per transaction")
+parser.add_argument("--keep-ids", action="store_true", help="Keep the synthetic swipe_id property")
+args = parser.parse_args()
+
+def print_report(title):
+    report = crud_swipe.get_swipe_storage_report()
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+    for key, value in report.items():
+        print(f"{key:>36}: {value}")
+
+print_report("SWIPE STORAGE REPORT")
+
+if not args.report:
+    print("\nMigrating legacy swipes to compact format...")
+    converted = crud_swipe.migrate_swipes_to_compact(args.batch_size, args.keep_ids)
+    print(f"Converted {converted} swipes")
+    print()
+    print_report("SWIPE STORAGE REPORT (AFTER MIGRATION)")
+    print("\nSet SWIPE_STORAGE_FORMAT=compact so new swipes are written compactly.")